@@ -0,0 +1,229 @@
+"""
+Генератор синтетических листов раскроя для проверки масштабируемости конвертера.
+
+Создаёт DXF с заданным числом деталей на слоях, которые ожидает Settings (наружный контур — цвет 5, сквозные резы — 4, фрезеровки — 3, граница листа — 1), и CSV координат деталей в формате models/coord_data.
+
+    python -m benchmarks.generate drawings/synthetic_cnc.dxf --parts 2000 --repetition 0.9
+"""
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+
+import ezdxf
+from ezdxf.document import Drawing
+from ezdxf.layouts.layout import Modelspace
+
+
+LAYERS: dict[str, int] = {
+    "OUTER": 5,
+    "INNER": 4,
+    "MILL": 3,
+    "SHEET": 1,
+}
+GAP: float = 20.  # зазор между деталями, мм
+FILLET_BULGE: float = math.tan(math.pi / 8)  # скругление угла 90°
+
+
+class PartDesign:
+    def __init__(
+        self,
+        width: float,
+        height: float,
+        fillets: list[float],
+        cuts: list[tuple[float, float, float, float]],
+        mills: list[tuple[float, float, float]]
+    ):
+        # все координаты — относительно центра детали
+        self.width: float = width
+        self.height: float = height
+        self.fillets: list[float] = fillets  # радиусы скругления углов (0 — без скругления), против часовой с левого нижнего
+        self.cuts: list[tuple[float, float, float, float]] = cuts  # x, y, ширина, высота прямоугольных пазов
+        self.mills: list[tuple[float, float, float]] = mills  # x, y, радиус круглых фрезеровок
+
+
+def rounded_rectangle(cx: float, cy: float, w: float, h: float, fillets: list[float]) -> list[tuple[float, float, float]]:
+    """
+    Функция rounded_rectangle возвращает вершины (x, y, bulge) прямоугольника против часовой стрелки со скруглёнными углами.
+    """
+    _corners: list[tuple[float, float, float, float]] = [
+        (cx - w / 2, cy - h / 2, 1, 1),
+        (cx + w / 2, cy - h / 2, -1, 1),
+        (cx + w / 2, cy + h / 2, -1, -1),
+        (cx - w / 2, cy + h / 2, 1, -1),
+    ]
+    _points: list[tuple[float, float, float]] = []
+    for i, (x, y, sx, sy) in enumerate(_corners):
+        r: float = fillets[i]
+        if r == 0:
+            _points.append((x, y, 0))
+            continue
+        # вершина на входящей стороне несёт выпуклость дуги до вершины на исходящей стороне
+        if i % 2 == 0:
+            _points.append((x, y + sy * r, FILLET_BULGE))
+            _points.append((x + sx * r, y, 0))
+        else:
+            _points.append((x + sx * r, y, FILLET_BULGE))
+            _points.append((x, y + sy * r, 0))
+    return _points
+
+
+def make_design(index: int, rng: random.Random, arcDensity: float, cuts: int, mills: int) -> PartDesign:
+    # размеры зависят от номера, чтобы разные шаблоны не совпадали по длине реза и площади
+    _width: float = 300. + (index % 40) * 15. + rng.randint(0, 9)
+    _height: float = 200. + (index // 40 % 40) * 10. + rng.randint(0, 9)
+    _fillets: list[float] = [rng.choice([5., 10., 15.]) if rng.random() < arcDensity else 0. for _ in range(4)]
+    _cells: int = cuts + mills
+    _cellWidth: float = (_width - 40.) / max(_cells, 1)
+    _features: list[int] = list(range(_cells))
+    rng.shuffle(_features)
+    _cuts: list[tuple[float, float, float, float]] = []
+    _mills: list[tuple[float, float, float]] = []
+    for k, cell in enumerate(_features):
+        _x: float = -_width / 2 + 20. + _cellWidth * (cell + 0.5)
+        _y: float = rng.uniform(-_height / 6, _height / 6)
+        if k < cuts:
+            _cuts.append((_x, _y, _cellWidth * 0.5, _height * 0.4))
+        else:
+            _mills.append((_x, _y, min(_cellWidth, _height) * rng.uniform(0.1, 0.25)))
+    return PartDesign(_width, _height, _fillets, _cuts, _mills)
+
+
+def rotate(x: float, y: float, quarter: int) -> tuple[float, float]:
+    for _ in range(quarter % 4):
+        x, y = -y, x
+    return x, y
+
+
+def add_part(msp: Modelspace, design: PartDesign, cx: float, cy: float, quarter: int) -> None:
+    _outer = rounded_rectangle(0., 0., design.width, design.height, design.fillets)
+    msp.add_lwpolyline(
+        [(*rotate(x, y, quarter), b) for x, y, b in _outer],
+        format="xyb", close=True, dxfattribs={"layer": "OUTER"}
+    ).translate(cx, cy, 0)
+    for x, y, w, h in design.cuts:
+        _slot = rounded_rectangle(x, y, w, h, [min(w, h) / 4] * 4)
+        msp.add_lwpolyline(
+            [(*rotate(px, py, quarter), b) for px, py, b in _slot],
+            format="xyb", close=True, dxfattribs={"layer": "INNER"}
+        ).translate(cx, cy, 0)
+    for x, y, r in design.mills:
+        _center: tuple[float, float] = rotate(x, y, quarter)
+        msp.add_circle((cx + _center[0], cy + _center[1]), r, dxfattribs={"layer": "MILL"})
+
+
+def generate_sheet(
+    dxfPath: str,
+    csvPath: str | None = None,
+    parts: int = 1000,
+    repetition: float = 0.8,
+    arcDensity: float = 0.5,
+    cuts: int = 2,
+    mills: int = 2,
+    rotations: bool = True,
+    blockName: str | None = None,
+    seed: int = 0
+) -> Drawing:
+    """
+    Функция generate_sheet создает DXF-лист раскроя с синтетическими деталями и, при необходимости, CSV координат деталей.
+
+    :param parts: число деталей на листе
+    :type parts: int
+    :param repetition: доля деталей, повторяющих уже встречавшиеся (0 — все разные)
+    :type repetition: float
+    :param arcDensity: доля скруглённых углов наружного контура
+    :type arcDensity: float
+    :param cuts: число сквозных пазов в детали
+    :type cuts: int
+    :param mills: число фрезеровок в детали
+    :type mills: int
+    :param rotations: поворачивать ли детали на случайный угол, кратный 90°
+    :type rotations: bool
+    :param blockName: имя блока для столбца Name в CSV (по умолчанию — из имени DXF-файла, как в конвертере)
+    :type blockName: str | None
+    :return: созданный чертёж
+    :rtype: Drawing
+    """
+    rng = random.Random(seed)
+    _designCount: int = max(1, round(parts * (1 - repetition)))
+    _designs: list[PartDesign] = [make_design(i, rng, arcDensity, cuts, mills) for i in range(_designCount)]
+    # каждый шаблон встречается хотя бы раз, остальные детали — случайные повторы
+    _order: list[int] = list(range(_designCount)) + [rng.randrange(_designCount) for _ in range(parts - _designCount)]
+    rng.shuffle(_order)
+
+    dwg: Drawing = ezdxf.new("R2010")
+    for name, color in LAYERS.items():
+        dwg.layers.add(name, color=color)
+    msp: Modelspace = dwg.modelspace()
+    _cell: float = max(max(d.width, d.height) for d in _designs) + GAP
+    _columns: int = max(1, math.ceil(math.sqrt(parts)))
+    _rows: int = math.ceil(parts / _columns)
+    msp.add_lwpolyline(
+        [(0, 0), (_columns * _cell, 0), (_columns * _cell, _rows * _cell), (0, _rows * _cell)],
+        close=True, dxfattribs={"layer": "SHEET"}
+    )
+
+    if blockName is None:
+        blockName = os.path.splitext(os.path.basename(dxfPath))[0].removesuffix("_cnc")
+    # номера шаблонов назначаются конвертером в порядке первого появления детали на листе
+    _templateNumbers: dict[int, int] = dict()
+    _csvRows: list[dict[str, str]] = []
+    for k, designIndex in enumerate(_order):
+        _quarter: int = rng.randrange(4) if rotations else 0
+        _cx: float = (k % _columns + 0.5) * _cell
+        _cy: float = (k // _columns + 0.5) * _cell
+        add_part(msp, _designs[designIndex], _cx, _cy, _quarter)
+        _number: int = _templateNumbers.setdefault(designIndex, len(_templateNumbers) + 1)
+        _ref: tuple[float, float] = rotate(1., 0., _quarter)
+        _csvRows.append({
+            "Name": f"{blockName}/{_number}", "trueName": "",
+            "x": f"{_cx:.2f}", "y": f"{_cy:.2f}", "z": "0.00",
+            "Axis.X": "0.00", "Axis.Y": "0.00", "Axis.Z": "1.00",
+            "RefDirection.X": f"{_ref[0]:.2f}", "RefDirection.Y": f"{_ref[1]:.2f}", "RefDirection.Z": "0.00",
+        })
+    dwg.saveas(dxfPath)
+
+    if csvPath is not None:
+        with open(csvPath, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(_csvRows[0].keys()))
+            writer.writeheader()
+            writer.writerows(_csvRows)
+    return dwg
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Генерация синтетического DXF-листа раскроя.")
+    parser.add_argument("dxf", help="путь к создаваемому DXF-файлу")
+    parser.add_argument("--csv", help="путь к создаваемому CSV координат деталей")
+    parser.add_argument("-n", "--parts", type=int, default=1000, help="число деталей")
+    parser.add_argument("--repetition", type=float, default=0.8, help="доля повторяющихся деталей, 0..1")
+    parser.add_argument("--arc-density", type=float, default=0.5, help="доля скруглённых углов контура, 0..1")
+    parser.add_argument("--cuts", type=int, default=2, help="сквозных пазов на деталь")
+    parser.add_argument("--mills", type=int, default=2, help="фрезеровок на деталь")
+    parser.add_argument("--no-rotations", action="store_true", help="не поворачивать детали")
+    parser.add_argument("--block", help="имя блока для CSV")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    generate_sheet(
+        dxfPath=args.dxf,
+        csvPath=args.csv,
+        parts=args.parts,
+        repetition=args.repetition,
+        arcDensity=args.arc_density,
+        cuts=args.cuts,
+        mills=args.mills,
+        rotations=not args.no_rotations,
+        blockName=args.block,
+        seed=args.seed
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Проверка инкрементального обновления: обновлённая модель должна совпадать с полной пересборкой того же чертежа (без учёта GlobalId и истории владения).
+
+Чертёж конвертируется полностью, затем в его копии удаляется контур одной детали и сдвигается фрезеровка другой; по изменённому чертежу прежняя модель обновляется (--incremental) и строится заново, модели сравниваются.
+
+    python -m benchmarks.incremental                              # END-S-0: удаляется деталь 1DE, сдвигается фрезеровка детали 1F9
+    python -m benchmarks.incremental drawings/X_cnc.dxf --remove 2A --move 3B --shift 5 0
+"""
+from src.classes import Settings
+from src.converter import convert_file, get_block_name
+from src.placement import find_placement_file
+from main import LAYERROLES
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from collections import Counter
+
+import ezdxf
+from shapely.geometry import Polygon
+
+import ifcopenshell as ios
+from ifcopenshell import entity_instance
+
+
+COORDPATH: str = "./models/coord_data"
+TEMPLATE: str = "./models/TEMPLATE.ifc"
+MILLLAYER: str = "5_ANYTOOL_HALF_MILL_9MM_IN"
+# атрибуты, которые различаются у обновлённой и пересобранной моделей по построению
+IGNORED: set[str] = {"GlobalId", "OwnerHistory"}
+# история владения: при обновлении сохранённые объекты ссылаются на прежнюю запись
+IGNOREDCLASSES: set[str] = {"IfcOwnerHistory", "IfcPersonAndOrganization", "IfcPerson", "IfcOrganization", "IfcApplication"}
+
+
+def edit_drawing(dxfPath: str, remove: str, move: str, shift: tuple[float, float]) -> None:
+    """
+    Функция edit_drawing удаляет из чертежа наружный контур с дескриптором remove и сдвигает на shift первую фрезеровку внутри контура с дескриптором move.
+    """
+    _dwg = ezdxf.readfile(dxfPath)
+    _msp = _dwg.modelspace()
+    _msp.delete_entity(_dwg.entitydb[remove])
+    _contour = Polygon([(x, y) for x, y, *_ in _dwg.entitydb[move].get_points()])
+    _mill = next(e for e in _msp.query(f'LWPOLYLINE[layer=="{MILLLAYER}"]')
+                 if _contour.contains(Polygon([(x, y) for x, y, *_ in e.get_points()]).centroid))
+    _mill.translate(shift[0], shift[1], 0)
+    _dwg.saveas(dxfPath)
+
+
+class ModelDigest:
+    """
+    Класс ModelDigest описывает модель IFC независимо от номеров сущностей: каждая сущность заменяется хешем её класса и атрибутов, ссылки — хешами сущностей, на которые они указывают, элементы множеств (SET) сортируются.
+    Модель описывается набором хешей сущностей, на которые ничто не ссылается (связи, проект, а также забытые в файле объекты).
+
+    :param model: файл IFC
+    :type model: ios.file
+    """
+
+    def __init__(self, model: ios.file):
+        self.model: ios.file = model
+        self.hashes: dict[int, str] = dict()
+        self.roots: Counter[str] = self.formRoots()
+
+    def formRoots(self) -> Counter[str]:
+        _roots: Counter[str] = Counter()
+        for e in self.model:
+            if e.is_a() not in IGNOREDCLASSES and self.model.get_total_inverses(e) == 0:
+                _roots[f"{e.is_a()} {self.hash(e)}"] += 1
+        return _roots
+
+    def hash(self, entity: entity_instance) -> str:
+        _hash: str | None = self.hashes.get(entity.id())
+        if _hash is None:
+            _values: list[str] = [
+                f"{a.name()}={self.value(getattr(entity, a.name()), self.isSet(a))}"
+                for a in entity.wrapped_data.declaration().as_entity().all_attributes() if a.name() not in IGNORED
+            ]
+            _hash = hashlib.sha1(f"{entity.is_a()}({', '.join(_values)})".encode()).hexdigest()
+            self.hashes[entity.id()] = _hash
+        return _hash
+
+    @staticmethod
+    def isSet(attribute) -> bool:
+        _aggregation = attribute.type_of_attribute().as_aggregation_type()
+        return _aggregation is not None and _aggregation.type_of_aggregation_string() == "set"
+
+    def value(self, value: object, isSet: bool = False) -> str:
+        if isinstance(value, entity_instance):
+            return self.hash(value) if value.id() else repr(value)
+        if isinstance(value, tuple):
+            _items: list[str] = [self.value(v) for v in value]
+            return f"({', '.join(sorted(_items) if isSet else _items)})"
+        return repr(value)
+
+
+def compare_models(updated: str, rebuilt: str) -> list[str]:
+    """
+    Функция compare_models сравнивает две модели IFC и возвращает описания расхождений (пустой список, если модели совпадают).
+    """
+    _updated: Counter[str] = ModelDigest(ios.open(updated)).roots
+    _rebuilt: Counter[str] = ModelDigest(ios.open(rebuilt)).roots
+    _differences: list[str] = []
+    for root in sorted(set(_updated) | set(_rebuilt)):
+        if _updated[root] != _rebuilt[root]:
+            _differences.append(f"{root}: updated {_updated[root]}, rebuilt {_rebuilt[root]}")
+    return _differences
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение инкрементального обновления с полной пересборкой.")
+    parser.add_argument("dxf", nargs="?", default="./drawings/SKYLARK250_END-S-0_cnc.dxf", help="чертёж")
+    parser.add_argument("--remove", default="1DE", help="дескриптор удаляемого наружного контура")
+    parser.add_argument("--move", default="1F9", help="дескриптор наружного контура детали, фрезеровка которой сдвигается")
+    parser.add_argument("--shift", type=float, nargs=2, default=(10., 0.), metavar=("DX", "DY"), help="сдвиг фрезеровки, мм")
+    args = parser.parse_args()
+
+    _blockName: str = get_block_name(args.dxf)
+    _settings = Settings(thickness=18, outerColor=5, innerColor=4, millColor=3, layerRoles=LAYERROLES)
+    with tempfile.TemporaryDirectory() as tmp:
+        _dxfPath: str = os.path.join(tmp, os.path.basename(args.dxf))
+        shutil.copyfile(args.dxf, _dxfPath)
+        _updated: str = os.path.join(tmp, "updated.ifc")
+        _rebuilt: str = os.path.join(tmp, "rebuilt.ifc")
+
+        def convert(ifcPath: str, incremental: bool):
+            result = convert_file(
+                dxfPath=_dxfPath,
+                ifcPath=ifcPath,
+                placementPath=find_placement_file(COORDPATH, _blockName),
+                templatePath=TEMPLATE,
+                settings=_settings,
+                blockName=_blockName,
+                validation="off",
+                incremental=incremental
+            )
+            if not result.ok:
+                sys.exit(f"{ifcPath}: {result.message}")
+            return result
+
+        convert(_updated, False)
+        edit_drawing(_dxfPath, args.remove, args.move, tuple(args.shift))
+        _changes: dict[str, int] = convert(_updated, True).changes
+        convert(_rebuilt, False)
+        print(f"{_blockName}: " + ", ".join(f"{k} {v}" for k, v in _changes.items()))
+        _differences: list[str] = compare_models(_updated, _rebuilt)
+    for difference in _differences:
+        print(difference)
+    print("OK: the updated model equals the rebuilt one" if not _differences else f"FAILED: {len(_differences)} differences")
+    sys.exit(1 if _differences else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Бенчмарк конвертера на чертежах из ./drawings.
+
+Каждый чертёж конвертируется в отдельном процессе (чтобы пиковая память не накапливалась между чертежами) заданное число раз; по каждому этапу берётся минимальное время. Результаты сравниваются с сохранённой базой benchmarks/baseline.json.
+
+    python -m benchmarks.run                       # сравнение с базой
+    python -m benchmarks.run --update-baseline     # перезапись базы
+    python -m benchmarks.run --threshold 0.2 -r 5 tiny END-S-0
+"""
+from src.classes import Settings
+from src.converter import convert_file, get_block_name
+from src.placement import find_placement_file
+from src import trace
+from main import LAYERROLES
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+
+DXFPATH: str = "./drawings"
+COORDPATH: str = "./models/coord_data"
+TEMPLATE: str = "./models/TEMPLATE.ifc"
+BASELINE: str = "./benchmarks/baseline.json"
+
+# имя случая -> DXF-файл
+CASES: dict[str, str] = {
+    "tiny": "tiny.dxf",
+    "tiny1": "tiny1.dxf",
+    "END-S-0": "SKYLARK250_END-S-0_cnc.dxf",
+    "CORNER-S": "SKYLARK250_CORNER-S_cnc.dxf",
+    "WINDOW-XL2": "SKYLARK250_WINDOW-XL2_cnc_.dxf",
+}
+
+# этап бенчмарка -> участок трассы (src.trace)
+STAGES: dict[str, str] = {
+    "load": "readfile",
+    "paths": "PathFormer.formPaths",
+    "details": "Sheet.formDetails",
+    "templates": "DetailComparer",
+    "plateTypes": "Block.makePlateTypes",
+    "plates": "Block.makePlates",
+    "write": "ifcFile.write",
+    "validate": "validate",
+    "total": "convert",
+}
+
+
+def get_peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    _rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux — килобайты, macOS — байты
+    return _rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def run_case(dxfPath: str, coordDir: str, repeat: int, validation: bool) -> dict:
+    """
+    Функция run_case конвертирует чертёж repeat раз и возвращает минимальное время каждого этапа и пиковую память процесса.
+    """
+    _blockName: str = get_block_name(dxfPath)
+    # роли слоёв — как в main.py по умолчанию
+    _settings = Settings(thickness=18, outerColor=5, innerColor=4, millColor=3, layerRoles=LAYERROLES)
+    _stages: dict[str, float] = dict()
+    _plates: int = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(repeat):
+            tracer: trace.Tracer = trace.enable()
+            result = convert_file(
+                dxfPath=dxfPath,
+                ifcPath=os.path.join(tmp, "out.ifc"),
+                placementPath=find_placement_file(coordDir, _blockName),
+                templatePath=TEMPLATE,
+                settings=_settings,
+                blockName=_blockName,
+                validation="full" if validation else "off"
+            )
+            trace.disable()
+            if not result.ok:
+                return {"status": "error", "message": result.message}
+            _plates = result.plates
+            _totals: dict[str, tuple[int, float]] = tracer.totals()
+            for stage, spanName in STAGES.items():
+                if spanName in _totals:
+                    _time: float = _totals[spanName][1]
+                    _stages[stage] = min(_stages.get(stage, _time), _time)
+    return {"status": "ok", "plates": _plates, "stages": _stages, "peakRssMb": get_peak_rss_mb()}
+
+
+def run_isolated(dxfPath: str, coordDir: str, repeat: int, validation: bool) -> dict:
+    # отдельный процесс на каждый чертёж: пиковая память не зависит от предыдущих
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        try:
+            return executor.submit(run_case, dxfPath, coordDir, repeat, validation).result()
+        except Exception as e:
+            return {"status": "error", "message": repr(e)}
+
+
+def run_cases(cases: list[str], repeat: int, validation: bool) -> dict[str, dict]:
+    _results: dict[str, dict] = dict()
+    for case in cases:
+        _results[case] = run_isolated(os.path.join(DXFPATH, CASES[case]), COORDPATH, repeat, validation)
+        print(format_case(case, _results[case]))
+    return _results
+
+
+def format_case(case: str, result: dict) -> str:
+    if result["status"] != "ok":
+        return f"{case:<12} ERROR {result['message']}"
+    _stages: str = " ".join(f"{k}={v:.3f}" for k, v in result["stages"].items())
+    _rss: str = f" rss={result['peakRssMb']:.0f}MB" if result["peakRssMb"] is not None else ""
+    return f"{case:<12} {_stages}{_rss}"
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float, minTime: float) -> list[str]:
+    """
+    Функция compare ищет регрессии: этапы, ставшие медленнее базы более чем на threshold (доля), и рост пиковой памяти на ту же долю.
+    Этапы короче minTime секунд в базе не сравниваются — их разброс больше самого времени.
+
+    :return: описания регрессий
+    :rtype: list[str]
+    """
+    _regressions: list[str] = []
+    for case, result in results.items():
+        _base: dict | None = baseline.get(case)
+        if _base is None or _base.get("status") != "ok" or result["status"] != "ok":
+            continue
+        for stage, spent in result["stages"].items():
+            _baseTime: float | None = _base["stages"].get(stage)
+            if _baseTime is None or _baseTime < minTime:
+                continue
+            if spent > _baseTime * (1 + threshold):
+                _regressions.append(f"{case}/{stage}: {_baseTime:.3f} -> {spent:.3f} с (+{spent / _baseTime - 1:.0%})")
+        _baseRss, _rss = _base.get("peakRssMb"), result.get("peakRssMb")
+        if _baseRss and _rss and _rss > _baseRss * (1 + threshold):
+            _regressions.append(f"{case}/peakRss: {_baseRss:.0f} -> {_rss:.0f} MB (+{_rss / _baseRss - 1:.0%})")
+    return _regressions
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк этапов конвертации DXF -> IFC.")
+    parser.add_argument("cases", nargs="*", default=list(CASES), help=f"случаи: {', '.join(CASES)}")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="число повторов (берётся минимум)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="допустимое замедление, доля")
+    parser.add_argument("--min-time", type=float, default=0.01, help="этапы короче этого времени (с) не сравниваются")
+    parser.add_argument("--baseline", default=BASELINE, help="файл базы")
+    parser.add_argument("--update-baseline", action="store_true", help="сохранить результаты как новую базу")
+    parser.add_argument("--no-validate", action="store_true", help="не измерять валидацию")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    _unknown: list[str] = [c for c in args.cases if c not in CASES]
+    if _unknown:
+        print(f"Unknown cases: {', '.join(_unknown)}")
+        return 2
+    start = time.time()
+    results: dict[str, dict] = run_cases(args.cases, args.repeat, not args.no_validate)
+    print(f"Затрачено времени: {time.time() - start:.1f} с")
+
+    if args.update_baseline:
+        _baseline: dict = {"machine": f"{platform.platform()} / Python {platform.python_version()}", "cases": dict()}
+        if os.path.isfile(args.baseline):
+            with open(args.baseline) as f:
+                _baseline["cases"] = json.load(f).get("cases", dict())
+        _baseline["cases"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(_baseline, f, indent=4, ensure_ascii=False)
+        print(f"База сохранена: {args.baseline}")
+        return 0
+
+    if not os.path.isfile(args.baseline):
+        print(f"Baseline {args.baseline} not found, run with --update-baseline.")
+        return 0
+    with open(args.baseline) as f:
+        baseline: dict = json.load(f)
+    regressions: list[str] = compare(results, baseline.get("cases", dict()), args.threshold, args.min_time)
+    for r in regressions:
+        print("REGRESSION " + r)
+    print(f"Регрессий: {len(regressions)} (порог {args.threshold:.0%}, база: {baseline.get('machine', '?')})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Кривые масштабирования конвертера на синтетических листах (benchmarks.generate).
+
+Для каждого числа деталей генерируется лист и CSV координат, затем лист конвертируется в отдельном процессе; выводятся время этапов и пиковая память в зависимости от числа деталей.
+
+    python -m benchmarks.scaling                        # 100, 500, 1000, 2000 деталей
+    python -m benchmarks.scaling -n 1000 5000 --repetition 0.95 --json scaling.json
+"""
+from benchmarks.generate import generate_sheet
+from benchmarks.run import STAGES, run_isolated
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+
+PARTS: list[int] = [100, 500, 1000, 2000]
+BLOCKNAME: str = "SYNTHETIC"
+
+
+def run_scaling(
+    parts: list[int],
+    repeat: int = 1,
+    validation: bool = False,
+    repetition: float = 0.8,
+    arcDensity: float = 0.5,
+    cuts: int = 2,
+    mills: int = 2,
+    seed: int = 0
+) -> dict[int, dict]:
+    """
+    Функция run_scaling генерирует синтетические листы с заданным числом деталей и измеряет их конвертацию.
+
+    :param parts: числа деталей на листе
+    :type parts: list[int]
+    :param repeat: число повторов конвертации каждого листа (берётся минимум)
+    :type repeat: int
+    :param validation: измерять ли валидацию
+    :type validation: bool
+    :return: результаты run_case по числу деталей
+    :rtype: dict[int, dict]
+    """
+    _results: dict[int, dict] = dict()
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in parts:
+            _dxfPath: str = os.path.join(tmp, f"{BLOCKNAME}_cnc.dxf")
+            generate_sheet(
+                dxfPath=_dxfPath,
+                csvPath=os.path.join(tmp, f"{BLOCKNAME}.csv"),
+                parts=n,
+                repetition=repetition,
+                arcDensity=arcDensity,
+                cuts=cuts,
+                mills=mills,
+                blockName=BLOCKNAME,
+                seed=seed
+            )
+            _results[n] = run_isolated(_dxfPath, tmp, repeat, validation)
+            print(format_row(n, _results[n]))
+    return _results
+
+
+def format_header() -> str:
+    return f"{'parts':>7} {'plates':>7} " + " ".join(f"{s:>10}" for s in STAGES) + f" {'rss, MB':>8}"
+
+
+def format_row(parts: int, result: dict) -> str:
+    if result["status"] != "ok":
+        return f"{parts:>7} ERROR {result['message']}"
+    _stages: dict[str, float] = result["stages"]
+    _times: str = " ".join(f"{_stages[s]:>10.3f}" if s in _stages else f"{'-':>10}" for s in STAGES)
+    _rss: str = f"{result['peakRssMb']:>8.0f}" if result["peakRssMb"] is not None else f"{'-':>8}"
+    return f"{parts:>7} {result['plates']:>7} {_times} {_rss}"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Время этапов конвертации в зависимости от числа деталей на листе.")
+    parser.add_argument("-n", "--parts", type=int, nargs="+", default=PARTS, help="числа деталей")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="число повторов (берётся минимум)")
+    parser.add_argument("--repetition", type=float, default=0.8, help="доля повторяющихся деталей, 0..1")
+    parser.add_argument("--arc-density", type=float, default=0.5, help="доля скруглённых углов контура, 0..1")
+    parser.add_argument("--cuts", type=int, default=2, help="сквозных пазов на деталь")
+    parser.add_argument("--mills", type=int, default=2, help="фрезеровок на деталь")
+    parser.add_argument("--validate", action="store_true", help="измерять также валидацию")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="сохранить результаты в JSON-файл")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    print(format_header())
+    results: dict[int, dict] = run_scaling(
+        parts=args.parts,
+        repeat=args.repeat,
+        validation=args.validate,
+        repetition=args.repetition,
+        arcDensity=args.arc_density,
+        cuts=args.cuts,
+        mills=args.mills,
+        seed=args.seed
+    )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({str(n): r for n, r in results.items()}, f, indent=4, ensure_ascii=False)
+    return 0 if all(r["status"] == "ok" for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,112 +1,172 @@
-
-
-from src.ifc import create_CartesianPoint, create_Direction, create_LocalPlacement
-from src.classes import Block, Model, Settings, Sheet
-
+from src.cache import CacheEntry, ConversionCache
+from src.classes import PathStore, Settings
+from src.converter import PREFETCH, ConversionResult, collect_dxf_files, convert_files
+from src.ifcfile import FORMATS
+from src.library import TemplateLibrary
+from src.pathfile import PathCache
+from src.validation import MODES
+
+import argparse
+import os
 import sys
 import time
 
-import csv
-# import ezdxf
-from ezdxf.filemanagement import readfile
-from ezdxf.lldxf.const import DXFStructureError
-from ezdxf.document import Drawing
-
-import ifcopenshell as ios
-from ifcopenshell import validate
-from ifcopenshell.api import run
 
-from pprint import pprint
-
-
-start = time.time()
-print('Старт: ' + time.ctime(start))
-
-DXFFILENAME: str = "SKYLARK250_CORNER-S_cnc"
-# DXFFILENAME: str = "SKYLARK250_WINDOW-XL2_cnc"
-DXFFILENAME: str = "SKYLARK250_END-S-0_cnc"
-DXFFILENAME: str = "SKYLARK250_END-XXS-0_cnc"
-# DXFFILENAME: str = "SKYLARK250_SKYLIGHT-XXS_cnc"
-# DXFFILENAME: str = "SKYLARK250_FLOOR-S-0_cnc"
-# DXFFILENAME: str = "tiny1"
-BLOCKNAME: str = DXFFILENAME.removeprefix("SKYLARK250_").removesuffix("_cnc")
-IFCFILENAME: str = DXFFILENAME
 DXFPATH: str = "./drawings"
 IFCPATH: str = "./models"
-CSVPATH: str = "./models/coord_data"
+COORDPATH: str = "./models/coord_data"
+TEMPLATE: str = f"{IFCPATH}/TEMPLATE.ifc"
+PREFIX: str = "SKYLARK250_"
 THICKNESS: float = 18  # толщина листа, мм
-
-ifcFile = ios.open(f"{IFCPATH}/TEMPLATE.ifc")
-
-try:
-    dwg: Drawing = readfile(f"{DXFPATH}/{DXFFILENAME}.dxf")
-except IOError:
-    print(f"File {DXFFILENAME} not found.")
-    sys.exit(1)
-except DXFStructureError:
-    print(f"File {DXFFILENAME} is not a DXF file.")
-    sys.exit(2)
-
-csvData: list = []
-with open(f"{CSVPATH}/{BLOCKNAME}.csv") as csvfile:
-    csvData = list(csv.DictReader(csvfile))
-
-
-settings = Settings(thickness=THICKNESS, outerColor=5, innerColor=4, millColor=3)
-model = Model(settings=settings, ifcFile=ifcFile)
-sheet = Sheet(settings, dwg)
-block = Block(settings, model, BLOCKNAME, [sheet])
-
-for plateType in block.plateTypes:
-    _data: dict[str, str] = None
-    for row in csvData:
-        if plateType.template.name == row['Name']:
-            _data = row
-            break
-    if _data != None:
-        if _data['trueName'] != "":
-            plateType.template.name = _data['trueName']
-            plateType.ifcPlateType.Name = _data['trueName']
-            _pset = plateType.ifcPlateType.HasPropertySets[0]
-            run("pset.edit_pset", ifcFile, pset=_pset, properties={
-                "ModelLabel": _data['trueName']
-            })
-
-for plate in block.plates:
-    _data: dict[str, str] = None
-    for row in csvData:
-        if plate.ifcPlate.Name == row['Name']:
-            _data = row
-            csvData.remove(row)
-            break
-    if _data != None:
-        _x, _y, _z = float(_data['x']), float(_data['y']), float(_data['z'])
-        _axisD = [float(_data['Axis.X']), float(_data['Axis.Y']), float(_data['Axis.Z'])]
-        _refD = [float(_data['RefDirection.X']), float(_data['RefDirection.Y']), float(_data['RefDirection.Z'])]
-        _axis = create_Direction(model=ifcFile, d_ratios=_axisD)
-        _ref = create_Direction(model=ifcFile, d_ratios=_refD)
-        _lp = create_LocalPlacement(
-            model = ifcFile,
-            local_placements=model.local_placements,
-            point=create_CartesianPoint(model=ifcFile, coords=[_x, _y, _z]),
-            dir_z=_axis,
-            dir_x=_ref
-        )
-        plate.ifcPlate.ObjectPlacement = _lp
-        if _data['trueName'] != "":
-            plate.ifcPlate.Name = _data['trueName']
-
-
-
-model.ifcFile.write(f"{IFCPATH}/{IFCFILENAME}.ifc")
-
-# валидация
-logger = validate.json_logger()
-validate.validate(model.ifcFile, logger, express_rules=True)  # type: ignore
-pprint(logger.statements)
-
-
-finish = time.time()
-print('Финиш: ' + time.ctime(finish))
-spent_time = time.strftime("%H:%M:%S", time.gmtime(finish - start))
-print('Затрачено времени: ' + spent_time)
+CACHEPATH: str = "./.cache"
+CACHESIZE: float = 1024  # МБ
+CACHEAGE: float = 30  # сут
+LIBRARYPATH: str = f"{CACHEPATH}/templates"
+PATHSPATH: str = f"{CACHEPATH}/paths"
+# роли путей по слоям раскроев Wikihouse: используются и тогда, когда слоя нет в таблице слоёв DXF-файла
+LAYERROLES: dict[str, str] = {
+    "4_ANYTOOL_CUTTHROUGH_OUTSI": "outer",
+    "3_ANYTOOL_CUTTHROUGH_INSID": "inner",
+    "5_ANYTOOL_HALF_MILL_9MM_IN": "mill",
+    "0_SHEET_SPRUCEPLY_2440X122": "boundary"
+}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Конвертация DXF-раскроев для CNC в IFC-модели блоков.")
+    parser.add_argument("sources", nargs="*", default=[DXFPATH],
+                        help=f"каталоги (берутся все *_cnc.dxf и листы *_cnc_<N>.dxf), шаблоны glob или DXF-файлы; по умолчанию {DXFPATH}")
+    parser.add_argument("-o", "--ifc-dir", default=IFCPATH, help="каталог для IFC-файлов")
+    parser.add_argument("-c", "--coord-dir", "--csv-dir", dest="coord_dir", default=COORDPATH,
+                        help="каталог с CSV- или JSON-файлами координат деталей")
+    parser.add_argument("-f", "--format", choices=list(FORMATS), default="ifc",
+                        help="формат IFC-файлов: ifc — STEP без сжатия, ifczip — ZIP-архив, zst — STEP, сжатый zstandard (*.ifc.zst)")
+    parser.add_argument("-t", "--template", default=TEMPLATE, help="файл-шаблон IFC")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="число процессов")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="конвертировать конвейером: процессы читают листы следующих блоков, пока строятся и записываются модели предыдущих")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH, help="число блоков, читаемых конвейером заранее")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="читать DXF-файлы потоком и освобождать чертёж до построения модели: память зависит от числа путей, а не от размера файла")
+    parser.add_argument("--layer-role", action="append", default=[], metavar="СЛОЙ=РОЛЬ",
+                        help="роль путей слоя: outer, inner, mill, boundary или none (слой не читается); важнее цветов слоя и сущностей, "
+                             "дополняет и переопределяет роли слоёв Wikihouse; ключ можно повторять")
+    parser.add_argument("--prefix", default=PREFIX, help="префикс имени DXF-файла, отбрасываемый в имени блока")
+    parser.add_argument("--thickness", type=float, default=THICKNESS, help="толщина листа, мм")
+    parser.add_argument("--validate", choices=MODES, default="full",
+                        help="режим валидации IFC: off — без валидации, schema — только схема, full — схема и правила EXPRESS, "
+                             "changed — схема и правила только для сущностей, созданных в этой конвертации; "
+                             "отчёт сохраняется рядом с IFC-файлом как *.validation.json")
+    parser.add_argument("--no-validate", dest="validate", action="store_const", const="off", help="то же, что --validate off")
+    parser.add_argument("--validate-workers", type=int, default=0,
+                        help="число фоновых процессов валидации: файлы проверяются после записи, пока конвертируются следующие; 0 — сразу после записи")
+    parser.add_argument("--validate-shards", type=int, default=1, help="число процессов, между которыми делятся сущности одного файла при валидации")
+    parser.add_argument("--trace", action="store_true",
+                        help="сохранять трассу этапов (Chrome Trace / Perfetto) рядом с IFC-файлом как *.trace.json")
+    parser.add_argument("--trace-details", action="store_true", help="включать в трассу отдельные детали и шаблоны")
+    parser.add_argument("-v", "--verbose", action="store_true", help="выводить статистику пула объектов IFC")
+    parser.add_argument("--cache-dir", default=CACHEPATH, help="каталог кэша результатов")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать кэш результатов")
+    parser.add_argument("--cache-max-size", type=float, default=CACHESIZE, help="наибольший объём кэша вместе с библиотекой шаблонов и кэшем путей, МБ")
+    parser.add_argument("--cache-max-age", type=float, default=CACHEAGE,
+                        help="удалять записи кэша, не использовавшиеся дольше указанного числа суток")
+    parser.add_argument("--library-dir", default=LIBRARYPATH, help="каталог библиотеки шаблонов пластин")
+    parser.add_argument("--no-library", action="store_true", help="не использовать библиотеку шаблонов пластин")
+    parser.add_argument("--paths-dir", default=PATHSPATH, help="каталог кэша путей, выделенных из DXF-файлов листов")
+    parser.add_argument("--no-paths-cache", action="store_true", help="не использовать кэш путей: DXF-файлы разбираются всегда")
+    parser.add_argument("--incremental", action="store_true",
+                        help="обновлять существующие IFC-файлы: пластины неизменённых деталей сохраняют GlobalId (кэш не используется)")
+    parser.add_argument("--cache-list", action="store_true", help="вывести записи кэша и выйти")
+    parser.add_argument("--cache-clear", action="store_true", help="очистить кэш, библиотеку шаблонов и кэш путей и выйти")
+    return parser.parse_args(argv)
+
+
+def print_result(result: ConversionResult, verbose: bool = False) -> None:
+    print(result)
+    if result.traceSummary:
+        print('    Этапы: ' + result.traceSummary)
+    if verbose and result.reportPath:
+        print('    Отчёт валидации: ' + result.reportPath)
+    if verbose and result.poolReport:
+        print('    Пул объектов: ' + result.poolReport)
+    if verbose and result.libraryReport:
+        print('    Библиотека шаблонов: ' + result.libraryReport)
+
+
+def print_cache(cache: ConversionCache) -> None:
+    entries: list[CacheEntry] = cache.entries()
+    for entry in entries:
+        print(entry)
+    print(f'Записей в кэше: {len(entries)}, объём: {sum(e.size for e in entries) / 2**20:.2f} MB')
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    cache = ConversionCache(
+        folder=args.cache_dir,
+        maxSize=int(args.cache_max_size * 2**20),
+        maxAge=args.cache_max_age * 24 * 3600,
+        stores={"paths": (args.paths_dir, PathCache.SUFFIX), "templates": (args.library_dir, TemplateLibrary.SUFFIX)}
+    )
+    if args.cache_list:
+        print_cache(cache)
+        return 0
+    if args.cache_clear:
+        print(f'Удалено записей кэша: {cache.clear()}')
+        return 0
+
+    start = time.time()
+    print('Старт: ' + time.ctime(start))
+
+    dxfFiles: list[str] = collect_dxf_files(args.sources)
+    if len(dxfFiles) == 0:
+        print(f"No DXF files found in {args.sources}.")
+        return 1
+
+    layerRoles: dict[str, str] = dict(LAYERROLES)
+    for item in args.layer_role:
+        _name, _, _role = item.rpartition("=")
+        if not _name or _role.lower() not in PathStore.ROLENAMES:
+            print(f"Invalid --layer-role {item!r}: expected LAYER=ROLE, ROLE is one of {', '.join(PathStore.ROLENAMES)}.")
+            return 1
+        layerRoles[_name] = _role.lower()
+
+    settings = Settings(thickness=args.thickness, outerColor=5, innerColor=4, millColor=3, layerRoles=layerRoles)
+    results: list[ConversionResult] = convert_files(
+        dxfFiles=dxfFiles,
+        ifcDir=args.ifc_dir,
+        coordDir=args.coord_dir,
+        templatePath=args.template,
+        settings=settings,
+        prefix=args.prefix,
+        validation=args.validate,
+        trace=args.trace or args.trace_details,
+        traceDetailed=args.trace_details,
+        workers=args.workers,
+        callback=lambda r: print_result(r, args.verbose),
+        cache=None if args.no_cache else cache,
+        libraryPath=None if args.no_library else args.library_dir,
+        incremental=args.incremental,
+        validationWorkers=args.validate_workers,
+        validationShards=args.validate_shards,
+        format=args.format,
+        pipeline=args.pipeline,
+        prefetch=args.prefetch,
+        lowMemory=args.low_memory,
+        pathsPath=None if args.no_paths_cache else args.paths_dir
+    )
+    if args.no_cache:
+        # библиотека шаблонов и кэш путей ограничиваются и без кэша результатов
+        cache.evict()
+
+    finish = time.time()
+    print('Финиш: ' + time.ctime(finish))
+    spent_time = time.strftime("%H:%M:%S", time.gmtime(finish - start))
+    print('Затрачено времени: ' + spent_time)
+    failed: int = len([r for r in results if not r.ok])
+    print(f'Файлов: {len(results)}, с ошибками: {failed}')
+    return 0 if failed == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Any
+
+
+IFCNAME: str = "result.ifc"
+METANAME: str = "meta.json"
+REPORTNAME: str = "report.json"
+CHUNK: int = 1 << 20
+
+
+class CacheEntry:
+    def __init__(self, key: str, path: str, meta: dict[str, Any], size: int, used: float):
+        self.key: str = key
+        self.path: str = path
+        self.meta: dict[str, Any] = meta
+        self.size: int = size  # байт
+        self.used: float = used  # время последнего обращения, с
+
+    @property
+    def created(self) -> float:
+        return self.meta.get("created", self.used)
+
+    def __str__(self) -> str:
+        _used: str = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.used))
+        if "store" in self.meta:
+            return f"{self.key[:12]}  {self.size / 2**20:8.2f} MB  {_used}  {self.meta['store']}"
+        _issues: str = "-" if self.meta.get("issues") is None else str(self.meta["issues"])
+        return (f"{self.key[:12]}  {self.size / 2**20:8.2f} MB  {_used}  "
+                f"пластин: {self.meta.get('plates', 0)}, замечаний: {_issues}  {self.meta.get('dxf', '')}")
+
+
+class ConversionCache:
+    def __init__(self, folder: str, maxSize: int | None = None, maxAge: float | None = None,
+                 stores: dict[str, tuple[str, str]] | None = None):
+        self.folder: str = folder
+        self.maxSize: int | None = maxSize  # байт
+        self.maxAge: float | None = maxAge  # с
+        # хранилища из файлов {каталог}/{ключ[:2]}/{ключ}{расширение} (кэш путей, библиотека шаблонов): имя -> (каталог, расширение);
+        # их записи входят в общий объём кэша и удаляются вместе с записями конвертаций (evict, clear)
+        self.stores: dict[str, tuple[str, str]] = stores or dict()
+
+    def entryPath(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], key)
+
+    def fetch(self, key: str, ifcPath: str, validation: str) -> dict[str, Any] | None:
+        """
+        Метод fetch копирует сохранённый IFC-файл в ifcPath, если запись есть в кэше.
+        Если нужна валидация, а запись сохранена без неё или с валидацией в другом режиме, считается, что записи нет.
+
+        :param key: ключ (make_key)
+        :type key: str
+        :param ifcPath: путь к создаваемому IFC-файлу
+        :type ifcPath: str
+        :param validation: режим валидации, отчёт которой нужен (src.validation.MODES); off — отчёт не нужен
+        :type validation: str
+        :return: сведения о результате (plates, issues, …) или None при промахе
+        :rtype: dict[str, Any] | None
+        """
+        _path: str = self.entryPath(key)
+        try:
+            with open(os.path.join(_path, METANAME)) as f:
+                _meta: dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # записи прежних версий сохранялись только с полной валидацией или без неё
+        _validation: str = _meta.get("validation", "off" if _meta.get("issues") is None else "full")
+        if validation != "off" and _validation != validation:
+            return None
+        try:
+            shutil.copyfile(os.path.join(_path, IFCNAME), ifcPath)
+        except FileNotFoundError:
+            # запись удалена параллельно (evict/clear)
+            return None
+        # время изменения meta.json служит временем последнего обращения
+        os.utime(os.path.join(_path, METANAME))
+        return _meta
+
+    def report(self, key: str) -> list[dict[str, Any]] | None:
+        """
+        Метод report возвращает сохранённый отчёт валидации записи (или None, если его нет).
+        """
+        try:
+            with open(os.path.join(self.entryPath(key), REPORTNAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, ifcPath: str, meta: dict[str, Any], report: list[dict[str, Any]] | None = None) -> None:
+        """
+        Метод put сохраняет IFC-файл, сведения о результате и отчёт валидации под ключом key.
+        Запись собирается во временном каталоге и переносится на место одним переименованием, поэтому параллельные процессы не видят её частично записанной.
+
+        :param key: ключ (make_key)
+        :type key: str
+        :param ifcPath: путь к полученному IFC-файлу
+        :type ifcPath: str
+        :param meta: сведения о результате
+        :type meta: dict[str, Any]
+        :param report: сообщения валидации
+        :type report: list[dict[str, Any]] | None
+        """
+        _path: str = self.entryPath(key)
+        os.makedirs(os.path.dirname(_path), exist_ok=True)
+        _tmp: str = f"{_path}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(_tmp)
+        try:
+            shutil.copyfile(ifcPath, os.path.join(_tmp, IFCNAME))
+            if report is not None:
+                with open(os.path.join(_tmp, REPORTNAME), "w") as f:
+                    json.dump(report, f, ensure_ascii=False, default=str)
+            with open(os.path.join(_tmp, METANAME), "w") as f:
+                json.dump({**meta, "created": time.time()}, f, ensure_ascii=False, indent=4)
+            if os.path.isdir(_path):
+                shutil.rmtree(_path, ignore_errors=True)
+            os.replace(_tmp, _path)
+        finally:
+            if os.path.isdir(_tmp):
+                shutil.rmtree(_tmp, ignore_errors=True)
+
+    def attachReport(self, key: str, validation: str, report: list[dict[str, Any]]) -> None:
+        """
+        Метод attachReport добавляет к записи отчёт валидации, выполненной после её сохранения (фоновая валидация).
+        Файлы записи заменяются переименованием; если записи уже нет, ничего не делается.
+
+        :param key: ключ (make_key)
+        :type key: str
+        :param validation: режим выполненной валидации
+        :type validation: str
+        :param report: сообщения валидации
+        :type report: list[dict[str, Any]]
+        """
+        _path: str = self.entryPath(key)
+        try:
+            with open(os.path.join(_path, METANAME)) as f:
+                _meta: dict[str, Any] = json.load(f)
+            for name, content in ((REPORTNAME, report), (METANAME, {**_meta, "issues": len(report), "validation": validation})):
+                _tmp: str = os.path.join(_path, f"{name}.{uuid.uuid4().hex}.tmp")
+                with open(_tmp, "w") as f:
+                    json.dump(content, f, ensure_ascii=False, indent=4 if name == METANAME else None, default=str)
+                os.replace(_tmp, os.path.join(_path, name))
+        except (OSError, ValueError):
+            # запись удалена параллельно (evict/clear)
+            pass
+
+    def entries(self) -> list[CacheEntry]:
+        """
+        Метод entries перечисляет записи кэша и его хранилищ (stores), начиная с давно не использованных.
+
+        :return: записи
+        :rtype: list[CacheEntry]
+        """
+        _entries: list[CacheEntry] = []
+        if not os.path.isdir(self.folder):
+            return _entries
+        for prefix in os.listdir(self.folder):
+            _prefixPath: str = os.path.join(self.folder, prefix)
+            if not os.path.isdir(_prefixPath):
+                continue
+            for key in os.listdir(_prefixPath):
+                _path: str = os.path.join(_prefixPath, key)
+                _metaPath: str = os.path.join(_path, METANAME)
+                if key.endswith(".tmp") or not os.path.isfile(_metaPath):
+                    continue
+                try:
+                    with open(_metaPath) as f:
+                        _meta: dict[str, Any] = json.load(f)
+                    _size: int = sum(e.stat().st_size for e in os.scandir(_path) if e.is_file())
+                    _used: float = os.path.getmtime(_metaPath)
+                except (OSError, ValueError):
+                    continue
+                _entries.append(CacheEntry(key, _path, _meta, _size, _used))
+        for name, (folder, suffix) in self.stores.items():
+            _entries.extend(self.storeEntries(name, folder, suffix))
+        return sorted(_entries, key=lambda e: e.used)
+
+    @staticmethod
+    def storeEntries(name: str, folder: str, suffix: str) -> list[CacheEntry]:
+        _entries: list[CacheEntry] = []
+        if not os.path.isdir(folder):
+            return _entries
+        for prefix in os.listdir(folder):
+            _prefixPath: str = os.path.join(folder, prefix)
+            if not os.path.isdir(_prefixPath):
+                continue
+            for entry in os.scandir(_prefixPath):
+                if not entry.name.endswith(suffix):
+                    continue
+                try:
+                    _stat: os.stat_result = entry.stat()
+                except OSError:
+                    continue
+                _entries.append(CacheEntry(entry.name.removesuffix(suffix), entry.path, {"store": name}, _stat.st_size, _stat.st_mtime))
+        return _entries
+
+    def remove(self, entry: CacheEntry) -> None:
+        if os.path.isdir(entry.path):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+        try:
+            os.rmdir(os.path.dirname(entry.path))
+        except OSError:
+            # в каталоге префикса остались другие записи
+            pass
+
+    def evict(self, maxSize: int | None = None, maxAge: float | None = None) -> list[CacheEntry]:
+        """
+        Метод evict удаляет записи, не использовавшиеся дольше maxAge, и затем самые давние записи, пока общий объём больше maxSize.
+        По умолчанию берутся ограничения, заданные при создании кэша.
+
+        :param maxSize: наибольший объём кэша, байт
+        :type maxSize: int | None
+        :param maxAge: наибольшее время с последнего обращения к записи, с
+        :type maxAge: float | None
+        :return: удалённые записи
+        :rtype: list[CacheEntry]
+        """
+        maxSize = self.maxSize if maxSize is None else maxSize
+        maxAge = self.maxAge if maxAge is None else maxAge
+        _entries: list[CacheEntry] = self.entries()
+        _removed: list[CacheEntry] = []
+        if maxAge is not None:
+            _now: float = time.time()
+            for entry in [e for e in _entries if _now - e.used > maxAge]:
+                self.remove(entry)
+                _removed.append(entry)
+                _entries.remove(entry)
+        if maxSize is not None:
+            _total: int = sum(e.size for e in _entries)
+            for entry in list(_entries):
+                if _total <= maxSize:
+                    break
+                self.remove(entry)
+                _removed.append(entry)
+                _total -= entry.size
+        return _removed
+
+    def clear(self) -> int:
+        """
+        Метод clear удаляет все записи кэша и его хранилищ.
+
+        :return: число удалённых записей
+        :rtype: int
+        """
+        _entries: list[CacheEntry] = self.entries()
+        for entry in _entries:
+            self.remove(entry)
+        return len(_entries)
+
+
+def hash_file(path: str | None) -> str:
+    _hash = hashlib.sha256()
+    if path is None:
+        return "-"
+    with open(path, "rb") as f:
+        while _chunk := f.read(CHUNK):
+            _hash.update(_chunk)
+    return _hash.hexdigest()
+
+
+def make_key(files: dict[str, str | None], values: dict[str, Any]) -> str:
+    """
+    Функция make_key вычисляет ключ кэша: хеш SHA-256 содержимого входных файлов и значений параметров.
+
+    :param files: входные файлы по роли (dxf, placement, template, …); None — файла нет
+    :type files: dict[str, str | None]
+    :param values: параметры, влияющие на результат (настройки, версии, имя блока), сериализуемые в JSON
+    :type values: dict[str, Any]
+    :return: ключ
+    :rtype: str
+    """
+    _source: dict[str, Any] = {
+        "files": {role: hash_file(path) for role, path in sorted(files.items())},
+        "values": values
+    }
+    return hashlib.sha256(json.dumps(_source, sort_keys=True, default=str).encode()).hexdigest()
@@ -1,17 +1,27 @@
 
-from src.ifc import create_Axis2Placement2D, create_CartesianPoint, create_Plate, create_PlateType, gather_LocalPlacements
+from src.ifc import EntityPool, create_Axis2Placement2D, create_Axis2Placement3D, create_CartesianPoint, create_Plate, create_Plates, create_PlateType, gather_LocalPlacements, get_EntityPool, remove_LocalPlacement, remove_Product, rename_PlateType
 
-from src.dxf import convert_poly_to_PointList, convert_poly_to_Polygon, get_dxf_entity_length,  get_centroid, nullify_coords
+from src.library import TemplateLibrary, make_signature
+from src.pathfile import load_arrays, save_arrays
+from src.trace import span
 
+from src.dxf import TOL, DrawingStream, convert_poly_to_PointList, get_flattened_vertices, get_poly_areas, get_raw_poly_array, get_segment_lengths, make_circle_path, make_poly_path
+
+
+import gc
+import math
+import os
+from typing import Iterable
 
 import ezdxf
+import ezdxf.path
 from ezdxf.document import Drawing
 from ezdxf.entities.layer import Layer
 from ezdxf.entities.lwpolyline import LWPolyline
 from ezdxf.entities.polyline import Polyline
 from ezdxf.entities.circle import Circle
 from ezdxf.layouts.layout import Modelspace
-from ezdxf.math import BoundingBox, Vec2, Vec3
+from ezdxf.math import BoundingBox, Vec3
 
 import ifcopenshell as ifcos
 from ifcopenshell import entity_instance
@@ -20,7 +30,9 @@ from ifcopenshell.util.shape_builder import ShapeBuilder
 
 # import matplotlib.pylab as plt
 
-from shapely import affinity, plotting, Polygon, MultiPoint
+import numpy as np
+
+from shapely import Polygon, STRtree
 
 
 class Settings:
@@ -30,20 +42,36 @@ class Settings:
             outerColor: int = 5,
             innerColor: int = 4,
             millColor: int = 3,
-            sheetBoundaryColor: int = 1
+            sheetBoundaryColor: int = 1,
+            layerRoles: dict[str, str] | None = None
     ):
         self.thickness: int = thickness
         self.outerColor: int = outerColor
         self.innerColor: int = innerColor
         self.millColor: int = millColor
         self.sheetBoundaryColor: int = sheetBoundaryColor
+        # роли путей по имени слоя (PathStore.ROLENAMES) — важнее цветов слоя и сущности
+        self.layerRoles: dict[str, str] = dict(layerRoles or {})
 
 
 class Model:
-    def __init__(self, settings: Settings, ifcFile: ifcos.file):
+    def __init__(
+        self,
+        settings: Settings,
+        ifcFile: ifcos.file,
+        library: TemplateLibrary | None = None,
+        incremental: bool = False
+    ):
         self.ifcFile: ifcos.file = ifcFile
+        # сущности с меньшими номерами взяты из шаблона или прежнего IFC-файла (режим валидации changed)
+        self.firstId: int = ifcFile.wrapped_data.getMaxId() + 1
         self.settings: Settings = settings
+        self.library: TemplateLibrary | None = library
+        # при обновлении модели, полученной предыдущей конвертацией: типы по сигнатуре шаблона и пластины по детали (атрибут Tag)
+        self.previousTypes: dict[str, entity_instance] = self.gatherTagged("IfcPlateType") if incremental else dict()
+        self.previousPlates: dict[str, entity_instance] = self.gatherTagged("IfcPlate") if incremental else dict()
         self.builder: ShapeBuilder = ShapeBuilder(ifcFile)
+        self.pool: EntityPool = get_EntityPool(ifcFile)
         self.body: entity_instance | None = representation.get_context(ifcFile, "Model", "Body", "MODEL_VIEW")
         self.history: entity_instance = ifcFile.by_type("IfcOwnerHistory")[0]
         self.site: entity_instance = ifcFile.by_type('IfcSite')[0]
@@ -73,56 +101,478 @@ class Model:
                 break
         self.local_placements: dict[str, entity_instance] = gather_LocalPlacements(ifcFile)
 
+    def gatherTagged(self, ifcClass: str) -> dict[str, entity_instance]:
+        return {e.Tag: e for e in self.ifcFile.by_type(ifcClass) if e.Tag}
+
+
+class PathStore:
+    """
+    Класс PathStore хранит геометрию всех путей листа (полилиний и окружностей) в непрерывных массивах NumPy: вершины всех путей подряд (x, y, bulge) со смещением первой вершины каждого пути, а также тип, роль, слой, дескриптор DXF, замкнутость, высоту, направление выдавливания и радиус каждого пути.
+
+    Сущности ezdxf читаются один раз при заполнении хранилища; пути (DrillPath) — лёгкие представления строк хранилища, а длины и площади считаются сразу для всех путей векторными проходами.
+    Окружность хранится одной вершиной — центром — и радиусом.
+    """
+    POLYLINE: int = 0
+    CIRCLE: int = 1
+    # роли путей
+    OUTER: int = 1
+    INNER: int = 2
+    MILL: int = 3
+    BOUNDARY: int = 4
+    ROLENAMES: dict[str, int] = {"none": 0, "outer": OUTER, "inner": INNER, "mill": MILL, "boundary": BOUNDARY}
+
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        offsets: np.ndarray,
+        kinds: np.ndarray,
+        roles: np.ndarray,
+        layers: np.ndarray,
+        layerNames: list[str],
+        handles: np.ndarray,
+        closed: np.ndarray,
+        elevations: np.ndarray,
+        extrusions: np.ndarray,
+        radii: np.ndarray
+    ):
+        self.vertices: np.ndarray = vertices  # (n, 3): x, y, bulge
+        self.offsets: np.ndarray = offsets  # (m + 1,): вершины пути i — vertices[offsets[i]:offsets[i + 1]]
+        self.kinds: np.ndarray = kinds
+        self.roles: np.ndarray = roles
+        self.layers: np.ndarray = layers  # индексы в layerNames
+        self.layerNames: list[str] = layerNames
+        self.handles: np.ndarray = handles  # дескрипторы DXF как числа
+        self.closed: np.ndarray = closed
+        self.elevations: np.ndarray = elevations
+        self.extrusions: np.ndarray = extrusions  # (m, 3)
+        self.radii: np.ndarray = radii  # 0 для полилиний
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @staticmethod
+    def fromEntities(entities: list[tuple[LWPolyline | Polyline | Circle, int]]) -> "PathStore":
+        """
+        Метод fromEntities заполняет хранилище полилиниями и окружностями с заданными ролями.
+
+        :param entities: пары (сущность, роль)
+        :type entities: list[tuple[LWPolyline | Polyline | Circle, int]]
+        :return: хранилище
+        :rtype: PathStore
+        """
+        _vertices: list[np.ndarray] = []
+        _layerIndex: dict[str, int] = dict()
+        _elevations: list[float] = []
+        for e, _ in entities:
+            _layerIndex.setdefault(e.dxf.layer, len(_layerIndex))
+            if isinstance(e, Circle):
+                _center: Vec3 = Vec3(e.dxf.center)
+                _vertices.append(np.array([[_center.x, _center.y, 0.]]))
+                _elevations.append(_center.z)
+            elif isinstance(e, LWPolyline):
+                _vertices.append(get_raw_poly_array(e))
+                _elevations.append(e.dxf.elevation)
+            else:
+                _vertices.append(get_raw_poly_array(e))
+                _elevations.append(Vec3(e.dxf.elevation).z)
+        _sizes: np.ndarray = np.array([len(v) for v in _vertices], dtype=np.intp)
+        return PathStore(
+            vertices=np.concatenate(_vertices) if len(_vertices) > 0 else np.zeros((0, 3)),
+            offsets=np.concatenate(([0], np.cumsum(_sizes))).astype(np.intp),
+            kinds=np.array([PathStore.CIRCLE if isinstance(e, Circle) else PathStore.POLYLINE for e, _ in entities], dtype=np.int8),
+            roles=np.array([role for _, role in entities], dtype=np.int8),
+            layers=np.array([_layerIndex[e.dxf.layer] for e, _ in entities], dtype=np.int32),
+            layerNames=list(_layerIndex),
+            handles=np.array([int(e.dxf.handle or "0", 16) for e, _ in entities], dtype=np.uint64),
+            closed=np.array([isinstance(e, Circle) or (e.closed if isinstance(e, LWPolyline) else e.is_closed) for e, _ in entities], dtype=bool),
+            elevations=np.array(_elevations, dtype=float),
+            extrusions=np.array([tuple(e.dxf.extrusion) for e, _ in entities], dtype=float).reshape(-1, 3),
+            radii=np.array([e.dxf.radius if isinstance(e, Circle) else 0. for e, _ in entities], dtype=float)
+        )
+
+    def toArrays(self) -> dict[str, np.ndarray]:
+        # имена слоёв хранятся массивом строк, чтобы файл читался без pickle
+        _arrays: dict[str, np.ndarray] = {k: v for k, v in vars(self).items() if k != "layerNames"}
+        _arrays["layerNames"] = np.array(self.layerNames, dtype=str)
+        return _arrays
+
+    @staticmethod
+    def fromArrays(arrays: dict[str, np.ndarray]) -> "PathStore":
+        _arrays: dict[str, np.ndarray] = dict(arrays)
+        _layerNames: list[str] = _arrays.pop("layerNames").tolist()
+        return PathStore(layerNames=_layerNames, **_arrays)
+
+    def save(self, path: str) -> None:
+        """
+        Метод save сохраняет хранилище в файл .npz (src.pathfile): несжатые массивы и версию формата.
+
+        :param path: путь к файлу
+        :type path: str
+        """
+        save_arrays(path, self.toArrays())
+
+    @staticmethod
+    def load(path: str, mmap: bool = True) -> "PathStore":
+        """
+        Метод load читает хранилище из файла, записанного save. При mmap массивы отображаются в память только для чтения: хранилище их не изменяет, а take создаёт копии.
+
+        :param path: путь к файлу
+        :type path: str
+        :param mmap: отображать ли массивы в память
+        :type mmap: bool
+        :return: хранилище
+        :rtype: PathStore
+        :raises ValueError: файл другой версии формата
+        """
+        return PathStore.fromArrays(load_arrays(path, mmap))
+
+    def getPaths(self, role: int) -> list["DrillPath"]:
+        return [DrillPath(self, i) for i in np.flatnonzero(self.roles == role).tolist()]
+
+    def getVertices(self, index: int) -> np.ndarray:
+        return self.vertices[self.offsets[index]:self.offsets[index + 1]]
+
+    def getHandle(self, index: int) -> str:
+        return format(int(self.handles[index]), "X")
+
+    def getLayer(self, index: int) -> str:
+        return self.layerNames[self.layers[index]]
+
+    def makePath(self, index: int) -> ezdxf.path.Path:
+        _extrusion: tuple[float, ...] = tuple(self.extrusions[index].tolist())
+        if self.kinds[index] == PathStore.CIRCLE:
+            _x, _y, _ = self.getVertices(index)[0].tolist()
+            return make_circle_path((_x, _y, float(self.elevations[index])), float(self.radii[index]), _extrusion)
+        return make_poly_path(self.getVertices(index), bool(self.closed[index]), float(self.elevations[index]), _extrusion)
+
+    def getLengths(self) -> np.ndarray:
+        """
+        Метод getLengths вычисляет длины всех путей хранилища: длины полилиний (замкнутых, с учётом арок) — одним векторным проходом.
+
+        :return: массив длин в порядке путей
+        :rtype: np.ndarray
+        """
+        _lengths: np.ndarray = np.round(self.radii * math.pi * 2, TOL)
+        _polys: np.ndarray = np.flatnonzero((self.kinds == PathStore.POLYLINE) & (np.diff(self.offsets) > 0))
+        if len(_polys) > 0:
+            _xyb, _offsets = self.gather(_polys)
+            _lengths[_polys] = np.round(np.add.reduceat(get_segment_lengths(_xyb, _offsets), _offsets), TOL)
+        return _lengths
+
+    def getAreas(self) -> np.ndarray:
+        """
+        Метод getAreas вычисляет площади всех путей хранилища одним векторным проходом.
+
+        :return: массив площадей в порядке путей
+        :rtype: np.ndarray
+        """
+        _areas: np.ndarray = np.round(self.radii**2 * math.pi, TOL)
+        _polys: np.ndarray = np.flatnonzero((self.kinds == PathStore.POLYLINE) & (np.diff(self.offsets) > 0))
+        if len(_polys) > 0:
+            _xyb, _offsets = self.gather(_polys)
+            _areas[_polys] = get_poly_areas(_xyb, _offsets)
+        return _areas
+
+    def getRows(self, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # строки массива вершин для выбранных путей подряд и смещения (m + 1,) путей в этой выборке
+        _sizes: np.ndarray = (self.offsets[indices + 1] - self.offsets[indices]).astype(np.intp)
+        _offsets: np.ndarray = np.concatenate(([0], np.cumsum(_sizes))).astype(np.intp)
+        _rows: np.ndarray = np.repeat(self.offsets[indices] - _offsets[:-1], _sizes) + np.arange(_offsets[-1])
+        return _rows.astype(np.intp), _offsets
+
+    def gather(self, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # вершины выбранных путей подряд, округлённые до TOL, и индексы первых вершин
+        _rows, _offsets = self.getRows(indices)
+        return np.round(self.vertices[_rows], TOL), _offsets[:-1]
+
+    def take(self, indices: list[int]) -> "PathStore":
+        """
+        Метод take возвращает новое хранилище с копиями выбранных путей.
+
+        :param indices: индексы путей
+        :type indices: list[int]
+        :return: хранилище
+        :rtype: PathStore
+        """
+        _indices: np.ndarray = np.array(indices, dtype=np.intp)
+        _rows, _offsets = self.getRows(_indices)
+        return PathStore(
+            vertices=self.vertices[_rows],
+            offsets=_offsets,
+            kinds=self.kinds[_indices],
+            roles=self.roles[_indices],
+            layers=self.layers[_indices],
+            layerNames=self.layerNames,
+            handles=self.handles[_indices],
+            closed=self.closed[_indices],
+            elevations=self.elevations[_indices],
+            extrusions=self.extrusions[_indices],
+            radii=self.radii[_indices]
+        )
+
 
 class Path:
-    def __init__(self, polyline: LWPolyline | Polyline | Circle):
-        self.polyline: LWPolyline | Polyline | Circle = polyline
+    __slots__ = ("store", "index", "dx", "dy")
+
+    def __init__(self, store: PathStore, index: int, dx: float = 0., dy: float = 0.):
+        # путь — строка index хранилища store, сдвинутая на (dx, dy)
+        self.store: PathStore = store
+        self.index: int = index
+        self.dx: float = dx
+        self.dy: float = dy
+
+    @property
+    def isCircle(self) -> bool:
+        return self.store.kinds[self.index] == PathStore.CIRCLE
+
+    @property
+    def xyb(self) -> np.ndarray:
+        _xyb: np.ndarray = self.store.getVertices(self.index)
+        if self.dx == 0 and self.dy == 0:
+            return _xyb
+        return _xyb + (self.dx, self.dy, 0.)
+
+    @property
+    def radius(self) -> float:
+        return float(self.store.radii[self.index])
+
+    @property
+    def handle(self) -> str:
+        return self.store.getHandle(self.index)
+
+    @property
+    def layer(self) -> str:
+        return self.store.getLayer(self.index)
+
+    def __getstate__(self) -> dict:
+        return {name: getattr(self, name) for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ())}
+
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
 
 
 class DrillPath(Path):
-    def __init__(self, polyline: LWPolyline | Polyline | Circle):
-        super().__init__(polyline)
-        self.length: float = self.setLength()
-        self.bbox: BoundingBox = self.setBbox()
-        self.centroid: tuple[float, float] = self.setCentroid()
+    # геометрия вычисляется по первому запросу и кешируется
+    __slots__ = ("_vertices", "_polygon", "_length", "_area", "_bbox", "_centroid")
+
+    def __init__(self, store: PathStore, index: int, dx: float = 0., dy: float = 0.):
+        super().__init__(store, index, dx, dy)
+        self._vertices: np.ndarray | None = None
+        self._polygon: Polygon | None = None
+        self._length: float | None = None
+        self._area: float | None = None
+        self._bbox: BoundingBox | None = None
+        self._centroid: tuple[float, float] | None = None
+
+    @property
+    def vertices(self) -> np.ndarray:
+        if self._vertices is None:
+            self._vertices = get_flattened_vertices(self.store.makePath(self.index)) + (self.dx, self.dy)
+        return self._vertices
+
+    @property
+    def polygon(self) -> Polygon:
+        if self._polygon is None:
+            self._polygon = Polygon(self.vertices)
+        return self._polygon
+
+    @property
+    def length(self) -> float:
+        if self._length is None:
+            self._length = self.setLength()
+        return self._length
+
+    @property
+    def area(self) -> float:
+        if self._area is None:
+            self._area = self.setArea()
+        return self._area
+
+    @property
+    def bbox(self) -> BoundingBox:
+        if self._bbox is None:
+            self._bbox = self.setBbox()
+        return self._bbox
+
+    @property
+    def centroid(self) -> tuple[float, float]:
+        if self._centroid is None:
+            self._centroid = self.setCentroid()
+        return self._centroid
+
+    def __getstate__(self) -> dict:
+        # ломаная и многоугольник пересчитываются по запросу и дороже в передаче, чем в вычислении
+        _state: dict = super().__getstate__()
+        _state["_vertices"] = None
+        _state["_polygon"] = None
+        return _state
 
     def setLength(self) -> float:
-        return get_dxf_entity_length(self.polyline)
+        return float(self.store.take([self.index]).getLengths()[0])
+
+    @staticmethod
+    def setLengths(paths: list["DrillPath"]) -> None:
+        # длины всех путей хранилища считаются одним векторным проходом
+        _lengths: dict[int, np.ndarray] = dict()
+        for _path in paths:
+            if id(_path.store) not in _lengths:
+                _lengths[id(_path.store)] = _path.store.getLengths()
+            _path._length = float(_lengths[id(_path.store)][_path.index])
+
+    def setArea(self) -> float:
+        return float(self.store.take([self.index]).getAreas()[0])
+
+    @staticmethod
+    def setAreas(paths: list["DrillPath"]) -> None:
+        _areas: dict[int, np.ndarray] = dict()
+        for _path in paths:
+            if id(_path.store) not in _areas:
+                _areas[id(_path.store)] = _path.store.getAreas()
+            _path._area = float(_areas[id(_path.store)][_path.index])
 
     def setBbox(self) -> BoundingBox:
-        return ezdxf.bbox.extents([self.polyline]) # type: ignore
+        # как ezdxf.bbox.extents для сущности
+        _path: ezdxf.path.Path = self.store.makePath(self.index)
+        if len(_path) == 0:
+            return BoundingBox()
+        _bbox: BoundingBox = ezdxf.path.precise_bbox(_path)
+        if self.dx == 0 and self.dy == 0:
+            return _bbox
+        _offset = Vec3(self.dx, self.dy, 0)
+        return BoundingBox([_bbox.extmin + _offset, _bbox.extmax + _offset])
 
     def setCentroid(self) -> tuple[float, float]:
-        return get_centroid([self.polyline]) # type: ignore
+        _centroid = self.polygon.centroid
+        return (_centroid.x, _centroid.y)
+
+    def translated(self, dx: float, dy: float) -> "DrillPath":
+        # путь, сдвинутый на (dx, dy), — представление той же строки хранилища без копирования вершин;
+        # длина и площадь переносятся, рамка и центр тяжести сдвигаются, ломаная и многоугольник строятся только по запросу
+        _path = DrillPath(self.store, self.index, self.dx + dx, self.dy + dy)
+        _path._length = self._length
+        _path._area = self._area
+        if self._bbox is not None:
+            _offset = Vec3(dx, dy, 0)
+            _path._bbox = BoundingBox([self._bbox.extmin + _offset, self._bbox.extmax + _offset])
+        if self._centroid is not None or self._polygon is not None:
+            _path._centroid = (self.centroid[0] + dx, self.centroid[1] + dy)
+        return _path
 
 
 class SheetBoundaryPath(Path):
-    def __init__(self, polyline: LWPolyline | Polyline | Circle):
-        super().__init__(polyline)
+    __slots__ = ()
+
+    def __init__(self, store: PathStore, index: int, dx: float = 0., dy: float = 0.):
+        super().__init__(store, index, dx, dy)
+
+
+class RoleClassifier:
+    """
+    Класс RoleClassifier определяет роли путей по таблице, составленной один раз по таблице слоёв: для каждого слоя — роль по имени (Settings.layerRoles) или по цвету слоя.
+    Роль, заданная именем слоя, важнее цвета; иначе сущность с собственным цветом ACI (1–255) получает роль по нему, а сущность цвета BYLAYER или BYBLOCK — роль своего слоя.
+    Слой, которого нет в таблице слоёв, имеет цвет по умолчанию (7), как в ezdxf.
+
+    :param settings: настройки конвертации
+    :type settings: Settings
+    :param layers: таблица слоёв
+    :type layers: Iterable[Layer]
+    """
+    DEFAULTCOLOR: int = 7
+
+    def __init__(self, settings: Settings, layers: Iterable[Layer]):
+        self.colorRoles: dict[int, int] = dict()
+        for color, role in (
+            (settings.outerColor, PathStore.OUTER),
+            (settings.innerColor, PathStore.INNER),
+            (settings.millColor, PathStore.MILL),
+            (settings.sheetBoundaryColor, PathStore.BOUNDARY)
+        ):
+            self.colorRoles.setdefault(color, role)
+        self.nameRoles: dict[str, int] = {name.lower(): RoleClassifier.getRoleByName(role) for name, role in settings.layerRoles.items()}
+        # как в таблицах ezdxf, имена слоёв не зависят от регистра
+        self.layerColors: dict[str, int] = {layer.dxf.name.lower(): layer.color for layer in layers}
+        # имя слоя в том виде, в каком оно записано у сущностей, -> (роль, задана ли роль именем); слои вне таблицы добавляются при первой встрече
+        self.layerRoles: dict[str, tuple[int, bool]] = {name: self.formLayerRole(name) for name in self.layerColors}
+
+    @staticmethod
+    def getRoleByName(name: str) -> int:
+        if name.lower() not in PathStore.ROLENAMES:
+            raise ValueError(f"Unknown path role: {name} (expected one of {', '.join(PathStore.ROLENAMES)})")
+        return PathStore.ROLENAMES[name.lower()]
+
+    def formLayerRole(self, name: str) -> tuple[int, bool]:
+        _name: str = name.lower()
+        if _name in self.nameRoles:
+            return self.nameRoles[_name], True
+        return self.colorRoles.get(self.layerColors.get(_name, RoleClassifier.DEFAULTCOLOR), 0), False
+
+    def getRole(self, layer: str, color: int) -> int:
+        """
+        Метод getRole возвращает роль пути по слою и цвету сущности.
+
+        :param layer: имя слоя сущности
+        :type layer: str
+        :param color: цвет сущности ACI (0 — BYBLOCK, 256 — BYLAYER)
+        :type color: int
+        :return: роль (PathStore.ROLENAMES); 0 — сущность не нужна
+        :rtype: int
+        """
+        _entry: tuple[int, bool] | None = self.layerRoles.get(layer)
+        if _entry is None:
+            _entry = self.layerRoles[layer] = self.formLayerRole(layer)
+        _role, _byName = _entry
+        if _byName or not 0 < color < 256:
+            return _role
+        return self.colorRoles.get(color, 0)
 
 
 class PathFormer:
-    def __init__(self, settings: Settings, dwg: Drawing):
+    def __init__(self, settings: Settings, dwg: Drawing | DrawingStream | None = None, store: PathStore | None = None):
+        # store — хранилище, выделенное раньше (например, из кэша путей): чертёж тогда не читается
         self.settings: Settings = settings
-        self.dwg: Drawing = dwg
+        self.dwg: Drawing | DrawingStream | None = dwg
+        self.store: PathStore
         self.outerDrillPaths: list[DrillPath] = []
         self.innerDrillPaths: list[DrillPath] = []
         self.shallowDrillPaths: list[DrillPath] = []
         self.sheetBoundaryPaths: list[SheetBoundaryPath] = []
-        self.formPaths()
+        if store is None:
+            self.formPaths()
+        else:
+            self.setStore(store)
+
+    @staticmethod
+    def getRoleSettings(settings: Settings) -> dict[str, object]:
+        # настройки, от которых зависит выбор путей и их ролей
+        return {
+            "outerColor": settings.outerColor,
+            "innerColor": settings.innerColor,
+            "millColor": settings.millColor,
+            "sheetBoundaryColor": settings.sheetBoundaryColor,
+            "layerRoles": {name.lower(): role.lower() for name, role in sorted(settings.layerRoles.items())}
+        }
 
     def formPaths(self) -> None:
-        _msp: Modelspace = self.dwg.modelspace()
-        for e in _msp.query("LWPOLYLINE POLYLINE CIRCLE"):
-            _entityLayer: str = e.dxf.layer
-            _layer: Layer = self.dwg.layers.get(_entityLayer)
-            _color: int = _layer.color
-            if _color == self.settings.outerColor:
-                self.outerDrillPaths.append(DrillPath(e)) # type: ignore
-            if _color == self.settings.innerColor:
-                self.innerDrillPaths.append(DrillPath(e)) # type: ignore
-            if _color == self.settings.millColor:
-                self.shallowDrillPaths.append(DrillPath(e)) # type: ignore
+        with span("PathFormer.formPaths"):
+            _msp: Modelspace | DrawingStream = self.dwg.modelspace()  # type: ignore
+            _classifier: RoleClassifier = RoleClassifier(self.settings, self.dwg.layers)  # type: ignore
+            _entities: list[tuple[LWPolyline | Polyline | Circle, int]] = []
+            # один проход по пространству модели; роль сущности — поиск в таблице слоёв классификатора
+            for e in _msp.query("LWPOLYLINE POLYLINE CIRCLE"):
+                _role: int = _classifier.getRole(e.dxf.layer, e.dxf.color)
+                if _role:
+                    _entities.append((e, _role))  # type: ignore
+            self.setStore(PathStore.fromEntities(_entities))
+
+    def setStore(self, store: PathStore) -> None:
+        self.store = store
+        self.outerDrillPaths = self.store.getPaths(PathStore.OUTER)
+        self.innerDrillPaths = self.store.getPaths(PathStore.INNER)
+        self.shallowDrillPaths = self.store.getPaths(PathStore.MILL)
+        self.sheetBoundaryPaths = [SheetBoundaryPath(self.store, i) for i in np.flatnonzero(self.store.roles == PathStore.BOUNDARY).tolist()]
+        DrillPath.setLengths(self.outerDrillPaths + self.innerDrillPaths + self.shallowDrillPaths)
+        DrillPath.setAreas(self.outerDrillPaths)
 
     def getOuterDrillPaths(self) -> list[DrillPath]:
         return self.outerDrillPaths
@@ -139,16 +589,25 @@ class Detail:
             self,
             contour: DrillPath,
             cuts: list[DrillPath],
-            mills: list[DrillPath]
+            mills: list[DrillPath],
+            tag: str = ""
     ):
+        # tag — «лист:дескриптор DXF контура», сохраняется в IfcPlate.Tag и связывает пластину с деталью между конвертациями
+        self.tag: str = tag
         self.contour: DrillPath = contour
         self.cuts: list[DrillPath] = cuts
         self.mills: list[DrillPath] = mills
         self.drillLength: float = self.calculateDrillLength()
+        # центр рамки контура — начало локальных координат детали
+        self.center: Vec3 = self.contour.bbox.center
         self.contourLoc: DrillPath = self.normalizeDrillPath(self.contour)
         self.cutsLoc: list[DrillPath] = [self.normalizeDrillPath(c) for c in self.cuts]
         self.millsLoc: list[DrillPath] = [self.normalizeDrillPath(m) for m in self.mills]
-        self.millsCentroidShape: MultiPoint = self.formMillsCentroidShape()
+        self.millsCentroids: np.ndarray = self.formMillsCentroids()
+        # центры фрезеровок, округлённые до 1 мм, при поворотах детали на 0, 90, 180 и 270° и их каноническая форма
+        self.millsRotations: list[np.ndarray] = DetailComparer.rotateMills(self.millsCentroids)
+        self.millsKey: bytes = DetailComparer.formMillsKey(self.millsRotations)
+        self.fingerprint: tuple[float, int, int, int] = self.formFingerprint()
 
     def calculateDrillLength(self) -> float:
         _length = self.contour.length
@@ -158,85 +617,117 @@ class Detail:
         return _length
 
     def normalizeDrillPath(self, drillPath: DrillPath) -> DrillPath:
-        _x, _y = self.contour.bbox.center[0], self.contour.bbox.center[1]
-        _drillPathPolyline = drillPath.polyline.copy()
-        nullify_coords(_drillPathPolyline, _x, _y) # type: ignore
-        _drillPath = DrillPath(_drillPathPolyline)
+        _drillPath = drillPath.translated(-self.center.x, -self.center.y)
         return _drillPath
 
-    def formMillsCentroidShape(self) -> MultiPoint:
-        _centroids: list[tuple[float, float]] = [_drill.centroid for _drill in self.millsLoc]
-        _mp = MultiPoint(_centroids)
-        return _mp
+    def formMillsCentroids(self) -> np.ndarray:
+        return np.array([_drill.centroid for _drill in self.millsLoc], dtype=float).reshape(-1, 2)
+
+    def formFingerprint(self) -> tuple[float, int, int, int]:
+        # ключ индекса шаблонов, не зависит от положения и поворота детали на листе: длина реза, число резов и фрезеровок и номер интервала площади контура
+        return (
+            self.drillLength,
+            len(self.cuts),
+            len(self.mills),
+            DetailComparer.getAreaBucket(self.contour.area)
+        )
 
 
 class PathCombiner:
     def __init__(
             self,
-            contour: DrillPath | None = None,
-            consideredPaths: list[DrillPath] | None = None
+            innerPaths: list[DrillPath],
+            shallowPaths: list[DrillPath]
     ):
-        self.contour: DrillPath | None = contour
-        self.consideredPaths: list[DrillPath] | None = consideredPaths
-        self.combinedPaths: list[DrillPath] = self.combinePaths()
-
-    def setContour(self, contour: DrillPath) -> None:
-        self.contour = contour
-        self.combinedPaths = self.combinePaths()
-
-    def setConsideredPaths(self, paths: list[DrillPath]) -> None:
-        self.consideredPaths = paths
-        self.combinedPaths = self.combinePaths()
-
-    def combinePaths(self) -> list[DrillPath]:
-        if self.contour is None or self.consideredPaths is None:
-            return []
-        _contourPolygon: Polygon = convert_poly_to_Polygon(self.contour.polyline) # type: ignore
-        _outerPolygon: Polygon = _contourPolygon.buffer(1)
-        _innerPolygon: Polygon = _contourPolygon.buffer(-1)
-        _filteredPaths: list[DrillPath] = []
-        for path in self.consideredPaths:
-            _pathPolygon: Polygon = convert_poly_to_Polygon(path.polyline) # type: ignore
-            if _pathPolygon.intersects(_outerPolygon) or _pathPolygon.intersects(_innerPolygon):
-                _filteredPaths.append(path)
-        return _filteredPaths
-
-    def getCombinedPaths(self) -> list[DrillPath]:
-        return self.combinedPaths
+        self.innerPaths: list[DrillPath] = innerPaths
+        self.shallowPaths: list[DrillPath] = shallowPaths
+        self.consideredPaths: list[DrillPath] = innerPaths + shallowPaths
+        self.tree: STRtree = self.buildTree()
+
+    def buildTree(self) -> STRtree:
+        _polygons: list[Polygon] = [p.polygon for p in self.consideredPaths]
+        return STRtree(_polygons)
+
+    def combinePaths(self, contours: list[DrillPath]) -> list[tuple[list[DrillPath], list[DrillPath]]]:
+        # для каждого контура — пара (сквозные резы, фрезеровки), пересекающие контур ±1 мм;
+        # все контуры проверяются одним запросом к дереву
+        _groups: list[tuple[list[DrillPath], list[DrillPath]]] = [([], []) for _ in contours]
+        if len(contours) == 0 or len(self.consideredPaths) == 0:
+            return _groups
+        _outerPolygons: list[Polygon] = [c.polygon.buffer(1) for c in contours]
+        _contourIdx, _pathIdx = self.tree.query(_outerPolygons, predicate="intersects")
+        # порядок путей внутри группы — как в исходном списке
+        _order = np.lexsort((_pathIdx, _contourIdx))
+        _innerCount: int = len(self.innerPaths)
+        for i in _order:
+            _c, _p = int(_contourIdx[i]), int(_pathIdx[i])
+            if _p < _innerCount:
+                _groups[_c][0].append(self.consideredPaths[_p])
+            else:
+                _groups[_c][1].append(self.consideredPaths[_p])
+        return _groups
 
 
 class Sheet:
-    def __init__(self, settings: Settings, dwg: Drawing):
+    def __init__(
+        self,
+        settings: Settings,
+        dwg: Drawing | DrawingStream | None,
+        keepDrawing: bool = True,
+        store: PathStore | None = None,
+        name: str | None = None
+    ):
+        # keepDrawing=False — чертёж отпускается сразу после выделения путей, до построения деталей;
+        # store — пути листа, выделенные раньше (кэш путей): тогда чертёж не нужен, а имя листа передаётся в name
         self.settings: Settings = settings
-        self.dwg: Drawing = dwg
+        self.dwg: Drawing | DrawingStream | None = dwg
+        self.name: str = name if name is not None else os.path.basename(dwg.filename or "")  # type: ignore
         self.thickness: float = self.settings.thickness
         self.width: float = 0.0
         self.length: float = 0.0
         self.details: list[Detail] = []
-        self.pathFormer: PathFormer = PathFormer(settings, dwg)
+        self.pathFormer: PathFormer = PathFormer(settings, dwg, store)
         self.outerDrillPaths: list[DrillPath] = self.pathFormer.getOuterDrillPaths()
         self.innerDrillPaths: list[DrillPath] = self.pathFormer.getInnerDrillPaths()
         self.shallowDrillPaths: list[DrillPath] = self.pathFormer.getShallowDrillPaths()
+        if not keepDrawing:
+            self.releaseDrawing()
         self.formDetails()
 
+    def releaseDrawing(self) -> None:
+        # пути и детали ссылаются только на хранилище путей PathFormer.store, чертёж и его сущности больше не нужны
+        if isinstance(self.dwg, DrawingStream):
+            self.dwg.close()
+        self.dwg = None
+        self.pathFormer.dwg = None
+        # таблицы и блоки ezdxf связаны циклическими ссылками
+        gc.collect()
+
     def formDetails(self) -> None:
-        _pathCombiner: PathCombiner = PathCombiner()
-        for dp in self.outerDrillPaths:
-            _pathCombiner.setContour(dp)
-            _pathCombiner.setConsideredPaths(self.innerDrillPaths)
-            _cuts = _pathCombiner.getCombinedPaths()
-            _pathCombiner.setConsideredPaths(self.shallowDrillPaths)
-            _mills = _pathCombiner.getCombinedPaths()
-            _detail: Detail = Detail(
-                contour=dp,
-                cuts=_cuts,
-                mills=_mills
-            )
-            self.details.append(_detail)
+        with span("Sheet.formDetails"):
+            with span("PathCombiner"):
+                _pathCombiner: PathCombiner = PathCombiner(self.innerDrillPaths, self.shallowDrillPaths)
+                _groups = _pathCombiner.combinePaths(self.outerDrillPaths)
+            for dp, (_cuts, _mills) in zip(self.outerDrillPaths, _groups):
+                with span("Detail", detailed=True):
+                    _detail: Detail = Detail(
+                        contour=dp,
+                        cuts=_cuts,
+                        mills=_mills,
+                        tag=f"{self.name}:{dp.handle}"
+                    )
+                self.details.append(_detail)
 
     def getDetails(self) -> list[Detail]:
         return self.details
 
+    def __getstate__(self) -> dict:
+        # лист, переданный из другого процесса, не содержит чертежа: дальше нужны только пути и детали
+        _state: dict = self.__dict__.copy()
+        _state["dwg"] = None
+        _state["pathFormer"] = None
+        return _state
+
 
 class Template:
     def __init__(
@@ -247,7 +738,10 @@ class Template:
         cuts: list[DrillPath],
         mills: list[DrillPath],
         drillLength: float,
-        millsCentroidShape: MultiPoint
+        millsCentroids: np.ndarray,
+        millsShape: np.ndarray,
+        millsKey: bytes,
+        fingerprint: tuple[float, int, int, int]
     ):
         self.model: Model = model
         self.name: str = name
@@ -256,13 +750,70 @@ class Template:
         self.cuts: list[DrillPath] = cuts
         self.mills: list[DrillPath] = mills
         self.drillLength: float = drillLength
-        self.millsCentroidShape: MultiPoint = millsCentroidShape
-        self.cuttingThroughProfile: entity_instance = self.createCuttingThroughProfile()
-        self.millingProfiles: list[entity_instance] = self.createMillingProfile()
+        self.millsCentroids: np.ndarray = millsCentroids
+        # центры фрезеровок, округлённые до 1 мм и отсортированные (без поворота), и их каноническая форма
+        self.millsShape: np.ndarray = millsShape
+        self.millsKey: bytes = millsKey
+        self.fingerprint: tuple[float, int, int, int] = fingerprint
+        self.signature: str = self.formSignature()
+        # тип пластины с той же геометрией из обновляемой модели
+        self.previousType: entity_instance | None = model.previousTypes.pop(self.signature, None)
+        # тело пластины из обновляемой модели или библиотеки шаблонов; если его нет, профили строятся заново
+        self.solid: entity_instance | None = None
+        self.cuttingThroughProfile: entity_instance
+        self.millingProfiles: list[entity_instance]
+        _loaded: tuple[entity_instance, list[entity_instance]] | None = self.loadSolid()
+        if _loaded is None:
+            self.cuttingThroughProfile = self.createCuttingThroughProfile()
+            self.millingProfiles = self.createMillingProfile()
+        else:
+            self.solid = _loaded[0]
+            self.cuttingThroughProfile, self.millingProfiles = self.sortProfiles(_loaded[1])
 
     def addDetail(self, detail: Detail) -> None:
         self.details.append(detail)
 
+    def formSignature(self) -> str:
+        return make_signature({
+            "schema": self.model.ifcFile.schema,
+            "thickness": self.model.settings.thickness,
+            "contour": Curve(self.model, self.contour).getData(),
+            "cuts": [Curve(self.model, c).getData() for c in self.cuts],
+            "mills": [Curve(self.model, m).getData() for m in self.mills]
+        })
+
+    def loadSolid(self) -> tuple[entity_instance, list[entity_instance]] | None:
+        if self.previousType is not None:
+            _solid: entity_instance = self.previousType.RepresentationMaps[0].MappedRepresentation.Items[0]
+            return _solid, [e for e in self.model.ifcFile.traverse(_solid) if e.is_a("IfcProfileDef")]
+        if self.model.library is None:
+            return None
+        return self.model.library.load(self.model.ifcFile, self.signature, self.name)
+
+    def saveSolid(self, solid: entity_instance) -> None:
+        if self.model.library is None:
+            return
+        self.model.library.save(self.model.ifcFile, self.signature, self.name, solid, {
+            "fingerprint": self.fingerprint,
+            "drillLength": self.drillLength,
+            "cuts": len(self.cuts),
+            "mills": len(self.mills),
+            "millsCentroids": self.millsCentroids.tolist()
+        })
+
+    def sortProfiles(self, _profiles: list[entity_instance]) -> tuple[entity_instance, list[entity_instance]]:
+        # имена профилей в обновляемой модели могли остаться от прежней нумерации шаблонов
+        for profile in _profiles:
+            _suffix: str = profile.ProfileName[profile.ProfileName.rindex("_cutting"):] if "_cutting" in profile.ProfileName \
+                else profile.ProfileName[profile.ProfileName.rindex("_milling_"):]
+            profile.ProfileName = self.name + _suffix
+        _cutting: entity_instance = next(p for p in _profiles if p.ProfileName == f"{self.name}_cutting")
+        _milling: list[entity_instance] = sorted(
+            [p for p in _profiles if "_milling_" in p.ProfileName],
+            key=lambda p: int(p.ProfileName.rsplit("_", 1)[1])
+        )
+        return _cutting, _milling
+
     def createCuttingThroughProfile(self) -> entity_instance:
         _outerCurve = Curve(self.model, self.contour).makeIfcCurve()
         _innerCurves: list[entity_instance] = []
@@ -291,6 +842,9 @@ class Template:
 
 
 class DetailComparer:
+    # допуск площади контура детали и шаблона, мм²; он же — ширина интервала площади в ключе индекса шаблонов
+    AREA_TOLERANCE: float = 1.
+
     def __init__(
         self,
         model: Model,
@@ -301,68 +855,102 @@ class DetailComparer:
         self.blockName: str = blockName
         self.details: list[Detail] = details
         self.templates: list[Template] = []
+        self.templateIndex: dict[tuple[float, int, int, int], list[Template]] = dict()
+        # номер шаблона в порядке создания: кандидаты из нескольких интервалов проверяются в этом порядке
+        self.templateNumbers: dict[Template, int] = dict()
         self.goThroughDetails()
 
     def goThroughDetails(self) -> None:
-        for _detail in self.details:
-            self.recognizeTemplateForDetail(_detail)
+        with span("DetailComparer"):
+            for _detail in self.details:
+                self.recognizeTemplateForDetail(_detail)
 
     def recognizeTemplateForDetail(self, detail: Detail) -> None:
-        for _template in self.templates:
+        for _template in self.getCandidates(detail):
             _checkResult = self.checkDetailAgainstTemplate(detail, _template)
             if _checkResult:
                 _template.addDetail(detail)
                 return
-        _newTemplate = Template(
-            model=self.model,
-            name=f"{self.blockName}/{len(self.templates) + 1}",
-            contour=detail.contourLoc,
-            cuts=detail.cutsLoc,
-            mills=detail.millsLoc,
-            drillLength=detail.drillLength,
-            millsCentroidShape=detail.millsCentroidShape
-        )
+        _name: str = f"{self.blockName}/{len(self.templates) + 1}"
+        with span("Template", detailed=True, template=_name):
+            _newTemplate = Template(
+                model=self.model,
+                name=_name,
+                contour=detail.contourLoc,
+                cuts=detail.cutsLoc,
+                mills=detail.millsLoc,
+                drillLength=detail.drillLength,
+                millsCentroids=detail.millsCentroids,
+                millsShape=detail.millsRotations[0],
+                millsKey=detail.millsKey,
+                fingerprint=detail.fingerprint
+            )
         _newTemplate.addDetail(detail)
+        self.templateNumbers[_newTemplate] = len(self.templates)
         self.templates.append(_newTemplate)
+        self.templateIndex.setdefault(detail.fingerprint, []).append(_newTemplate)
+
+    def getCandidates(self, detail: Detail) -> list[Template]:
+        """
+        Метод getCandidates возвращает шаблоны, которые могут совпасть с деталью, в порядке создания: шаблоны с той же длиной реза и тем же числом резов и фрезеровок
+        из интервала площади детали и двух соседних (площади, отличающиеся не больше чем на AREA_TOLERANCE, могут попасть в соседние интервалы).
+        """
+        _length, _cuts, _mills, _area = detail.fingerprint
+        _candidates: list[Template] = [
+            t for _bucket in (_area - 1, _area, _area + 1) for t in self.templateIndex.get((_length, _cuts, _mills, _bucket), [])
+        ]
+        return sorted(_candidates, key=self.templateNumbers.__getitem__) if len(_candidates) > 1 else _candidates
+
+    @staticmethod
+    def getAreaBucket(area: float) -> int:
+        return math.floor(area / DetailComparer.AREA_TOLERANCE)
 
     def checkDetailAgainstTemplate(self, detail: Detail, template: Template) -> bool:
+        # длина реза сравнивается точно, как и до индекса шаблонов; площадь контура — с допуском AREA_TOLERANCE
         _lengthCheck = detail.drillLength == template.drillLength
+        _countCheck = len(detail.cuts) == len(template.cuts) and len(detail.mills) == len(template.mills)
+        _areaCheck = abs(detail.contour.area - template.contour.area) <= self.AREA_TOLERANCE
         _millsCheck = True
-        if _lengthCheck and len(detail.mills) > 0:
-            _millsCheck = self.checkShapes(
-                detail.millsCentroidShape,
-                template.millsCentroidShape,
-                (0., 0.)
-            )
-        return _lengthCheck and _millsCheck
-
-    def checkShapes(self, shape1: MultiPoint, shape2: MultiPoint, center: tuple[float, float]) -> bool:
-        shape1 = self.sortMultiPoint(shape1)
-        shape2 = self.sortMultiPoint(shape2)
-        if shape1.equals_exact(shape2, 1):
-            return True
-        # plotting.plot_points(shape2)
-        # plotting.plot_points(shape1)
-        # plt.show()
-        _shape11: MultiPoint = affinity.rotate(shape1, 90, center)
-        _shape11 = self.sortMultiPoint(_shape11)
-        if _shape11.equals_exact(shape2, 1):
-            return True
-        _shape12: MultiPoint = affinity.rotate(shape1, 180, center)
-        _shape12 = self.sortMultiPoint(_shape12)
-        if _shape12.equals_exact(shape2, 1):
-            return True
-        _shape13: MultiPoint = affinity.rotate(shape1, 270, center)
-        _shape13 = self.sortMultiPoint(_shape13)
-        if _shape13.equals_exact(shape2, 1):
+        if _lengthCheck and _countCheck and _areaCheck and len(detail.mills) > 0:
+            _millsCheck = self.checkMills(detail, template)
+        return _lengthCheck and _countCheck and _areaCheck and _millsCheck
+
+    def checkMills(self, detail: Detail, template: Template) -> bool:
+        """
+        Метод checkMills проверяет, совпадают ли центры фрезеровок детали и шаблона с точностью до поворота детали на 0, 90, 180 или 270°.
+        Совпадение канонических форм означает точное совпадение при одном из поворотов; иначе центры сравниваются с допуском 1 мм (округление центров до 1 мм может разойтись на соседние значения).
+        """
+        if detail.millsKey == template.millsKey:
             return True
+        for rotation in detail.millsRotations:
+            _distances: np.ndarray = np.hypot(*(rotation - template.millsShape).T)
+            if np.all(_distances <= 1):
+                return True
         return False
 
     @staticmethod
-    def sortMultiPoint(shape: MultiPoint) -> MultiPoint:
-        _shapeCoords: list[list[float]] = [list([round(c, 0) for c in p.coords[0]]) for p in shape.geoms]
-        _shapeCoords = sorted(_shapeCoords)
-        return MultiPoint(_shapeCoords)
+    def rotateMills(centroids: np.ndarray) -> list[np.ndarray]:
+        """
+        Метод rotateMills округляет центры фрезеровок до 1 мм и поворачивает их вокруг центра детали на 0, 90, 180 и 270°; точки каждого поворота сортируются по x, затем по y.
+        Повороты на прямой угол целых координат выполняются без погрешности перестановкой и сменой знака.
+
+        :param centroids: центры фрезеровок в локальных координатах детали, массив (n, 2)
+        :type centroids: np.ndarray
+        :return: четыре массива (n, 2)
+        :rtype: list[np.ndarray]
+        """
+        # + 0. заменяет -0. на 0., чтобы каноническая форма не зависела от знака нуля
+        _x, _y = (np.round(centroids, 0) + 0.).T
+        return [DetailComparer.sortPoints(np.column_stack(r) + 0.) for r in ((_x, _y), (-_y, _x), (-_x, -_y), (_y, -_x))]
+
+    @staticmethod
+    def formMillsKey(rotations: list[np.ndarray]) -> bytes:
+        # каноническая форма — лексикографически наименьший из поворотов
+        return min(rotations, key=lambda r: r.ravel().tolist()).tobytes()
+
+    @staticmethod
+    def sortPoints(points: np.ndarray) -> np.ndarray:
+        return points[np.lexsort((points[:, 1], points[:, 0]))]
 
 
 class PlateType:
@@ -378,6 +966,11 @@ class PlateType:
         self.ifcPlateType: entity_instance = self.makeIfcPlateType()
 
     def makeIfcPlateType(self) -> entity_instance:
+        if self.template.previousType is not None:
+            _previous: entity_instance = self.template.previousType
+            if _previous.Name != self.template.name:
+                rename_PlateType(self.model.ifcFile, _previous, self.template.name)
+            return _previous
         _profiles: list[entity_instance] = [self.template.cuttingThroughProfile] + self.template.millingProfiles
         _type: entity_instance = create_PlateType(
             model=self.model.ifcFile,
@@ -388,8 +981,12 @@ class PlateType:
             dir_x=self.model.dir_x,
             profiles=_profiles,
             name=self.template.name,
-            THICKNESS=self.settings.thickness
+            THICKNESS=self.settings.thickness,
+            solid=self.template.solid
         )
+        _type.Tag = self.template.signature
+        if self.template.solid is None:
+            self.template.saveSolid(_type.RepresentationMaps[0].MappedRepresentation.Items[0])
         return _type
 
 
@@ -397,11 +994,12 @@ class Plate:
     def __init__(
         self,
         model: Model,
-        type: PlateType
+        type: PlateType,
+        ifcPlate: entity_instance | None = None
     ):
         self.model: Model = model
         self.type: PlateType = type
-        self.ifcPlate: entity_instance = self.makeIfcPlate()
+        self.ifcPlate: entity_instance = ifcPlate if ifcPlate is not None else self.makeIfcPlate()
 
     def makeIfcPlate(self) -> entity_instance:
         _plate: entity_instance = create_Plate(
@@ -421,31 +1019,93 @@ class Block:
         name: str,
         sheets: list[Sheet]
     ):
+        # размещения пластин назначаются после создания блока (PlacementData.apply); до этого все пластины, в том числе сохранённые, стоят в начале координат
         self.settings: Settings = settings
         self.model: Model = model
         self.name: str = name
         self.sheets: list[Sheet] = sheets
+        # число сохранённых, созданных и удалённых пластин (при обновлении существующей модели)
+        self.changes: dict[str, int] = {"kept": 0, "created": 0, "removed": 0}
+        # размещения сохранённых пластин, заменённые новыми
+        self.unusedPlacements: list[entity_instance] = []
         self.templates: list[Template] = self.formTemplates()
         self.plateTypes: list[PlateType] = self.makePlateTypes()
         self.plates: list[Plate] = self.makePlates()
 
     def formTemplates(self) -> list[Template]:
-        _detailComparer: DetailComparer = DetailComparer(self.model, self.name, self.sheets[0].getDetails())
+        # детали всех листов блока в порядке листов: шаблоны нумеруются по первому появлению в блоке
+        _details: list[Detail] = [detail for sheet in self.sheets for detail in sheet.getDetails()]
+        _detailComparer: DetailComparer = DetailComparer(self.model, self.name, _details)
         return _detailComparer.templates
 
     def makePlateTypes(self) -> list[PlateType]:
         _types: list[PlateType] = []
-        for template in self.templates:
-            _types.append(PlateType(self.settings, self.model, template))
+        with span("Block.makePlateTypes"):
+            for template in self.templates:
+                _types.append(PlateType(self.settings, self.model, template))
         return _types
 
     def makePlates(self) -> list[Plate]:
+        with span("Block.makePlates"):
+            # пластины обновляемой модели, деталь которых осталась в том же шаблоне; для остальных деталей пластины создаются
+            _kept: list[list[entity_instance | None]] = [self.keepPlates(plateType) for plateType in self.plateTypes]
+            _ifcPlates: list[list[entity_instance]] = create_Plates(
+                model=self.model.ifcFile,
+                storey=self.model.storey,
+                types=[plateType.ifcPlateType for plateType in self.plateTypes],
+                counts=[_typeKept.count(None) for _typeKept in _kept],
+                origin=self.model.origin,
+                dir_z=self.model.dir_z,
+                dir_x=self.model.dir_x
+            )
         _plates: list[Plate] = []
-        for plateType in self.plateTypes:
-            for _ in range(len(plateType.template.details)):
-                _plates.append(Plate(self.model, plateType))
+        for plateType, _typeKept, _typePlates in zip(self.plateTypes, _kept, _ifcPlates):
+            _new = iter(_typePlates)
+            for detail, _ifcPlate in zip(plateType.template.details, _typeKept):
+                if _ifcPlate is None:
+                    _ifcPlate = next(_new)
+                    _ifcPlate.Tag = detail.tag
+                else:
+                    self.changes["kept"] += 1
+                _plates.append(Plate(self.model, plateType, _ifcPlate))
+            self.changes["created"] += len(_typePlates)
         return _plates
 
+    def keepPlates(self, plateType: PlateType) -> list[entity_instance | None]:
+        # для каждой детали шаблона — пластина обновляемой модели или None; сохранённая пластина переносится в начало координат, как созданная заново,
+        # а прежнее размещение удаляется в removeStale, если PlacementData.apply не назначит его снова
+        _kept: list[entity_instance | None] = []
+        _origin: entity_instance = create_Axis2Placement3D(self.model.ifcFile, self.model.origin, self.model.dir_z, self.model.dir_x)
+        for detail in plateType.template.details:
+            _ifcPlate: entity_instance | None = self.model.previousPlates.get(detail.tag)
+            if _ifcPlate is None or len(_ifcPlate.IsTypedBy) == 0 or _ifcPlate.IsTypedBy[0].RelatingType != plateType.ifcPlateType:
+                _kept.append(None)
+                continue
+            del self.model.previousPlates[detail.tag]
+            _ifcPlate.Name = plateType.template.name
+            if _ifcPlate.ObjectPlacement is not None:
+                self.unusedPlacements.append(_ifcPlate.ObjectPlacement)
+            _ifcPlate.ObjectPlacement = self.model.ifcFile.createIfcLocalPlacement(None, _origin)
+            _kept.append(_ifcPlate)
+        return _kept
+
+    def removeStale(self) -> None:
+        """
+        Метод removeStale удаляет из обновляемой модели пластины удалённых и изменённых деталей, типы, которым не нашлось шаблона, и освободившиеся размещения вместе с их системами координат.
+        Вызывается после назначения всех размещений: размещение, назначенное заново, остаётся в модели.
+        """
+        for _ifcPlate in self.model.previousPlates.values():
+            remove_Product(self.model.ifcFile, _ifcPlate)
+        self.changes["removed"] += len(self.model.previousPlates)
+        self.model.previousPlates.clear()
+        for _ifcPlateType in self.model.previousTypes.values():
+            remove_Product(self.model.ifcFile, _ifcPlateType)
+        self.model.previousTypes.clear()
+        # одно размещение могло быть заменено у нескольких пластин
+        for _placement in {p.id(): p for p in self.unusedPlacements}.values():
+            remove_LocalPlacement(self.model.ifcFile, self.model.local_placements, _placement)
+        self.unusedPlacements.clear()
+
 
 class Profile:
     def __init__(
@@ -478,15 +1138,21 @@ class Curve:
         self.model: Model = model
         self.drillPath: DrillPath = drillPath
 
+    def getData(self) -> tuple:
+        # данные, по которым строится кривая IFC (для сигнатуры шаблона)
+        if self.drillPath.isCircle:
+            return ("circle", *self._getCircleData())
+        return ("polyline", *convert_poly_to_PointList(self.drillPath.xyb))
+
     def makeIfcCurve(self) -> entity_instance:
-        if isinstance(self.drillPath.polyline, LWPolyline) or isinstance(self.drillPath.polyline, Polyline):
-            _curve = self._makePolylineCurve()
-        if isinstance(self.drillPath.polyline, Circle):
+        if self.drillPath.isCircle:
             _curve = self._makeCircleCurve()
+        else:
+            _curve = self._makePolylineCurve()
         return _curve
 
     def _makePolylineCurve(self) -> entity_instance:
-        _curvePoints: tuple[list[tuple[float, float]], list[int]] = convert_poly_to_PointList(self.drillPath.polyline) # type: ignore
+        _curvePoints: tuple[list[tuple[float, float]], list[int]] = convert_poly_to_PointList(self.drillPath.xyb)
         _curve = self.model.builder.polyline(
             points=_curvePoints[0],
             arc_points=_curvePoints[1],
@@ -495,11 +1161,13 @@ class Curve:
         _curve.SelfIntersect = False
         return _curve
 
+    def _getCircleData(self) -> tuple[list[float], float]:
+        _center2 = [round(c, 2) for c in self.drillPath.xyb[0, :2].tolist()]
+        _radius = round(self.drillPath.radius, 2)
+        return _center2, _radius
+
     def _makeCircleCurve(self) -> entity_instance:
-        _center3 = self.drillPath.polyline.dxf.center
-        _center2 = list(Vec2(_center3))
-        _center2 = [round(c, 2) for c in _center2]
-        _radius = round(self.drillPath.polyline.dxf.radius, 2)
+        _center2, _radius = self._getCircleData()
         _file = self.model.ifcFile
         _ifcCenter = create_CartesianPoint(_file, _center2)
         _ifcLoc = create_Axis2Placement2D(_file, _ifcCenter, self.model.dir_x2d)
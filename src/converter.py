@@ -0,0 +1,759 @@
+from src.cache import ConversionCache, make_key
+from src.classes import Block, Model, PathFormer, PathStore, Settings, Sheet
+from src.dxf import DrawingStream
+from src.ifcfile import FORMATS, get_format, open_ifc, strip_suffix, write_ifc
+from src.library import TemplateLibrary
+from src.pathfile import VERSION as PATHSVERSION, PathCache
+from src.placement import PlacementData, find_placement_file, load_placement_data
+from src import trace
+from src.trace import span
+from src.validation import get_checked_ids, merge_statements, validate_file, validate_model, validate_shard, write_report
+
+import glob
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from typing import Callable, Iterator
+
+import ezdxf
+from ezdxf.filemanagement import readfile
+from ezdxf.lldxf.const import DXFStructureError
+from ezdxf.document import Drawing
+
+import ifcopenshell as ios
+
+
+DXFSUFFIX: str = "_cnc.dxf"
+# листы блока: X_cnc.dxf, X_cnc_2.dxf, X_cnc_3.dxf, ...; другие файлы X_cnc_*.dxf (например, варианты X_cnc_.dxf) — отдельные блоки
+SHEETMARK: str = "_cnc"
+SHEETPATTERN: re.Pattern = re.compile(rf"{SHEETMARK}_(\d+)\.dxf$")
+# версия конвертера входит в ключ кэша: её нужно увеличивать при любом изменении получаемого IFC
+# 2: Tag типов и пластин, типы из библиотеки шаблонов, сжатые форматы, роли путей по слоям, размещения только для пластин из файла координат
+VERSION: str = "2"
+
+# содержимое файлов-шаблонов IFC, прочитанное в текущем процессе
+_templates: dict[str, str] = dict()
+# число блоков, листы которых конвейер читает заранее
+PREFETCH: int = 2
+# библиотеки шаблонов пластин, открытые в текущем процессе
+_libraries: dict[str, TemplateLibrary] = dict()
+
+
+class ConversionResult:
+    def __init__(
+        self,
+        dxfPath: str,
+        ifcPath: str,
+        sheets: int = 1,
+        status: str = "ok",
+        message: str = "",
+        plates: int = 0,
+        issues: int | None = None,
+        poolReport: str = "",
+        traceSummary: str = "",
+        libraryReport: str = "",
+        spentTime: float = 0.,
+        cached: bool = False,
+        changes: dict[str, int] | None = None,
+        validation: str = "off"
+    ):
+        self.dxfPath: str = dxfPath
+        self.ifcPath: str = ifcPath
+        self.sheets: int = sheets
+        self.status: str = status
+        self.message: str = message
+        self.plates: int = plates
+        self.issues: int | None = issues
+        self.poolReport: str = poolReport
+        self.traceSummary: str = traceSummary
+        self.libraryReport: str = libraryReport
+        self.spentTime: float = spentTime
+        self.cached: bool = cached
+        # число сохранённых, созданных и удалённых пластин при обновлении существующего IFC-файла
+        self.changes: dict[str, int] | None = changes
+        # режим выполненной валидации; при фоновой валидации issues остаётся None до её окончания
+        self.validation: str = validation
+        self.reportPath: str = ""
+        # номер первой сущности, созданной в этой конвертации (режим валидации changed)
+        self.firstId: int | None = None
+        # ключ записи кэша, к которой добавляется отчёт фоновой валидации
+        self.cacheKey: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    @property
+    def pending(self) -> bool:
+        # IFC-файл записан, валидация отложена
+        return self.ok and self.validation != "off" and self.issues is None
+
+    def __str__(self) -> str:
+        _name: str = os.path.basename(self.dxfPath)
+        _line: str = f"[{self.status}] {_name} — {self.spentTime:.2f} с"
+        if self.ok:
+            if self.sheets > 1:
+                _line += f", листов: {self.sheets}"
+            _line += f", пластин: {self.plates}"
+            if self.issues is not None:
+                _line += f", замечаний валидации ({self.validation}): {self.issues}"
+            if self.cached:
+                _line += ", из кэша"
+            if self.changes is not None:
+                _line += f", обновлено (сохранено: {self.changes['kept']}, создано: {self.changes['created']}, удалено: {self.changes['removed']})"
+        if self.message:
+            _line += f" ({self.message})"
+        return _line
+
+
+def get_block_name(dxfPath: str, prefix: str = "SKYLARK250_") -> str:
+    """
+    Функция get_block_name получает имя блока из имени DXF-файла: SKYLARK250_END-S-0_cnc.dxf -> END-S-0, SKYLARK250_END-S-0_cnc_2.dxf -> END-S-0; другие файлы X_cnc_*.dxf — отдельные блоки: SKYLARK250_END-S-0_cnc_.dxf -> END-S-0_cnc_.
+
+    :param dxfPath: путь к DXF-файлу
+    :type dxfPath: str
+    :param prefix: префикс имени файла, отбрасываемый в имени блока
+    :type prefix: str
+    :return: имя блока
+    :rtype: str
+    """
+    return get_block_stem(dxfPath).removesuffix(SHEETMARK).removeprefix(prefix)
+
+
+def get_block_stem(dxfPath: str) -> str:
+    # имя файла первого листа без расширения: X_cnc_2.dxf -> X_cnc; имена остальных файлов не меняются: X_cnc_.dxf -> X_cnc_
+    _base: str = os.path.basename(dxfPath)
+    _match: re.Match | None = SHEETPATTERN.search(_base)
+    return _base[:_match.start()] + SHEETMARK if _match else os.path.splitext(_base)[0]
+
+
+def get_sheet_number(dxfPath: str) -> tuple[int, str]:
+    # X_cnc.dxf — первый лист, X_cnc_2.dxf — второй и т. д.
+    _match: re.Match | None = SHEETPATTERN.search(os.path.basename(dxfPath))
+    return (int(_match.group(1)), _match.group(1)) if _match else (1, "")
+
+
+def group_sheets(dxfFiles: list[str], prefix: str = "SKYLARK250_") -> dict[str, list[str]]:
+    """
+    Функция group_sheets группирует DXF-файлы листов по блокам: X_cnc.dxf, X_cnc_2.dxf, ... относятся к одному блоку.
+
+    :param dxfFiles: пути к DXF-файлам
+    :type dxfFiles: list[str]
+    :param prefix: префикс имени файла, отбрасываемый в имени блока
+    :type prefix: str
+    :return: пути к листам по имени блока; листы упорядочены по номеру
+    :rtype: dict[str, list[str]]
+    """
+    _groups: dict[tuple[str, str], list[str]] = dict()
+    for dxfPath in dxfFiles:
+        _groups.setdefault((os.path.dirname(dxfPath), get_block_name(dxfPath, prefix)), []).append(dxfPath)
+    return {block: sorted(paths, key=get_sheet_number) for (_, block), paths in _groups.items()}
+
+
+def get_ifc_path(ifcDir: str, dxfPath: str, format: str = "ifc") -> str:
+    # результат блока называется по первому листу без номера: X_cnc_2.dxf -> X_cnc.ifc (X_cnc.ifczip, X_cnc.ifc.zst)
+    return os.path.join(ifcDir, f"{get_block_stem(dxfPath)}{FORMATS[format]}")
+
+
+def collect_dxf_files(sources: list[str]) -> list[str]:
+    """
+    Функция collect_dxf_files собирает список DXF-файлов из каталогов (все *_cnc.dxf и *_cnc_*.dxf в каталоге: листы X_cnc_<N>.dxf и отдельные блоки), шаблонов glob и путей к файлам.
+
+    :param sources: каталоги, шаблоны glob или пути к файлам
+    :type sources: list[str]
+    :return: отсортированный список путей без повторов
+    :rtype: list[str]
+    """
+    _files: list[str] = []
+    for source in sources:
+        if os.path.isdir(source):
+            _files += glob.glob(os.path.join(source, f"*{DXFSUFFIX}"))
+            _files += glob.glob(os.path.join(source, f"*{SHEETMARK}_*.dxf"))
+        else:
+            _files += glob.glob(source)
+    return sorted(set(_files))
+
+
+def read_template(templatePath: str) -> ios.file:
+    # шаблон читается с диска один раз на процесс, для каждого файла создаётся его копия в памяти
+    if templatePath not in _templates:
+        with open(templatePath) as f:
+            _templates[templatePath] = f.read()
+    return ios.file.from_string(_templates[templatePath])
+
+
+def open_library(libraryPath: str) -> TemplateLibrary:
+    # каталог библиотеки просматривается один раз на процесс; записи, сохранённые процессом, сразу доступны следующим файлам
+    if libraryPath not in _libraries:
+        _libraries[libraryPath] = TemplateLibrary(libraryPath)
+    return _libraries[libraryPath]
+
+
+def read_sheet(dxfPath: str, settings: Settings, lowMemory: bool = False, pathsPath: str | None = None) -> Sheet:
+    """
+    Функция read_sheet читает DXF-файл листа и выделяет на нём детали. Ошибки чтения (IOError, DXFStructureError) передаются вызывающему.
+    С кэшем путей пути листа, выделенные при прошлом чтении того же файла, берутся из кэша (файл .npz отображается в память), и DXF-файл не разбирается.
+
+    :param dxfPath: путь к DXF-файлу
+    :type dxfPath: str
+    :param settings: настройки конвертации
+    :type settings: Settings
+    :param lowMemory: читать ли файл потоком (DrawingStream), не загружая чертёж целиком: в памяти остаются только пути нужных слоёв
+    :type lowMemory: bool
+    :param pathsPath: каталог кэша путей листов; None — DXF-файл разбирается всегда
+    :type pathsPath: str | None
+    :return: лист
+    :rtype: Sheet
+    """
+    _pathCache: PathCache | None = PathCache(pathsPath) if pathsPath is not None and os.path.isfile(dxfPath) else None
+    _key: str | None = get_paths_key(dxfPath, settings) if _pathCache is not None else None
+    if _pathCache is not None and _key is not None:
+        with span("paths.load"):
+            _arrays = _pathCache.load(_key)
+        if _arrays is not None:
+            with span("Sheet"):
+                return Sheet(settings, None, store=PathStore.fromArrays(_arrays), name=os.path.basename(dxfPath))
+    with span("readfile"):
+        dwg: Drawing | DrawingStream = DrawingStream(dxfPath) if lowMemory else readfile(dxfPath)
+    with span("Sheet"):
+        sheet: Sheet = Sheet(settings, dwg, keepDrawing=not lowMemory)
+    if _pathCache is not None and _key is not None:
+        with span("paths.save"):
+            _pathCache.save(_key, sheet.pathFormer.store.toArrays())
+    return sheet
+
+
+def read_sheets(dxfPaths: list[str], settings: Settings, workers: int = 1, lowMemory: bool = False, pathsPath: str | None = None) -> list[Sheet]:
+    """
+    Функция read_sheets читает листы блока; при workers > 1 листы читаются параллельно в отдельных процессах и передаются обратно без чертежей.
+
+    :param dxfPaths: пути к DXF-файлам листов
+    :type dxfPaths: list[str]
+    :param settings: настройки конвертации
+    :type settings: Settings
+    :param workers: число процессов
+    :type workers: int
+    :param lowMemory: читать ли файлы потоком (см. read_sheet)
+    :type lowMemory: bool
+    :param pathsPath: каталог кэша путей листов (см. read_sheet)
+    :type pathsPath: str | None
+    :return: листы в порядке dxfPaths
+    :rtype: list[Sheet]
+    """
+    if workers <= 1 or len(dxfPaths) <= 1:
+        return [read_sheet(path, settings, lowMemory, pathsPath) for path in dxfPaths]
+    with ProcessPoolExecutor(max_workers=min(workers, len(dxfPaths))) as executor:
+        return list(executor.map(read_sheet, dxfPaths, [settings] * len(dxfPaths), [lowMemory] * len(dxfPaths), [pathsPath] * len(dxfPaths)))
+
+
+def get_paths_key(dxfPath: str, settings: Settings) -> str:
+    """
+    Функция get_paths_key вычисляет ключ кэша путей листа по содержимому DXF-файла, настройкам выбора путей, версии формата файла путей и версии ezdxf.
+
+    :return: ключ
+    :rtype: str
+    """
+    return make_key(
+        files={"dxf": dxfPath},
+        values={
+            "roles": PathFormer.getRoleSettings(settings),
+            "paths": PATHSVERSION,
+            "ezdxf": ezdxf.__version__
+        }
+    )
+
+
+def get_cache_key(
+    dxfPaths: list[str],
+    placementPath: str | None,
+    templatePath: str,
+    settings: Settings,
+    blockName: str,
+    format: str = "ifc",
+    library: bool = False
+) -> str:
+    """
+    Функция get_cache_key вычисляет ключ кэша конвертации по содержимому DXF-файлов листов, файла координат и шаблона IFC, настройкам, имени блока, формату результата, использованию библиотеки шаблонов и версиям конвертера и библиотек.
+    Тела пластин из библиотеки совпадают с построенными заново по геометрии, но не по порядку и числу сущностей, поэтому результаты с библиотекой и без неё кэшируются отдельно.
+
+    :return: ключ
+    :rtype: str
+    """
+    _sheets: dict[str, str | None] = {("dxf" if i == 0 else f"dxf{i + 1}"): path for i, path in enumerate(dxfPaths)}
+    return make_key(
+        files={**_sheets, "placement": placementPath, "template": templatePath},
+        values={
+            "settings": vars(settings),
+            "block": blockName,
+            "format": format,
+            "library": library,
+            "converter": VERSION,
+            "ezdxf": ezdxf.__version__,
+            "ifcopenshell": ios.version
+        }
+    )
+
+
+def convert_file(
+    dxfPath: str | list[str],
+    ifcPath: str,
+    placementPath: str | None,
+    templatePath: str,
+    settings: Settings,
+    blockName: str,
+    validation: str = "full",
+    tracePath: str | None = None,
+    traceDetailed: bool = False,
+    cache: ConversionCache | None = None,
+    libraryPath: str | None = None,
+    workers: int = 1,
+    incremental: bool = False,
+    validationShards: int = 1,
+    deferValidation: bool = False,
+    lowMemory: bool = False,
+    pathsPath: str | None = None
+) -> ConversionResult:
+    """
+    Функция convert_file конвертирует блок — один или несколько DXF-файлов листов — в IFC с учётом данных о размещении деталей из CSV или JSON.
+
+    :param dxfPath: путь к DXF-файлу или пути к файлам листов блока
+    :type dxfPath: str | list[str]
+    :param ifcPath: путь к создаваемому IFC-файлу; формат определяется расширением (.ifc, .ifczip, .ifc.zst — src.ifcfile.FORMATS)
+    :type ifcPath: str
+    :param placementPath: путь к CSV- или JSON-файлу с координатами деталей (если None, детали остаются в начале координат)
+    :type placementPath: str | None
+    :param templatePath: путь к файлу-шаблону IFC
+    :type templatePath: str
+    :param settings: настройки конвертации
+    :type settings: Settings
+    :param blockName: имя блока
+    :type blockName: str
+    :param validation: режим валидации полученной модели (src.validation.MODES); сообщения сохраняются в отчёт X_cnc.validation.json рядом с IFC-файлом
+    :type validation: str
+    :param tracePath: путь для сохранения трассы этапов конвертации (Chrome Trace); None — без трассировки
+    :type tracePath: str | None
+    :param traceDetailed: записывать ли в трассу отдельные детали и шаблоны
+    :type traceDetailed: bool
+    :param cache: кэш результатов; при попадании IFC-файл и отчёт валидации берутся из него без конвертации
+    :type cache: ConversionCache | None
+    :param libraryPath: каталог библиотеки шаблонов пластин; None — тела пластин всегда строятся заново
+    :type libraryPath: str | None
+    :param workers: число процессов для чтения листов
+    :type workers: int
+    :param incremental: обновлять ли существующий IFC-файл ifcPath вместо создания нового: пластины неизменённых деталей и типы неизменённых шаблонов сохраняются вместе с GlobalId; кэш результатов при этом не используется
+    :type incremental: bool
+    :param validationShards: число процессов, между которыми делятся проверяемые сущности
+    :type validationShards: int
+    :param deferValidation: не выполнять валидацию, а оставить её вызывающему (result.pending): convert_files выполняет её в фоновых процессах
+    :type deferValidation: bool
+    :param lowMemory: режим ограниченной памяти: DXF-файлы читаются потоком, и чертёж освобождается до построения деталей и модели IFC, так что память зависит от числа путей нужных слоёв, а не от размера файла
+    :type lowMemory: bool
+    :param pathsPath: каталог кэша путей листов (см. read_sheet); пути берутся из него и тогда, когда конвертация не берётся из кэша результатов — например, при изменении файла координат или с incremental
+    :type pathsPath: str | None
+    :return: результат конвертации
+    :rtype: ConversionResult
+    """
+    start: float = time.perf_counter()
+    dxfPaths: list[str] = [dxfPath] if isinstance(dxfPath, str) else dxfPath
+    result = ConversionResult(dxfPaths[0], ifcPath, sheets=len(dxfPaths), validation=validation)
+    # трассировка, включённая снаружи (например, бенчмарком), не перехватывается
+    tracer: trace.Tracer | None = trace.enable(traceDetailed) if tracePath is not None else None
+    # результат обновления зависит от прежнего IFC-файла, а не только от входных файлов
+    incremental = incremental and os.path.isfile(ifcPath)
+    if incremental:
+        cache = None
+    try:
+        with span("convert", file=os.path.basename(dxfPaths[0])):
+            _key: str | None = None
+            if cache is not None and all(os.path.isfile(p) for p in dxfPaths):
+                _key = get_cache_key(dxfPaths, placementPath, templatePath, settings, blockName, get_format(ifcPath), libraryPath is not None)
+                if _fetch(result, cache, _key):
+                    return _finish(result, start)
+            report: list[dict] | None = _convert(
+                result, dxfPaths, placementPath, templatePath, settings, blockName,
+                "off" if deferValidation else validation, libraryPath, workers, incremental, validationShards, lowMemory, pathsPath)
+            _put(result, cache, _key, dxfPaths, report)
+    finally:
+        if tracer is not None and tracePath is not None:
+            trace.disable()
+            tracer.write(tracePath)
+            result.traceSummary = tracer.summary()
+    return _finish(result, start)
+
+
+def _finish(result: ConversionResult, start: float) -> ConversionResult:
+    result.spentTime = time.perf_counter() - start
+    return result
+
+
+def _fetch(result: ConversionResult, cache: ConversionCache, key: str) -> bool:
+    # копирует результат из кэша; True при попадании
+    with span("cache.fetch"):
+        _meta: dict | None = cache.fetch(key, result.ifcPath, result.validation)
+    if _meta is None:
+        return False
+    result.plates, result.cached = _meta["plates"], True
+    if result.validation != "off":
+        result.issues = _meta["issues"]
+        result.reportPath = write_report(result.ifcPath, result.validation, cache.report(key) or [])
+    return True
+
+
+def _put(result: ConversionResult, cache: ConversionCache | None, key: str | None, dxfPaths: list[str], report: list[dict] | None) -> None:
+    if cache is None or key is None or not result.ok:
+        return
+    with span("cache.put"):
+        cache.put(key, result.ifcPath, {
+            "dxf": ", ".join(os.path.basename(p) for p in dxfPaths),
+            "plates": result.plates,
+            "issues": result.issues,
+            "validation": result.validation if report is not None else "off"
+        }, report)
+    result.cacheKey = key
+
+
+def _convert(
+    result: ConversionResult,
+    dxfPaths: list[str],
+    placementPath: str | None,
+    templatePath: str,
+    settings: Settings,
+    blockName: str,
+    validation: str,
+    libraryPath: str | None = None,
+    workers: int = 1,
+    incremental: bool = False,
+    validationShards: int = 1,
+    lowMemory: bool = False,
+    pathsPath: str | None = None
+) -> list[dict] | None:
+    # возвращает сообщения валидации (None, если она не выполнялась)
+    try:
+        with span("Sheets", sheets=len(dxfPaths)):
+            sheets: list[Sheet] = read_sheets(dxfPaths, settings, workers, lowMemory, pathsPath)
+    except (IOError, DXFStructureError) as e:
+        _fail_reading(result, dxfPaths, e)
+        return None
+    model: Model = _build(result, sheets, placementPath, templatePath, settings, blockName, libraryPath, incremental)
+    return _write(result, model, validation, validationShards)
+
+
+def _fail_reading(result: ConversionResult, dxfPaths: list[str], error: Exception) -> None:
+    _where: str = "" if len(dxfPaths) == 1 else f": {', '.join(os.path.basename(p) for p in dxfPaths)}"
+    result.status, result.message = "error", ("not a DXF file" if isinstance(error, DXFStructureError) else "file not found") + _where
+
+
+def _build(
+    result: ConversionResult,
+    sheets: list[Sheet],
+    placementPath: str | None,
+    templatePath: str,
+    settings: Settings,
+    blockName: str,
+    libraryPath: str | None = None,
+    incremental: bool = False
+) -> Model:
+    # строит модель IFC блока по прочитанным листам
+    with span("Model"):
+        ifcFile: ios.file = open_ifc(result.ifcPath) if incremental else read_template(templatePath)
+        library: TemplateLibrary | None = open_library(libraryPath) if libraryPath is not None else None
+        _libraryStats: tuple[int, int, int] = (library.hits, library.misses, library.saved) if library else (0, 0, 0)
+        model = Model(settings=settings, ifcFile=ifcFile, library=library, incremental=incremental)
+    with span("PlacementData"):
+        placementData: PlacementData | None = load_placement_data(placementPath) if placementPath else None
+    with span("Block"):
+        block = Block(settings, model, blockName, sheets)
+    if placementData:
+        with span("PlacementData.apply"):
+            placementData.apply(block)
+    with span("Block.removeStale"):
+        block.removeStale()
+    result.plates = len(block.plates)
+    result.firstId = model.firstId
+    if incremental:
+        result.changes = block.changes
+    result.poolReport = model.pool.report()
+    if library is not None:
+        _hits, _misses, _saved = (library.hits - _libraryStats[0], library.misses - _libraryStats[1], library.saved - _libraryStats[2])
+        result.libraryReport = f"{_hits} hits / {_misses} misses, saved: {_saved}, entries: {len(library)}"
+    return model
+
+
+def _write(result: ConversionResult, model: Model, validation: str, validationShards: int = 1) -> list[dict] | None:
+    # записывает модель и проверяет её; возвращает сообщения валидации (None, если она не выполнялась)
+    with span("ifcFile.write"):
+        write_ifc(model.ifcFile, result.ifcPath)
+    if validation != "off":
+        with span("validate", mode=validation):
+            if validationShards > 1:
+                _statements: list[dict] = validate_file(result.ifcPath, validation, model.firstId, validationShards)
+            else:
+                _statements = validate_model(model.ifcFile, validation, get_checked_ids(model.ifcFile, validation, model.firstId))
+        result.issues = len(_statements)
+        result.reportPath = write_report(result.ifcPath, validation, _statements)
+        return _statements
+    return None
+
+
+def _convert_job(job: dict) -> ConversionResult:
+    try:
+        return convert_file(**job)
+    except Exception as e:
+        return ConversionResult(job["dxfPath"][0], job["ifcPath"], sheets=len(job["dxfPath"]), status="error", message=repr(e))
+
+
+def convert_files(
+    dxfFiles: list[str],
+    ifcDir: str,
+    coordDir: str,
+    templatePath: str,
+    settings: Settings,
+    prefix: str = "SKYLARK250_",
+    validation: str = "full",
+    trace: bool = False,
+    traceDetailed: bool = False,
+    workers: int = 1,
+    callback: Callable[[ConversionResult], None] | None = None,
+    cache: ConversionCache | None = None,
+    libraryPath: str | None = None,
+    incremental: bool = False,
+    validationWorkers: int = 0,
+    validationShards: int = 1,
+    format: str = "ifc",
+    pipeline: bool = False,
+    prefetch: int = PREFETCH,
+    lowMemory: bool = False,
+    pathsPath: str | None = None
+) -> list[ConversionResult]:
+    """
+    Функция convert_files конвертирует набор DXF-файлов, распределяя их между процессами. Файлы X_cnc.dxf, X_cnc_2.dxf, ... считаются листами одного блока; блоку соответствуют координаты деталей {coordDir}/<имя блока>.csv (или .json) и результат {ifcDir}/X_cnc.ifc.
+    Процессы делятся между блоками; если блоков меньше, чем процессов, оставшиеся процессы читают листы блока параллельно.
+    В режиме конвейера (pipeline) процессы только читают листы, модели строятся в текущем процессе, а записываются в отдельном потоке (см. _run_pipeline).
+
+    :param dxfFiles: пути к DXF-файлам
+    :type dxfFiles: list[str]
+    :param trace: сохранять ли трассу этапов рядом с результатом ({ifcDir}/X_cnc.trace.json)
+    :type trace: bool
+    :param workers: число процессов; при 1 конвертация идёт в текущем процессе
+    :type workers: int
+    :param callback: функция, вызываемая для каждого результата по мере готовности
+    :type callback: Callable[[ConversionResult], None] | None
+    :param cache: кэш результатов; после конвертации из него удаляются записи сверх его ограничений
+    :type cache: ConversionCache | None
+    :param libraryPath: каталог библиотеки шаблонов пластин
+    :type libraryPath: str | None
+    :param incremental: обновлять ли существующие IFC-файлы (см. convert_file)
+    :type incremental: bool
+    :param validationWorkers: число фоновых процессов валидации: IFC-файл проверяется после записи, пока конвертируются следующие блоки; 0 — валидация сразу после записи в процессе конвертации
+    :type validationWorkers: int
+    :param validationShards: число долей, на которые делятся проверяемые сущности одного файла
+    :type validationShards: int
+    :param format: формат результатов (src.ifcfile.FORMATS): ifc, ifczip или zst
+    :type format: str
+    :param pipeline: конвертировать ли конвейером: чтение листов, построение моделей, запись и валидация разных блоков идут одновременно; трасса конвейера сохраняется в {ifcDir}/pipeline.trace.json, валидация всегда фоновая
+    :type pipeline: bool
+    :param prefetch: число блоков, листы которых конвейер читает заранее; ограничивает число листов в памяти
+    :type prefetch: int
+    :param lowMemory: режим ограниченной памяти (см. convert_file)
+    :type lowMemory: bool
+    :param pathsPath: каталог кэша путей листов (см. read_sheet)
+    :type pathsPath: str | None
+    :return: результаты в порядке завершения
+    :rtype: list[ConversionResult]
+    """
+    _jobs: list[dict] = []
+    _groups: dict[str, list[str]] = group_sheets(dxfFiles, prefix)
+    _sheetWorkers: int = max(1, workers // max(len(_groups), 1))
+    for _blockName, _sheets in _groups.items():
+        _ifcPath: str = get_ifc_path(ifcDir, _sheets[0], format)
+        _jobs.append(dict(
+            dxfPath=_sheets,
+            ifcPath=_ifcPath,
+            placementPath=find_placement_file(coordDir, _blockName),
+            templatePath=templatePath,
+            settings=settings,
+            blockName=_blockName,
+            validation=validation,
+            tracePath=f"{strip_suffix(_ifcPath)}.trace.json" if trace and not pipeline else None,
+            traceDetailed=traceDetailed,
+            cache=cache,
+            libraryPath=libraryPath,
+            workers=_sheetWorkers,
+            incremental=incremental,
+            validationShards=validationShards,
+            deferValidation=validationWorkers > 0 or pipeline,
+            lowMemory=lowMemory,
+            pathsPath=pathsPath
+        ))
+    _results: Iterator[ConversionResult]
+    if pipeline:
+        _results = _run_pipeline(_jobs, workers, prefetch, os.path.join(ifcDir, "pipeline.trace.json") if trace else None, traceDetailed)
+        validationWorkers = max(validationWorkers, 1)
+    else:
+        _results = _run_jobs(_jobs, workers)
+    if validationWorkers > 0 and validation != "off":
+        _results = _validate_in_background(_results, validationWorkers, validationShards, cache)
+    results: list[ConversionResult] = []
+    for result in _results:
+        if callback is not None:
+            callback(result)
+        results.append(result)
+    if cache is not None:
+        cache.evict()
+    return results
+
+
+def _run_jobs(jobs: list[dict], workers: int) -> Iterator[ConversionResult]:
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _convert_job(job)
+        return
+    # крупные файлы запускаются первыми, чтобы общее время определялось самым большим файлом
+    jobs = sorted(jobs, key=lambda j: sum(os.path.getsize(p) for p in j["dxfPath"] if os.path.isfile(p)), reverse=True)
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        _futures: list[Future] = [executor.submit(_convert_job, job) for job in jobs]
+        for future in as_completed(_futures):
+            yield future.result()
+
+
+def _validate_in_background(
+    results: Iterator[ConversionResult],
+    workers: int,
+    shards: int,
+    cache: ConversionCache | None
+) -> Iterator[ConversionResult]:
+    # записанные IFC-файлы проверяются в отдельных процессах, пока конвертируются следующие блоки
+    _pending: list[tuple[ConversionResult, list[Future]]] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in results:
+            if not result.pending:
+                yield result
+            else:
+                _pending.append((result, [
+                    executor.submit(validate_shard, result.ifcPath, result.validation, result.firstId, i, shards) for i in range(shards)
+                ]))
+            yield from _collect_validated(_pending, cache)
+        while _pending:
+            wait([f for _, futures in _pending for f in futures], return_when=FIRST_COMPLETED)
+            yield from _collect_validated(_pending, cache)
+
+
+def _collect_validated(pending: list[tuple[ConversionResult, list[Future]]], cache: ConversionCache | None) -> Iterator[ConversionResult]:
+    # выдаёт результаты, все доли которых проверены, и убирает их из pending
+    for item in [p for p in pending if all(f.done() for f in p[1])]:
+        pending.remove(item)
+        result, futures = item
+        try:
+            _statements: list[dict] = merge_statements([f.result() for f in futures])
+        except Exception as e:
+            result.status, result.message = "error", f"validation failed: {e!r}"
+            yield result
+            continue
+        result.issues = len(_statements)
+        result.reportPath = write_report(result.ifcPath, result.validation, _statements)
+        if cache is not None and result.cacheKey is not None:
+            cache.attachReport(result.cacheKey, result.validation, _statements)
+        yield result
+
+
+def _run_pipeline(
+    jobs: list[dict],
+    workers: int,
+    prefetch: int = PREFETCH,
+    tracePath: str | None = None,
+    traceDetailed: bool = False
+) -> Iterator[ConversionResult]:
+    """
+    Функция _run_pipeline конвертирует блоки конвейером из трёх этапов, связанных ограниченными очередями:
+    листы следующих блоков читаются и разбираются в workers процессах, пока в текущем процессе строится модель предыдущего блока, а готовые модели записываются на диск в отдельном потоке.
+    Читается или прочитано не больше prefetch блоков, записи ждёт не больше одной модели, поэтому память не растёт с числом файлов; задержки чтения и записи (например, на сетевом диске) скрываются за построением моделей.
+    Валидация из конвейера не выполняется (задания с deferValidation), её выполняет _validate_in_background.
+
+    :param jobs: задания convert_file
+    :type jobs: list[dict]
+    :param workers: число процессов чтения
+    :type workers: int
+    :param prefetch: число блоков, читаемых заранее
+    :type prefetch: int
+    :param tracePath: путь для сохранения общей трассы конвейера; None — без трассировки
+    :type tracePath: str | None
+    :return: результаты в порядке завершения записи
+    :rtype: Iterator[ConversionResult]
+    """
+    _queued: deque[dict] = deque(jobs)
+    # блоки, листы которых читаются: задание, результат, время начала, ключ кэша, чтение листов
+    _reading: list[tuple[dict, ConversionResult, float, str | None, list[Future]]] = []
+    _writes: queue.Queue = queue.Queue(maxsize=1)
+    _written: queue.Queue = queue.Queue()
+    tracer: trace.Tracer | None = trace.enable(traceDetailed) if tracePath is not None else None
+    _writer = threading.Thread(target=_write_stage, args=(_writes, _written), daemon=True)
+    _writer.start()
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, workers)) as readers:
+            while _queued or _reading:
+                while _queued and len(_reading) < prefetch:
+                    _job: dict = _queued.popleft()
+                    _start: float = time.perf_counter()
+                    _result = ConversionResult(_job["dxfPath"][0], _job["ifcPath"], sheets=len(_job["dxfPath"]), validation=_job["validation"])
+                    _job["incremental"] = _job["incremental"] and os.path.isfile(_job["ifcPath"])
+                    _cache: ConversionCache | None = None if _job["incremental"] else _job["cache"]
+                    _key: str | None = None
+                    if _cache is not None and all(os.path.isfile(p) for p in _job["dxfPath"]):
+                        _key = get_cache_key(_job["dxfPath"], _job["placementPath"], _job["templatePath"], _job["settings"],
+                                             _job["blockName"], get_format(_job["ifcPath"]), _job["libraryPath"] is not None)
+                        if _fetch(_result, _cache, _key):
+                            _written.put(_finish(_result, _start))
+                            continue
+                    _reading.append((_job, _result, _start, _key, [readers.submit(read_sheet, p, _job["settings"], _job["lowMemory"], _job["pathsPath"]) for p in _job["dxfPath"]]))
+                yield from _drain(_written)
+                if not _reading:
+                    continue
+                wait([f for *_, futures in _reading for f in futures], return_when=FIRST_COMPLETED)
+                for item in [r for r in _reading if all(f.done() for f in r[4])]:
+                    _reading.remove(item)
+                    _job, _result, _start, _key, _futures = item
+                    try:
+                        with span("convert", file=os.path.basename(_job["dxfPath"][0])):
+                            _model: Model = _build(
+                                _result, [f.result() for f in _futures], _job["placementPath"], _job["templatePath"], _job["settings"],
+                                _job["blockName"], _job["libraryPath"], _job["incremental"])
+                    except (IOError, DXFStructureError) as e:
+                        _fail_reading(_result, _job["dxfPath"], e)
+                        _written.put(_finish(_result, _start))
+                        continue
+                    except Exception as e:
+                        _result.status, _result.message = "error", repr(e)
+                        _written.put(_finish(_result, _start))
+                        continue
+                    # ждёт, пока поток записи освободится
+                    _writes.put((_job, _result, _start, _key, _model))
+                    yield from _drain(_written)
+    finally:
+        _writes.put(None)
+        _writer.join()
+        if tracer is not None and tracePath is not None:
+            trace.disable()
+            tracer.write(tracePath)
+    yield from _drain(_written)
+
+
+def _write_stage(writes: queue.Queue, written: queue.Queue) -> None:
+    # этап записи конвейера: записывает модели из writes, пока не получит None, и передаёт результаты в written
+    while (_item := writes.get()) is not None:
+        _job, _result, _start, _key, _model = _item
+        try:
+            report: list[dict] | None = _write(
+                _result, _model, "off" if _job["deferValidation"] else _job["validation"], _job["validationShards"])
+            _put(_result, _job["cache"], _key, _job["dxfPath"], report)
+        except Exception as e:
+            _result.status, _result.message = "error", repr(e)
+        written.put(_finish(_result, _start))
+
+
+def _drain(done: queue.Queue) -> Iterator[ConversionResult]:
+    while not done.empty():
+        yield done.get()
@@ -1,19 +1,24 @@
 import math
 
 import re
-from typing import Sequence, Iterable
+from typing import Iterable, Iterator, Sequence
 import ezdxf
 import ezdxf.math
 import ezdxf.path
 from ezdxf import select
+from ezdxf.addons import iterdxf
 from ezdxf.entities.circle import Circle
 from ezdxf.entities.dxfgfx import DXFGraphic
+from ezdxf.entities.layer import Layer
 from ezdxf.entities.lwpolyline import LWPolyline
 from ezdxf.entities.polyline import Polyline
 from ezdxf.layouts.layout import Modelspace
+from ezdxf.lldxf.const import DXFTableEntryError
 from ezdxf.math import offset_vertices_2d, Vec2
 from ezdxf.select import Window
 
+import numpy as np
+
 import shapely  # type: ignore
 
 from ifcopenshell import entity_instance
@@ -22,6 +27,45 @@ from ifcopenshell.util.shape_builder import ShapeBuilder
 TOL: int = 6
 
 
+class DrawingStream:
+    """
+    Класс DrawingStream читает DXF-файл, не загружая чертёж целиком (ezdxf.addons.iterdxf): в памяти держится только указатель разделов файла и таблица слоёв,
+    а сущности пространства модели разбираются по одной при обходе. Повторяет ту часть интерфейса Drawing, которой пользуется PathFormer:
+    filename, layers.get(имя), обход layers и modelspace().query(типы).
+
+    :param filename: путь к DXF-файлу
+    :type filename: str
+    """
+
+    def __init__(self, filename: str):
+        self.filename: str = filename
+        self.source: iterdxf.IterDXF = iterdxf.opendxf(filename)
+        self.layers: DrawingStream = self
+        # как в таблицах ezdxf, имена слоёв не зависят от регистра
+        self.layerEntries: dict[str, Layer] = {
+            e.dxf.name.lower(): e for e in self.source.load_entities(self.source.sections["TABLES"] + 1, {"LAYER"})  # type: ignore
+        }
+
+    def get(self, name: str) -> Layer:
+        # layers.get: как ezdxf.sections.table.Table.get
+        if name.lower() not in self.layerEntries:
+            raise DXFTableEntryError(name)
+        return self.layerEntries[name.lower()]
+
+    def __iter__(self) -> Iterator[Layer]:
+        # обход layers: слои таблицы, как при обходе ezdxf.sections.table.LayerTable
+        return iter(self.layerEntries.values())
+
+    def modelspace(self) -> "DrawingStream":
+        return self
+
+    def query(self, types: str) -> Iterable[DXFGraphic]:
+        return self.source.modelspace(types.split())
+
+    def close(self) -> None:
+        self.source.close()
+
+
 def get_poly_points(pline: LWPolyline | Polyline, format: str = "xyb") -> list[Sequence[float]]:
     _points: list[Sequence[float]] = []
     _points_round: list[Sequence[float]] = []
@@ -37,6 +81,81 @@ def get_poly_points(pline: LWPolyline | Polyline, format: str = "xyb") -> list[S
     return _points_round
 
 
+def get_poly_array(pline: LWPolyline | Polyline) -> np.ndarray:
+    """
+    Функция get_poly_array возвращает вершины полилинии в виде массива (n, 3) со столбцами x, y, bulge, округлёнными до TOL.
+
+    :param pline: объект LWPolyline или Polyline
+    :type pline: LWPolyline | Polyline
+    :return: массив вершин
+    :rtype: np.ndarray
+    """
+    if isinstance(pline, LWPolyline):
+        _points = np.array(pline.get_points("xyb"), dtype=float)
+    else:
+        _points = np.array([pnt.format("xyb") for pnt in pline.vertices], dtype=float)
+    return np.round(_points.reshape(-1, 3), TOL)
+
+
+def get_segment_lengths(xyb: np.ndarray, offsets: np.ndarray | None = None) -> np.ndarray:
+    """
+    Функция get_segment_lengths вычисляет длины всех сегментов (отрезков и дуг) одной или нескольких замкнутых полилиний за один проход.
+
+    Промежуточные значения округляются до TOL так же, как в get_vector_length и get_arc_length.
+
+    :param xyb: вершины полилиний подряд, массив (n, 3) со столбцами x, y, bulge
+    :type xyb: np.ndarray
+    :param offsets: индексы первых вершин каждой полилинии; None — одна полилиния
+    :type offsets: np.ndarray | None
+    :return: массив (n,) длин сегментов; сегмент i идёт от вершины i к следующей вершине той же полилинии
+    :rtype: np.ndarray
+    """
+    _n: int = len(xyb)
+    if offsets is None:
+        offsets = np.zeros(1, dtype=np.intp)
+    # индекс следующей вершины: последняя вершина каждой полилинии замыкается на первую
+    _next: np.ndarray = np.arange(1, _n + 1)
+    _ends: np.ndarray = np.append(offsets[1:], _n) - 1
+    _next[_ends] = offsets
+    _x1, _y1, _b = xyb[:, 0], xyb[:, 1], xyb[:, 2]
+    _x2, _y2 = _x1[_next], _y1[_next]
+    _dx, _dy = _x2 - _x1, _y2 - _y1
+    _chord: np.ndarray = np.round(np.sqrt(_dx**2 + _dy**2), TOL)
+    _isArc: np.ndarray = (_b != 0) & ((_dx != 0) | (_dy != 0))
+    if not _isArc.any():
+        return _chord
+    _dx, _dy, _b, _c = _dx[_isArc], _dy[_isArc], _b[_isArc], _chord[_isArc]
+    # центр дуги — как в ezdxf.math.bulge_center
+    _angle = np.arctan2(_dy, _dx) + (math.pi / 2 - np.arctan(_b) * 2)
+    _signedRadius = np.sqrt(_dx**2 + _dy**2) * (1 + _b * _b) / 4 / _b
+    _r = np.round(np.abs(_signedRadius), TOL)  # длина радиуса
+    # значение синуса половинного угла между векторами, которые начинаются в центре окружности дуги, а заканчиваются в точках хорды
+    _a = np.clip(np.round(_c / (2 * _r), TOL), -1, 1)
+    _lengths: np.ndarray = _chord.copy()
+    _lengths[_isArc] = np.round(2 * np.arcsin(_a) * _r, TOL)
+    return _lengths
+
+
+def get_poly_lengths(polys: list[np.ndarray]) -> np.ndarray:
+    """
+    Функция get_poly_lengths вычисляет длины нескольких замкнутых полилиний (с учётом арок) за один проход.
+
+    :param polys: массивы вершин полилиний (см. get_poly_array)
+    :type polys: list[np.ndarray]
+    :return: массив длин полилиний
+    :rtype: np.ndarray
+    """
+    _lengths: np.ndarray = np.zeros(len(polys))
+    _filled: list[int] = [i for i, p in enumerate(polys) if len(p) > 0]
+    if len(_filled) == 0:
+        return _lengths
+    _sizes: np.ndarray = np.array([len(polys[i]) for i in _filled], dtype=np.intp)
+    _offsets: np.ndarray = np.concatenate(([0], np.cumsum(_sizes)[:-1])).astype(np.intp)
+    _segments: np.ndarray = get_segment_lengths(np.concatenate([polys[i] for i in _filled]), _offsets)
+    _lengths[_filled] = np.add.reduceat(_segments, _offsets)
+    return np.round(_lengths, TOL)
+
+
 def get_vector_length(p1: Sequence[float], p2: Sequence[float]) -> float:
     """
     Функция get_vector_length вычисляет длину вектора между двумя точками.
@@ -80,6 +199,30 @@ def get_dxf_entity_length(entity: DXFGraphic) -> float:
         _length = get_circle_length(entity)
     return _length
 
+
+def get_dxf_entity_lengths(entities: list[DXFGraphic]) -> list[float]:
+    """
+    Функция get_dxf_entity_lengths вычисляет длины набора полилиний и окружностей; длины всех полилиний считаются одним векторным проходом.
+
+    :param entities: полилинии и окружности
+    :type entities: list[DXFGraphic]
+    :return: список длин в порядке entities
+    :rtype: list[float]
+    """
+    _lengths: list[float] = [0.] * len(entities)
+    _polyIdx: list[int] = []
+    _polys: list[np.ndarray] = []
+    for i, e in enumerate(entities):
+        if isinstance(e, LWPolyline) or isinstance(e, Polyline):
+            _polyIdx.append(i)
+            _polys.append(get_poly_array(e))
+        if isinstance(e, Circle):
+            _lengths[i] = get_circle_length(e)
+    for i, _length in zip(_polyIdx, get_poly_lengths(_polys)):
+        _lengths[i] = float(_length)
+    return _lengths
+
+
 def get_poly_length(pline: LWPolyline | Polyline) -> float:
     """
     Функция get_poly_length принимает объект LWPolyline или Polyline и вычисляет длину полилинии (с учётом арок).
@@ -89,17 +232,7 @@ def get_poly_length(pline: LWPolyline | Polyline) -> float:
     :return: длина полилинии
     :rtype: float
     """
-    _length: float = 0
-    _points: list[Sequence[float]] = get_poly_points(pline)
-    for i in range(len(_points)):
-        j = i+1 if i < len(_points)-1 else 0
-        if _points[i][2] != 0:
-            pc: Sequence[float] = list(ezdxf.math.bulge_center(
-                (_points[i][0], _points[i][1]), (_points[j][0], _points[j][1]), _points[i][2]))
-            _length += get_arc_length(_points[i], _points[j], pc)
-        else:
-            _length += get_vector_length(_points[i], _points[j])
-    return _length
+    return round(float(get_segment_lengths(get_poly_array(pline)).sum()), TOL)
 
 def get_circle_length(circle: Circle) -> float:
     """
@@ -115,6 +248,53 @@ def get_circle_length(circle: Circle) -> float:
 
 
 
+def get_dxf_entity_area(entity: DXFGraphic) -> float:
+    if isinstance(entity, LWPolyline) or isinstance(entity, Polyline):
+        _area = get_poly_area(entity)
+    if isinstance(entity, Circle):
+        _area = get_circle_area(entity)
+    return _area
+
+
+def get_poly_area(pline: LWPolyline | Polyline) -> float:
+    """
+    Функция get_poly_area вычисляет площадь, ограниченную замкнутой полилинией (с учётом арок), без аппроксимации дуг ломаной.
+
+    :param pline: объект LWPolyline или Polyline
+    :type pline: LWPolyline | Polyline
+    :return: площадь
+    :rtype: float
+    """
+    _area: float = 0
+    _points: list[Sequence[float]] = get_poly_points(pline)
+    for i in range(len(_points)):
+        j = i+1 if i < len(_points)-1 else 0
+        x1, y1, b = _points[i][0], _points[i][1], _points[i][2]
+        x2, y2 = _points[j][0], _points[j][1]
+        _area += (x1 * y2 - x2 * y1) / 2  # формула шнурков
+        if b != 0:
+            # площадь кругового сегмента между хордой и дугой; знак совпадает со знаком выпуклости
+            c = math.hypot(x2 - x1, y2 - y1)
+            theta = 4 * math.atan(abs(b))
+            if c == 0 or math.sin(theta / 2) == 0:
+                continue
+            r = c / (2 * math.sin(theta / 2))
+            _area += math.copysign(r**2 / 2 * (theta - math.sin(theta)), b)
+    return round(abs(_area), TOL)
+
+
+def get_circle_area(circle: Circle) -> float:
+    """
+    Функция get_circle_area вычисляет площадь круга.
+
+    :param circle: объект Circle
+    :type circle: Circle
+    :return: площадь круга
+    :rtype: float
+    """
+    return round(circle.dxf.radius**2 * math.pi, TOL)
+
+
 def check_polys(pline: LWPolyline | Polyline, polys: list[LWPolyline | Polyline]) -> bool:
     """
     Функция check_polys принимает объект LWPolyline или Polyline и список полилиний и проверяет, есть ли уже в списке полилиния с такой же длиной (с учётом арок).
@@ -126,13 +306,8 @@ def check_polys(pline: LWPolyline | Polyline, polys: list[LWPolyline | Polyline]
     :return: True, если длина полилинии совпадает с длиной хотя бы одной полилинии в списке, False в противном случае
     :rtype: bool
     """
-    _length: float = get_poly_length(pline)
-    _llength: float = 0
-    for p in polys:
-        _llength = get_poly_length(p)
-        if _length == _llength:
-            return True
-    return False
+    _lengths: np.ndarray = get_poly_lengths([get_poly_array(p) for p in [pline] + polys])
+    return bool((_lengths[1:] == _lengths[0]).any())
 
 
 def get_min_coords(pline: LWPolyline | Polyline) -> tuple[float, float]:
@@ -199,6 +374,96 @@ def convert_letter_to_poly(pline: LWPolyline | Polyline, msp: Modelspace, offset
     return letter
 
 
+def get_flattened_vertices(path: ezdxf.path.Path, distance: float = 1) -> np.ndarray:
+    """
+    Функция get_flattened_vertices аппроксимирует контур (с учётом арок) ломаной и возвращает её вершины.
+
+    :param path: контур ezdxf (make_poly_path, make_circle_path)
+    :type path: ezdxf.path.Path
+    :param distance: максимальное отклонение ломаной от дуги
+    :type distance: float
+    :return: массив вершин размерности (n, 2)
+    :rtype: np.ndarray
+    """
+    return np.array([(v.x, v.y) for v in path.flattening(distance)], dtype=float).reshape(-1, 2)
+
+
+def get_raw_poly_array(pline: LWPolyline | Polyline) -> np.ndarray:
+    """
+    Функция get_raw_poly_array возвращает вершины полилинии в виде массива (n, 3) со столбцами x, y, bulge без округления (в ОСК сущности).
+
+    :param pline: объект LWPolyline или Polyline
+    :type pline: LWPolyline | Polyline
+    :return: массив вершин
+    :rtype: np.ndarray
+    """
+    if isinstance(pline, LWPolyline):
+        # вершины LWPOLYLINE хранятся в ezdxf массивом x, y, начальная ширина, конечная ширина, bulge
+        return np.asarray(pline.lwpoints.values, dtype=float).reshape(-1, 5)[:, [0, 1, 4]]
+    return np.array([pnt.format("xyb") for pnt in pline.vertices], dtype=float).reshape(-1, 3)
+
+
+def make_poly_path(xyb: np.ndarray, closed: bool, elevation: float = 0., extrusion: Sequence[float] = (0., 0., 1.)) -> ezdxf.path.Path:
+    """
+    Функция make_poly_path строит контур ezdxf по вершинам полилинии — так же, как ezdxf.path.make_path по самой сущности.
+
+    :param xyb: вершины полилинии, массив (n, 3) со столбцами x, y, bulge (см. get_raw_poly_array)
+    :type xyb: np.ndarray
+    :param closed: замкнута ли полилиния
+    :type closed: bool
+    :return: контур
+    :rtype: ezdxf.path.Path
+    """
+    _path = ezdxf.path.Path()
+    ezdxf.path.add_2d_polyline(_path, [tuple(p) for p in xyb.tolist()], close=closed, ocs=ezdxf.math.OCS(extrusion), elevation=elevation)
+    return _path
+
+
+def make_circle_path(center: Sequence[float], radius: float, extrusion: Sequence[float] = (0., 0., 1.)) -> ezdxf.path.Path:
+    """
+    Функция make_circle_path строит контур ezdxf окружности — так же, как ezdxf.path.make_path по сущности CIRCLE.
+
+    :param center: центр окружности в ОСК (x, y, z)
+    :type center: Sequence[float]
+    :param radius: радиус
+    :type radius: float
+    :return: контур
+    :rtype: ezdxf.path.Path
+    """
+    _path = ezdxf.path.Path()
+    if abs(radius) > 1e-12:
+        _ellipse = ezdxf.math.ConstructionEllipse.from_arc(center=center, radius=abs(radius), extrusion=extrusion)
+        ezdxf.path.add_ellipse(_path, _ellipse, reset=True)
+    return _path
+
+
+def get_poly_areas(xyb: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Функция get_poly_areas вычисляет площади нескольких замкнутых полилиний (с учётом арок) за один проход — так же, как get_poly_area для каждой полилинии.
+
+    :param xyb: вершины полилиний подряд, массив (n, 3) со столбцами x, y, bulge, округлёнными до TOL
+    :type xyb: np.ndarray
+    :param offsets: индексы первых вершин каждой полилинии; полилинии без вершин не допускаются
+    :type offsets: np.ndarray
+    :return: массив площадей
+    :rtype: np.ndarray
+    """
+    _n: int = len(xyb)
+    _next: np.ndarray = np.arange(1, _n + 1)
+    _next[np.append(offsets[1:], _n) - 1] = offsets
+    _x1, _y1, _b = xyb[:, 0], xyb[:, 1], xyb[:, 2]
+    _x2, _y2 = _x1[_next], _y1[_next]
+    _segments: np.ndarray = (_x1 * _y2 - _x2 * _y1) / 2  # формула шнурков
+    # площадь кругового сегмента между хордой и дугой; знак совпадает со знаком выпуклости
+    _c: np.ndarray = np.hypot(_x2 - _x1, _y2 - _y1)
+    _theta: np.ndarray = 4 * np.arctan(np.abs(_b))
+    _sin: np.ndarray = np.sin(_theta / 2)
+    _isArc: np.ndarray = (_b != 0) & (_c != 0) & (_sin != 0)
+    _r: np.ndarray = _c[_isArc] / (2 * _sin[_isArc])
+    _segments[_isArc] += np.copysign(_r**2 / 2 * (_theta[_isArc] - np.sin(_theta[_isArc])), _b[_isArc])
+    return np.round(np.abs(np.add.reduceat(_segments, offsets)), TOL)
+
+
 def convert_poly_to_Polygon(poly: LWPolyline | Polyline) -> shapely.geometry.Polygon:
     _path = ezdxf.path.make_path(poly)
     return shapely.geometry.Polygon(_path.flattening(1))
@@ -287,28 +552,42 @@ def find_center_on_arc(p1: Sequence[float], p2: Sequence[float]) -> Sequence[flo
     return point
 
 
-def convert_poly_to_PointList(poly: LWPolyline | Polyline) -> tuple[list, list]:
+def get_arc_middles(xyb: np.ndarray) -> np.ndarray:
+    """
+    Функция get_arc_middles вычисляет середины дуг всех сегментов замкнутой полилинии за один проход.
+
+    Середина дуги отстоит от середины хорды на стрелку прогиба bulge·c/2 по нормали к хорде (вправо по ходу сегмента при bulge > 0).
+
+    :param xyb: вершины полилинии, массив (n, 3) со столбцами x, y, bulge
+    :type xyb: np.ndarray
+    :return: массив (n, 2); для прямых сегментов — середина отрезка
+    :rtype: np.ndarray
+    """
+    _xy: np.ndarray = xyb[:, :2]
+    _d: np.ndarray = np.roll(_xy, -1, axis=0) - _xy
+    _normal: np.ndarray = np.column_stack((_d[:, 1], -_d[:, 0]))
+    return _xy + _d / 2 + _normal * (xyb[:, 2:3] / 2)
+
+
+def convert_poly_to_PointList(poly: LWPolyline | Polyline | np.ndarray) -> tuple[list, list]:
     """
     Функция преобразует полилинию в список точек с указанием, какие точки являются вершинами дуг.
 
-    :param poly: полилиния, которую нужно преобразовать
-    :type poly: LWPolyline | Polyline
+    :param poly: полилиния, которую нужно преобразовать, или её вершины (см. get_raw_poly_array)
+    :type poly: LWPolyline | Polyline | np.ndarray
     :return: список точек и список индексов точек, являющихся вершинами дуг
     :rtype: tuple[list, list]
     """
-    ifc_points: list[tuple[float, float]] = []
-    arc_middles: list[int] = []
-    dxf_points: list[Sequence[float]] = get_poly_points(poly)
-    for p in dxf_points:
-        ifc_points.append((float(p[0]), float(p[1])))
-        if p[2] != 0:
-            if p != dxf_points[-1]:
-                p_next = dxf_points[dxf_points.index(p)+1]
-            else:
-                p_next = dxf_points[0]
-            p_center = find_center_on_arc(p, p_next)
-            ifc_points.append((float(p_center[0]), float(p_center[1])))
-            arc_middles.append(len(ifc_points)-1)
+    _xyb: np.ndarray = np.round(poly, TOL) if isinstance(poly, np.ndarray) else get_poly_array(poly)
+    _isArc: np.ndarray = _xyb[:, 2] != 0
+    # позиция вершины в списке точек с учётом вставленных перед ней середин дуг
+    _positions: np.ndarray = np.arange(len(_xyb)) + np.concatenate(([0], np.cumsum(_isArc)[:-1])).astype(np.intp)
+    _arcPositions: np.ndarray = _positions[_isArc] + 1
+    _points: np.ndarray = np.empty((len(_xyb) + int(_isArc.sum()), 2))
+    _points[_positions] = _xyb[:, :2]
+    _points[_arcPositions] = get_arc_middles(_xyb)[_isArc]
+    ifc_points: list[tuple[float, float]] = [tuple(p) for p in _points.tolist()]
+    arc_middles: list[int] = _arcPositions.tolist()
     return ifc_points, arc_middles
 
 
@@ -1,10 +1,188 @@
+from collections import Counter
+from collections.abc import Callable, Iterable
+from weakref import WeakKeyDictionary
+
 import ifcopenshell as ios
+import ifcopenshell.guid
 from ifcopenshell import entity_instance, validate
 from ifcopenshell.api import run
 from ifcopenshell.util import representation
+from ifcopenshell.util.element import remove_deep2
 from ifcopenshell.util.shape_builder import ShapeBuilder
 
 
+class EntityPool:
+    """
+    Класс EntityPool хранит индекс уже созданных в файле объектов IfcCartesianPoint, IfcDirection, IfcAxis2Placement2D и IfcAxis2Placement3D, чтобы повторно использовать их без полного перебора model.by_type(...).
+
+    Индекс заполняется из файла при создании пула (обычно из TEMPLATE.ifc) и пополняется при каждом создании объекта через пул. Объекты, созданные в файле в обход пула, подхватываются при следующем промахе (см. sync).
+    Удалённые объекты в обход пула не обнаружить (обращение к удалённому объекту завершает процесс), поэтому объекты из файла удаляются только функцией remove_Entity, которая убирает их из индекса (см. evict).
+
+    :param model: файл IFC
+    :type model: ios.file
+    """
+
+    def __init__(self, model: ios.file):
+        self.model: ios.file = model
+        self.points: dict[tuple[float, ...], entity_instance] = dict()
+        self.directions: dict[tuple[float, ...], entity_instance] = dict()
+        self.placements2d: dict[tuple[int | None, int | None], entity_instance] = dict()
+        self.placements3d: dict[tuple[int | None, int | None, int | None], entity_instance] = dict()
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        # идентификатор объекта -> (индекс, ключ), по которому он записан; нужен, чтобы убрать из индекса удалённые объекты, не обращаясь к ним
+        self.keys: dict[int, tuple[dict, tuple]] = dict()
+        self.synced_id: int = 0
+        self.sync()
+
+    @staticmethod
+    def _id(entity: entity_instance | None) -> int | None:
+        return entity.id() if entity is not None else None
+
+    def _add(self, index: dict, key: tuple, entity: entity_instance) -> None:
+        # при совпадении ключей сохраняется первый по порядку объект, как и при переборе by_type
+        if key not in index:
+            index[key] = entity
+            self.keys[entity.id()] = (index, key)
+
+    def sync(self) -> None:
+        """
+        Метод sync добавляет в индекс объекты, появившиеся в файле после предыдущей синхронизации (в том числе созданные в обход пула, например через ifcopenshell.api). Каждый идентификатор просматривается один раз.
+        """
+        _max_id: int = self.model.wrapped_data.getMaxId()
+        for _id in range(self.synced_id + 1, _max_id + 1):
+            try:
+                e = self.model.by_id(_id)
+            except RuntimeError:
+                continue  # объект удалён
+            _class: str = e.is_a()
+            if _class == "IfcCartesianPoint":
+                self._add(self.points, tuple(e.Coordinates), e)
+            elif _class == "IfcDirection":
+                self._add(self.directions, tuple(e.DirectionRatios), e)
+            elif _class == "IfcAxis2Placement2D":
+                self._add(self.placements2d, (self._id(e.Location), self._id(e.RefDirection)), e)
+            elif _class == "IfcAxis2Placement3D":
+                self._add(self.placements3d, (self._id(e.Location), self._id(e.Axis), self._id(e.RefDirection)), e)
+        self.synced_id = _max_id
+
+    def evict(self, ids: Iterable[int]) -> None:
+        """
+        Метод evict убирает из индекса объекты с заданными идентификаторами, которых больше нет в файле. Удалённый объект нельзя ни вернуть из пула, ни прочитать:
+        обращение к нему завершает процесс, поэтому наличие проверяется по идентификатору.
+
+        :param ids: идентификаторы объектов, которые могли быть удалены
+        :type ids: Iterable[int]
+        """
+        for _id in ids:
+            if _id not in self.keys:
+                continue
+            try:
+                self.model.by_id(_id)
+            except RuntimeError:
+                _index, _key = self.keys.pop(_id)
+                del _index[_key]
+
+    def _count(self, ifc_class: str, found: bool) -> None:
+        if found:
+            self.hits[ifc_class] += 1
+        else:
+            self.misses[ifc_class] += 1
+
+    def has_CartesianPoint(self, coords: list[float]) -> bool:
+        self.sync()
+        return tuple(coords) in self.points
+
+    def get_CartesianPoint(self, coords: list[float]) -> entity_instance:
+        _key = tuple(coords)
+        _point = self.points.get(_key)
+        if _point is None:
+            self.sync()
+            _point = self.points.get(_key)
+        self._count("IfcCartesianPoint", _point is not None)
+        if _point is None:
+            _point = self.model.createIfcCartesianPoint(coords)
+            self._add(self.points, _key, _point)
+        return _point
+
+    def has_Direction(self, d_ratios: list[float]) -> bool:
+        self.sync()
+        return tuple(d_ratios) in self.directions
+
+    def get_Direction(self, d_ratios: list[float]) -> entity_instance:
+        _key = tuple(d_ratios)
+        _dir = self.directions.get(_key)
+        if _dir is None:
+            self.sync()
+            _dir = self.directions.get(_key)
+        self._count("IfcDirection", _dir is not None)
+        if _dir is None:
+            _dir = self.model.createIfcDirection(d_ratios)
+            self._add(self.directions, _key, _dir)
+        return _dir
+
+    def has_Axis2Placement2D(self, point: entity_instance, dir_x: entity_instance) -> bool:
+        self.sync()
+        return (self._id(point), self._id(dir_x)) in self.placements2d
+
+    def get_Axis2Placement2D(self, point: entity_instance, dir_x: entity_instance) -> entity_instance:
+        _key = (self._id(point), self._id(dir_x))
+        _placement = self.placements2d.get(_key)
+        if _placement is None:
+            self.sync()
+            _placement = self.placements2d.get(_key)
+        self._count("IfcAxis2Placement2D", _placement is not None)
+        if _placement is None:
+            _placement = self.model.createIfcAxis2Placement2D(point, dir_x)
+            self._add(self.placements2d, _key, _placement)
+        return _placement
+
+    def has_Axis2Placement3D(self, point: entity_instance, dir_z: entity_instance, dir_x: entity_instance) -> bool:
+        self.sync()
+        return (self._id(point), self._id(dir_z), self._id(dir_x)) in self.placements3d
+
+    def get_Axis2Placement3D(self, point: entity_instance, dir_z: entity_instance, dir_x: entity_instance) -> entity_instance:
+        _key = (self._id(point), self._id(dir_z), self._id(dir_x))
+        _placement = self.placements3d.get(_key)
+        if _placement is None:
+            self.sync()
+            _placement = self.placements3d.get(_key)
+        self._count("IfcAxis2Placement3D", _placement is not None)
+        if _placement is None:
+            _placement = self.model.createIfcAxis2Placement3D(point, dir_z, dir_x)
+            self._add(self.placements3d, _key, _placement)
+        return _placement
+
+    def report(self) -> str:
+        """
+        Метод report возвращает сводку попаданий и промахов пула по классам IFC.
+
+        :return: строка вида "IfcCartesianPoint: 10 hits / 3 misses; ..."
+        :rtype: str
+        """
+        _classes = sorted(set(self.hits) | set(self.misses))
+        return "; ".join(f"{c}: {self.hits[c]} hits / {self.misses[c]} misses" for c in _classes)
+
+
+_pools: "WeakKeyDictionary[ios.file, EntityPool]" = WeakKeyDictionary()
+
+
+def get_EntityPool(model: ios.file) -> EntityPool:
+    """
+    Функция get_EntityPool возвращает пул объектов, привязанный к файлу IFC, создавая его при первом обращении.
+
+    :param model: файл IFC
+    :type model: ios.file
+    :return: пул объектов файла
+    :rtype: EntityPool
+    """
+    _pool = _pools.get(model)
+    if _pool is None:
+        _pool = EntityPool(model)
+        _pools[model] = _pool
+    return _pool
+
+
 def check_CartesianPoint(model: ios.file, coords: list[float]) -> bool:
     """
     Функция check_CartesianPoint проверяет, существует ли уже в модели объект IfcCartesianPoint с заданными координатами.
@@ -14,13 +192,10 @@ def check_CartesianPoint(model: ios.file, coords: list[float]) -> bool:
     :return: True, если объект существует, False в противном случае
     :rtype: bool
     """
-    for p in model.by_type("IfcCartesianPoint"):
-        if coords == list(p.Coordinates):
-            return True
-    return False
+    return get_EntityPool(model).has_CartesianPoint(coords)
 
 
-def create_CartesianPoint(model: ios.file, coords: list[float]) -> entity_instance:  # type: ignore
+def create_CartesianPoint(model: ios.file, coords: list[float]) -> entity_instance:
     """
     Функция create_CartesianPoint создает объект IfcCartesianPoint с заданными координатами.
 
@@ -29,29 +204,14 @@ def create_CartesianPoint(model: ios.file, coords: list[float]) -> entity_instan
     :return: объект IfcCartesianPoint
     :rtype: entity_instance
     """
-    found = check_CartesianPoint(model, coords)
-    if found:
-        for p in model.by_type("IfcCartesianPoint"):
-            if coords == list(p.Coordinates):
-                return p
-    else:
-        return model.createIfcCartesianPoint(coords)
+    return get_EntityPool(model).get_CartesianPoint(coords)
 
 
 def check_Direction(model: ios.file, d_ratios: list[float]) -> bool:
-    for p in model.by_type("IfcDirection"):
-        if d_ratios == list(p.DirectionRatios):
-            return True
-    return False
+    return get_EntityPool(model).has_Direction(d_ratios)
 
-def create_Direction(model: ios.file, d_ratios: list[float]) -> entity_instance:  # type: ignore
-    found = check_Direction(model, d_ratios)
-    if found:
-        for p in model.by_type("IfcDirection"):
-            if d_ratios == list(p.DirectionRatios):
-                return p
-    else:
-        return model.createIfcDirection(d_ratios)
+def create_Direction(model: ios.file, d_ratios: list[float]) -> entity_instance:
+    return get_EntityPool(model).get_Direction(d_ratios)
 
 
 def check_Axis2Placement2D(model: ios.file, point: entity_instance, dir_x: entity_instance) -> bool:
@@ -65,20 +225,11 @@ def check_Axis2Placement2D(model: ios.file, point: entity_instance, dir_x: entit
     :return: True, если объект существует, False в противном случае
     :rtype: bool
     """
-    for p in model.by_type("IfcAxis2Placement2D"):
-        if point == p.Location and dir_x == p.RefDirection:
-            return True
-    return False
+    return get_EntityPool(model).has_Axis2Placement2D(point, dir_x)
 
 
-def create_Axis2Placement2D(model: ios.file, point: entity_instance, dir_x: entity_instance) -> entity_instance:  # type: ignore
-    found = check_Axis2Placement2D(model, point, dir_x)
-    if found:
-        for p in model.by_type("IfcAxis2Placement2D"):
-            if point == p.Location and dir_x == p.RefDirection:
-                return p
-    else:
-        return model.createIfcAxis2Placement2D(point, dir_x)
+def create_Axis2Placement2D(model: ios.file, point: entity_instance, dir_x: entity_instance) -> entity_instance:
+    return get_EntityPool(model).get_Axis2Placement2D(point, dir_x)
 
 
 def check_Axis2Placement3D(model: ios.file, point: entity_instance, dir_z: entity_instance, dir_x: entity_instance) -> bool:
@@ -94,13 +245,10 @@ def check_Axis2Placement3D(model: ios.file, point: entity_instance, dir_z: entit
     :return: True, если объект существует, False в противном случае
     :rtype: bool
     """
-    for p in model.by_type("IfcAxis2Placement3D"):
-        if point == p.Location and dir_z == p.Axis and dir_x == p.RefDirection:
-            return True
-    return False
+    return get_EntityPool(model).has_Axis2Placement3D(point, dir_z, dir_x)
 
 
-def create_Axis2Placement3D(model: ios.file, point: entity_instance, dir_z: entity_instance, dir_x: entity_instance) -> entity_instance:  # type: ignore
+def create_Axis2Placement3D(model: ios.file, point: entity_instance, dir_z: entity_instance, dir_x: entity_instance) -> entity_instance:
     '''
     Функция create_Axis2Placement3D создает объект IfcAxis2Placement3D с заданными координатами, направлением оси z и направлением оси x. Если такой объект уже существует в модели, функция возвращает его. В противном случае, функция создает новый объект и возвращает его.
 
@@ -113,13 +261,7 @@ def create_Axis2Placement3D(model: ios.file, point: entity_instance, dir_z: enti
     :return: объект IfcAxis2Placement3D
     :rtype: entity_instance
     '''
-    found = check_Axis2Placement3D(model, point, dir_z, dir_x)
-    if found:
-        for p in model.by_type("IfcAxis2Placement3D"):
-            if point == p.Location and dir_z == p.Axis and dir_x == p.RefDirection:
-                return p
-    else:
-        return model.createIfcAxis2Placement3D(point, dir_z, dir_x)
+    return get_EntityPool(model).get_Axis2Placement3D(point, dir_z, dir_x)
 
 
 def gather_LocalPlacements(model: ios.file) -> dict[str, entity_instance]:
@@ -128,19 +270,25 @@ def gather_LocalPlacements(model: ios.file) -> dict[str, entity_instance]:
     '''
     local_placements: dict[str, entity_instance] = dict()
     for lp in model.by_type("IfcLocalPlacement"):
-        name1: str
-        if isinstance(lp.PlacementRelTo, entity_instance):
-            _rel = lp.PlacementRelTo.RelativePlacement
-            name1 = f"{_rel.Location.id()}-{_rel.Axis.id()}-{_rel.RefDirection.id()}"
-        else:
-            name1 = "None"
-        _rel = lp.RelativePlacement
-        name2: str = f"{_rel.Location.id()}-{_rel.Axis.id()}-{_rel.RefDirection.id()}"
-        name: str = f"{name1}/{name2}"
-        local_placements[name] = lp
+        local_placements[get_LocalPlacementName(lp)] = lp
     return local_placements
 
 
+def get_LocalPlacementName(local_placement: entity_instance) -> str:
+    '''
+    Функция get_LocalPlacementName возвращает ключ объекта IfcLocalPlacement в словаре local_placements (см. create_LocalPlacement).
+    '''
+    name1: str
+    if isinstance(local_placement.PlacementRelTo, entity_instance):
+        _rel = local_placement.PlacementRelTo.RelativePlacement
+        name1 = f"{_rel.Location.id()}-{_rel.Axis.id()}-{_rel.RefDirection.id()}"
+    else:
+        name1 = "None"
+    _rel = local_placement.RelativePlacement
+    name2: str = f"{_rel.Location.id()}-{_rel.Axis.id()}-{_rel.RefDirection.id()}"
+    return f"{name1}/{name2}"
+
+
 def create_LocalPlacement(
         model: ios.file,
         local_placements: dict[str, entity_instance],
@@ -186,19 +334,15 @@ def create_IfcExtrudedAreaSolid(
     return model.createIfcExtrudedAreaSolid(sweptArea, placement, dir_z, depth)
 
 
-def create_PlateType(
+def create_PlateSolid(
         model: ios.file,
-        body: entity_instance | None,
-        origin: entity_instance,
-        local_placements: dict[str, entity_instance],
         profiles: list[entity_instance],
-        name: str,
         dir_z: entity_instance,
         dir_x: entity_instance,
         THICKNESS: float = 1.
-):
+) -> entity_instance:
     '''
-    Функция create_PlateType создает тип продукта IfcPlateType с заданными параметрами. Она принимает модель IFC, объект sweptArea, глубину depth, объект dir_z и объект placement в качестве аргументов. Возвращает созданный объект IfcPlateType.
+    Функция create_PlateSolid создает тело пластины: выдавливание профиля сквозного реза на толщину листа за вычетом выдавленных профилей фрезеровок и надписей. Возвращает IfcExtrudedAreaSolid или IfcBooleanResult.
     '''
     _cuts: list[entity_instance] = []
     _sheet: entity_instance
@@ -219,6 +363,77 @@ def create_PlateType(
             _sheet = create_IfcExtrudedAreaSolid(model=model, sweptArea=profile, depth=THICKNESS, dir_z=dir_z)
     for cut in _cuts:
         _sheet = model.createIfcBooleanResult(Operator="DIFFERENCE", FirstOperand=_sheet, SecondOperand=cut)
+    return _sheet
+
+
+def _refers(value) -> bool:
+    if isinstance(value, entity_instance):
+        return value.id() != 0
+    if isinstance(value, tuple) and len(value) > 0:
+        return isinstance(value[0], (entity_instance, tuple)) and any(_refers(v) for v in value)
+    return False
+
+
+def copy_Entity(
+        model: ios.file,
+        entity: entity_instance,
+        copies: dict[int, entity_instance] | None = None
+) -> entity_instance:
+    '''
+    Функция copy_Entity копирует объект из другого файла IFC в model вместе со всеми объектами, на которые он ссылается. Точки, направления и системы координат берутся из пула объектов model (как при создании через create_*), остальные объекты копируются по одному разу. Возвращает копию объекта.
+    '''
+    copies = dict() if copies is None else copies
+    _id: int = entity.id()
+    if _id in copies:
+        return copies[_id]
+
+    def _value(v):
+        if isinstance(v, entity_instance):
+            return copy_Entity(model, v, copies)
+        if isinstance(v, tuple):
+            return tuple(_value(i) for i in v)
+        return v
+
+    _class: str = entity.is_a()
+    _copy: entity_instance
+    if _id == 0:
+        # значение определённого типа в SELECT (например, IfcLineIndex) — не объект, передаётся как есть
+        return entity
+    if _class == "IfcCartesianPoint":
+        _copy = create_CartesianPoint(model, list(entity.Coordinates))
+    elif _class == "IfcDirection":
+        _copy = create_Direction(model, list(entity.DirectionRatios))
+    elif _class == "IfcAxis2Placement2D":
+        _copy = get_EntityPool(model).get_Axis2Placement2D(
+            _value(entity.Location), _value(entity.RefDirection))
+    elif _class == "IfcAxis2Placement3D":
+        _copy = get_EntityPool(model).get_Axis2Placement3D(
+            _value(entity.Location), _value(entity.Axis), _value(entity.RefDirection))
+    elif not any(_refers(v) for v in entity):
+        # объект без ссылок (например, IfcCartesianPointList2D) копируется целиком средствами ifcopenshell
+        _copy = model.add(entity)
+    else:
+        _copy = model.create_entity(_class, *[_value(v) for v in entity])
+    copies[_id] = _copy
+    return _copy
+
+
+def create_PlateType(
+        model: ios.file,
+        body: entity_instance | None,
+        origin: entity_instance,
+        local_placements: dict[str, entity_instance],
+        profiles: list[entity_instance],
+        name: str,
+        dir_z: entity_instance,
+        dir_x: entity_instance,
+        THICKNESS: float = 1.,
+        solid: entity_instance | None = None
+):
+    '''
+    Функция create_PlateType создает тип продукта IfcPlateType с заданными параметрами. Она принимает модель IFC, профили profiles (или готовое тело solid, например, из библиотеки шаблонов), толщину THICKNESS, объекты dir_z и dir_x в качестве аргументов. Возвращает созданный объект IfcPlateType.
+    '''
+    _sheet: entity_instance = solid if solid is not None else create_PlateSolid(model, profiles, dir_z, dir_x, THICKNESS)
     _rtype: str = "SweptSolid"
     if _sheet.is_a("IfcBooleanResult"):
         _rtype = "CSG"
@@ -247,6 +462,16 @@ def create_PlateType(
     return plate_type
 
 
+def rename_PlateType(model: ios.file, plate_type: entity_instance, name: str) -> None:
+    '''
+    Функция rename_PlateType задает имя типа IfcPlateType и свойство ModelLabel набора Pset_ManufacturerTypeInformation.
+    '''
+    plate_type.Name = name
+    for pset in plate_type.HasPropertySets or []:
+        if pset.Name == "Pset_ManufacturerTypeInformation":
+            run("pset.edit_pset", model, pset=pset, properties={"ModelLabel": name})
+
+
 def create_Plate(model: ios.file, storey: entity_instance, name: str = "Default Name", type: entity_instance | None = None):
     '''
     Функция create_Plate создает объект IfcPlate с заданными параметрами. Она принимает модель IFC, объект storey, имя name и объект type в качестве аргументов. Возвращает созданный объект IfcPlate.
@@ -260,3 +485,125 @@ def create_Plate(model: ios.file, storey: entity_instance, name: str = "Default
     else:
         plate.Name = name
     return plate
+
+
+def create_MappedRepresentation(
+        model: ios.file,
+        representation_maps: list[entity_instance],
+        operator: entity_instance
+) -> entity_instance:
+    '''
+    Функция create_MappedRepresentation создает для экземпляра типа объект IfcProductDefinitionShape, ссылающийся на представления типа (IfcRepresentationMap) через IfcMappedItem — так же, как это делает type.assign_type.
+    '''
+    _representations: list[entity_instance] = []
+    for rmap in representation_maps:
+        _mapped = model.createIfcMappedItem(rmap, operator)
+        _source = rmap.MappedRepresentation
+        _representations.append(model.createIfcShapeRepresentation(
+            ContextOfItems=_source.ContextOfItems, RepresentationIdentifier=_source.RepresentationIdentifier,
+            RepresentationType="MappedRepresentation", Items=[_mapped]))
+    return model.createIfcProductDefinitionShape(Representations=_representations)
+
+
+def create_Plates(
+        model: ios.file,
+        storey: entity_instance,
+        types: list[entity_instance],
+        counts: list[int],
+        origin: entity_instance,
+        dir_z: entity_instance,
+        dir_x: entity_instance,
+        placements: list[list[entity_instance | None]] | None = None
+) -> list[list[entity_instance]]:
+    '''
+    Функция create_Plates за один проход создает объекты IfcPlate для нескольких типов IfcPlateType без вызовов ifcopenshell.api на каждую пластину.
+    Для всех пластин создаются одна запись IfcOwnerHistory, одна связь IfcRelContainedInSpatialStructure с этажом и по одной связи IfcRelDefinesByType на тип (существующие связи дополняются).
+
+    :param types: типы пластин
+    :type types: list[entity_instance]
+    :param counts: число пластин каждого типа
+    :type counts: list[int]
+    :param origin: объект IfcCartesianPoint начала координат
+    :type origin: entity_instance
+    :param placements: размещения IfcLocalPlacement для пластин каждого типа; для недостающих и None создается собственное размещение в начале координат
+    :type placements: list[list[entity_instance | None]] | None
+    :return: списки созданных пластин по типам
+    :rtype: list[list[entity_instance]]
+    '''
+    if sum(counts) == 0:
+        return [[] for _ in types]
+    _history: entity_instance = run("owner.create_owner_history", model)
+    _axis: entity_instance = create_Axis2Placement3D(model, origin, dir_z, dir_x)
+    _dir_y: entity_instance = create_Direction(model, [0., 1., 0.])
+    _operator: entity_instance = model.createIfcCartesianTransformationOperator3D(
+        Axis1=dir_x, Axis2=_dir_y, LocalOrigin=origin, Scale=1., Axis3=dir_z)
+    _plates: list[list[entity_instance]] = []
+    for i, (_type, _count) in enumerate(zip(types, counts)):
+        _typePlacements: list[entity_instance | None] = placements[i] if placements is not None else []
+        _typePlates: list[entity_instance] = []
+        for j in range(_count):
+            _placement: entity_instance | None = _typePlacements[j] if j < len(_typePlacements) else None
+            if _placement is None:
+                _placement = model.createIfcLocalPlacement(None, _axis)
+            _typePlates.append(model.createIfcPlate(
+                GlobalId=ifcopenshell.guid.new(),
+                OwnerHistory=_history,
+                Name=_type.Name,
+                ObjectPlacement=_placement,
+                Representation=create_MappedRepresentation(model, _type.RepresentationMaps or [], _operator)
+            ))
+        if len(_typePlates) > 0:
+            if len(_type.Types) > 0:
+                # у типа уже есть пластины (например, при обновлении существующей модели): связь IfcRelDefinesByType одна на тип
+                _typeRel: entity_instance = _type.Types[0]
+                _typeRel.RelatedObjects = list(_typeRel.RelatedObjects) + _typePlates
+            else:
+                model.createIfcRelDefinesByType(ifcopenshell.guid.new(), _history, None, None, _typePlates, _type)
+        _plates.append(_typePlates)
+    _allPlates: list[entity_instance] = [p for _typePlates in _plates for p in _typePlates]
+    if len(_allPlates) > 0:
+        if len(storey.ContainsElements) > 0:
+            _rel = storey.ContainsElements[0]
+            _rel.RelatedElements = list(_rel.RelatedElements) + _allPlates
+        else:
+            model.createIfcRelContainedInSpatialStructure(
+                ifcopenshell.guid.new(), _history, None, None, _allPlates, storey)
+    return _plates
+
+
+def remove_Product(model: ios.file, product: entity_instance) -> None:
+    '''
+    Функция remove_Product удаляет из модели пластину или тип пластины вместе с размещением, представлениями и связями, которые больше ни на что не ссылаются.
+    '''
+    remove_Entity(model, product, lambda: run("root.remove_product", model, product=product))
+
+
+def remove_LocalPlacement(model: ios.file, local_placements: dict[str, entity_instance], local_placement: entity_instance) -> None:
+    '''
+    Функция remove_LocalPlacement удаляет объект IfcLocalPlacement, на который больше ничто не ссылается, вместе с системой координат, точками и направлениями, которые не используются другими объектами.
+    Размещение убирается и из словаря local_placements.
+    '''
+    if model.get_total_inverses(local_placement) > 0:
+        return
+    _name: str = get_LocalPlacementName(local_placement)
+    if local_placements.get(_name) == local_placement:
+        del local_placements[_name]
+    remove_Entity(model, local_placement)
+
+
+def remove_Entity(model: ios.file, entity: entity_instance, remove: Callable[[], None] | None = None) -> None:
+    '''
+    Функция remove_Entity удаляет из модели объект и подчинённые ему объекты и убирает удалённое из пула объектов модели, чтобы пул не вернул их при следующем создании. Все удаления объектов из модели выполняются через неё.
+
+    :param entity: удаляемый объект
+    :type entity: entity_instance
+    :param remove: функция, удаляющая объект; по умолчанию remove_deep2 — подчинённые объекты удаляются, если на них больше ничто не ссылается
+    :type remove: Callable[[], None] | None
+    '''
+    # идентификаторы собираются до удаления: удалённые объекты читать уже нельзя
+    _ids: list[int] = [e.id() for e in model.traverse(entity)]
+    if remove is None:
+        remove_deep2(model, entity)
+    else:
+        remove()
+    get_EntityPool(model).evict(_ids)
@@ -0,0 +1,111 @@
+import io
+import os
+import zipfile
+from typing import IO, Iterator
+
+import ifcopenshell as ios
+import zstandard
+
+
+# форматы результата: ifc — STEP без сжатия, ifczip — STEP в ZIP-архиве (ifcZIP), zst — STEP, сжатый zstandard
+FORMATS: dict[str, str] = {
+    "ifc": ".ifc",
+    "ifczip": ".ifczip",
+    "zst": ".ifc.zst"
+}
+ZSTDLEVEL: int = 10
+# число сущностей, передаваемых сжатию за один раз
+CHUNK: int = 4096
+
+
+def get_format(path: str) -> str:
+    """
+    Функция get_format определяет формат IFC-файла по расширению (без учёта регистра); неизвестные расширения считаются STEP без сжатия.
+
+    :param path: путь к IFC-файлу
+    :type path: str
+    :return: формат (FORMATS)
+    :rtype: str
+    """
+    _path: str = path.lower()
+    for format in ("zst", "ifczip"):
+        if _path.endswith(FORMATS[format]):
+            return format
+    return "ifc"
+
+
+def strip_suffix(path: str) -> str:
+    # X_cnc.ifc.zst -> X_cnc
+    _suffix: str = FORMATS[get_format(path)]
+    return path[:-len(_suffix)] if path.lower().endswith(_suffix) else os.path.splitext(path)[0]
+
+
+def iter_step(model: ios.file) -> Iterator[str]:
+    """
+    Функция iter_step выдаёт текст модели в формате STEP частями по CHUNK сущностей, не собирая его целиком; результат совпадает с model.to_string().
+
+    :param model: файл IFC
+    :type model: ios.file
+    :return: части текста
+    :rtype: Iterator[str]
+    """
+    _header = model.wrapped_data.header
+    yield (f"ISO-10303-21;\nHEADER;\n{_header.file_description.toString()};\n{_header.file_name.toString()};\n"
+           f"{_header.file_schema.toString()};\nENDSEC;\nDATA;\n")
+    # обход файла идёт не по порядку номеров, а STEP пишется по возрастанию
+    _ids: list[int] = sorted(e.id() for e in model)
+    for i in range(0, len(_ids), CHUNK):
+        yield "".join(model.by_id(n).wrapped_data.to_string(True) + ";\n" for n in _ids[i:i + CHUNK])
+    yield "ENDSEC;\nEND-ISO-10303-21;\n"
+
+
+def write_step(model: ios.file, stream: IO[bytes]) -> None:
+    for part in iter_step(model):
+        stream.write(part.encode())
+
+
+def write_ifc(model: ios.file, path: str, format: str | None = None) -> None:
+    """
+    Функция write_ifc записывает модель в файл в формате format. STEP без сжатия пишется средствами ifcopenshell, сжатые форматы — потоком в архиватор по частям.
+
+    :param model: файл IFC
+    :type model: ios.file
+    :param path: путь к создаваемому файлу
+    :type path: str
+    :param format: формат (FORMATS); None — по расширению path
+    :type format: str | None
+    """
+    format = get_format(path) if format is None else format
+    if format == "ifc":
+        model.write(path)
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if format == "ifczip":
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(os.path.basename(strip_suffix(path)) + ".ifc", "w") as stream:
+                write_step(model, stream)
+    elif format == "zst":
+        with open(path, "wb") as f, zstandard.ZstdCompressor(level=ZSTDLEVEL).stream_writer(f) as stream:
+            write_step(model, stream)
+    else:
+        raise ValueError(f"Unknown IFC format: {format}")
+
+
+def open_ifc(path: str) -> ios.file:
+    """
+    Функция open_ifc читает IFC-файл любого из форматов FORMATS.
+
+    :param path: путь к IFC-файлу
+    :type path: str
+    :return: файл IFC
+    :rtype: ios.file
+    """
+    format: str = get_format(path)
+    if format == "ifc":
+        return ios.open(path)
+    if format == "ifczip":
+        with zipfile.ZipFile(path) as archive:
+            _name: str = next(n for n in archive.namelist() if n.lower().endswith(".ifc"))
+            return ios.file.from_string(archive.read(_name).decode())
+    with open(path, "rb") as f, zstandard.ZstdDecompressor().stream_reader(f) as stream:
+        return ios.file.from_string(io.TextIOWrapper(stream).read())
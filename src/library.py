@@ -0,0 +1,144 @@
+from src.ifc import copy_Entity
+
+import hashlib
+import json
+import os
+import uuid
+from typing import Any
+
+import ifcopenshell as ios
+from ifcopenshell import entity_instance
+
+
+# версия формата библиотеки входит в сигнатуру: её нужно увеличивать при изменении построения тела пластины (create_PlateSolid)
+VERSION: str = "1"
+
+
+class TemplateLibrary:
+    """
+    Класс TemplateLibrary хранит на диске шаблоны пластин, распознанные при предыдущих конвертациях, вместе с готовым телом пластины IFC (выдавливания профилей и CSG-дерево).
+
+    Запись ищется по сигнатуре шаблона — хешу нормализованной геометрии контура, резов и фрезеровок в том виде, в котором она передаётся в IFC, — поэтому найденное тело совпадает с тем, что было бы построено заново.
+    Список сигнатур читается с диска один раз при создании библиотеки, так что промах не требует обращения к диску; записи читаются по первому запросу.
+    Записи удаляются вместе с записями ConversionCache, если каталог передан ему как хранилище; время изменения файла служит временем последнего обращения.
+
+    :param folder: каталог библиотеки
+    :type folder: str
+    """
+
+    SUFFIX: str = ".json"
+
+    def __init__(self, folder: str):
+        self.folder: str = folder
+        self.signatures: set[str] = self.scan()
+        # разобранные записи: сигнатура -> (файл IFC с телом, запись)
+        self.entries: dict[str, tuple[ios.file, dict[str, Any]]] = dict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.saved: int = 0
+
+    def __contains__(self, signature: str) -> bool:
+        return signature in self.signatures
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def entryPath(self, signature: str) -> str:
+        return os.path.join(self.folder, signature[:2], f"{signature}{self.SUFFIX}")
+
+    def scan(self) -> set[str]:
+        _signatures: set[str] = set()
+        if not os.path.isdir(self.folder):
+            return _signatures
+        for prefix in os.listdir(self.folder):
+            _prefixPath: str = os.path.join(self.folder, prefix)
+            if os.path.isdir(_prefixPath):
+                _signatures.update(n.removesuffix(self.SUFFIX) for n in os.listdir(_prefixPath) if n.endswith(self.SUFFIX))
+        return _signatures
+
+    def read(self, signature: str) -> tuple[ios.file, dict[str, Any]] | None:
+        if signature not in self.entries:
+            try:
+                with open(self.entryPath(signature)) as f:
+                    _entry: dict[str, Any] = json.load(f)
+                os.utime(self.entryPath(signature))
+                self.entries[signature] = (ios.file.from_string(_entry["ifc"]), _entry)
+            except (OSError, ValueError, KeyError, RuntimeError):
+                # повреждённая или удалённая запись считается отсутствующей
+                self.signatures.discard(signature)
+                return None
+        return self.entries[signature]
+
+    def load(self, model: ios.file, signature: str, name: str) -> tuple[entity_instance, list[entity_instance]] | None:
+        """
+        Метод load копирует тело пластины из библиотеки в модель; имена профилей приводятся к имени нового шаблона.
+
+        :param model: файл IFC
+        :type model: ios.file
+        :param signature: сигнатура шаблона (make_signature)
+        :type signature: str
+        :param name: имя шаблона в текущей конвертации
+        :type name: str
+        :return: тело пластины и его профили или None, если записи нет
+        :rtype: tuple[entity_instance, list[entity_instance]] | None
+        """
+        _read: tuple[ios.file, dict[str, Any]] | None = self.read(signature) if signature in self.signatures else None
+        if _read is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        _file, _entry = _read
+        _copies: dict[int, entity_instance] = dict()
+        _solid: entity_instance = copy_Entity(model, _file.by_id(_entry["solid"]), _copies)
+        _profiles: list[entity_instance] = [e for e in _copies.values() if e.is_a("IfcProfileDef")]
+        for profile in _profiles:
+            if profile.ProfileName:
+                profile.ProfileName = name + profile.ProfileName.removeprefix(_entry["name"])
+        return _solid, _profiles
+
+    def save(self, model: ios.file, signature: str, name: str, solid: entity_instance, template: dict[str, Any]) -> None:
+        """
+        Метод save сохраняет тело пластины и сведения о шаблоне в библиотеку. Запись пишется во временный файл и переносится на место переименованием, поэтому параллельные процессы не видят её частично записанной.
+
+        :param model: файл IFC, содержащий тело
+        :type model: ios.file
+        :param signature: сигнатура шаблона (make_signature)
+        :type signature: str
+        :param name: имя шаблона, из которого получено тело
+        :type name: str
+        :param solid: тело пластины
+        :type solid: entity_instance
+        :param template: сведения о шаблоне (признаки, длина реза, центры фрезеровок), сериализуемые в JSON
+        :type template: dict[str, Any]
+        """
+        _file: ios.file = ios.file(schema=model.schema)
+        _copy: entity_instance = _file.add(solid)
+        _entry: dict[str, Any] = {
+            "version": VERSION,
+            "name": name,
+            "template": template,
+            "solid": _copy.id(),
+            "ifc": _file.to_string()
+        }
+        _path: str = self.entryPath(signature)
+        os.makedirs(os.path.dirname(_path), exist_ok=True)
+        _tmp: str = f"{_path}.{uuid.uuid4().hex}.tmp"
+        with open(_tmp, "w") as f:
+            json.dump(_entry, f, ensure_ascii=False)
+        os.replace(_tmp, _path)
+        self.signatures.add(signature)
+        self.entries[signature] = (_file, _entry)
+        self.saved += 1
+
+
+def make_signature(data: dict[str, Any]) -> str:
+    """
+    Функция make_signature вычисляет сигнатуру шаблона: хеш SHA-256 нормализованной геометрии и параметров построения тела.
+
+    :param data: геометрия и параметры, сериализуемые в JSON
+    :type data: dict[str, Any]
+    :return: сигнатура
+    :rtype: str
+    """
+    _source: str = json.dumps({"version": VERSION, **data}, sort_keys=True)
+    return hashlib.sha256(_source.encode()).hexdigest()
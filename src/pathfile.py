@@ -0,0 +1,109 @@
+import math
+import os
+import struct
+import uuid
+import zipfile
+
+import numpy as np
+
+
+# версия формата файла путей: её нужно увеличивать при изменении состава или смысла массивов PathStore
+VERSION: str = "2"
+VERSIONNAME: str = "__version__"
+# локальный заголовок записи ZIP: 30 байт, затем имя и дополнительное поле
+ZIPHEADER: int = 30
+
+
+def save_arrays(path: str, arrays: dict[str, np.ndarray]) -> None:
+    """
+    Функция save_arrays сохраняет массивы в файл .npz без сжатия вместе с версией формата. Файл пишется во временный и переносится на место переименованием, поэтому параллельные процессы не видят его частично записанным.
+
+    :param path: путь к файлу .npz
+    :type path: str
+    :param arrays: массивы по имени
+    :type arrays: dict[str, np.ndarray]
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _tmp: str = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(_tmp, "wb") as f:
+            # без сжатия: записи архива лежат в файле подряд и отображаются в память
+            np.savez(f, **{VERSIONNAME: np.array(VERSION)}, **arrays)
+        os.replace(_tmp, path)
+    finally:
+        if os.path.isfile(_tmp):
+            os.remove(_tmp)
+
+
+def load_arrays(path: str, mmap: bool = True) -> dict[str, np.ndarray]:
+    """
+    Функция load_arrays читает массивы из файла .npz, записанного save_arrays. При mmap массивы не читаются, а отображаются в память только для чтения
+    (np.load не отображает записи .npz: смещение каждой записи находится по заголовкам ZIP и NPY).
+
+    :param path: путь к файлу .npz
+    :type path: str
+    :param mmap: отображать ли массивы в память
+    :type mmap: bool
+    :return: массивы по имени (без версии)
+    :rtype: dict[str, np.ndarray]
+    :raises ValueError: файл другой версии формата или сжат
+    """
+    _arrays: dict[str, np.ndarray] = dict()
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Compressed entry {info.filename} in {path}")
+            f.seek(info.header_offset)
+            _nameLength, _extraLength = struct.unpack("<HH", f.read(ZIPHEADER)[26:ZIPHEADER])
+            f.seek(info.header_offset + ZIPHEADER + _nameLength + _extraLength)
+            _version: tuple[int, int] = np.lib.format.read_magic(f)
+            _start: int = f.tell()
+            _shape, _fortran, _dtype = (np.lib.format.read_array_header_1_0(f) if _version == (1, 0)
+                                        else np.lib.format.read_array_header_2_0(f))
+            _name: str = info.filename.removesuffix(".npy")
+            if mmap and math.prod(_shape) > 0 and not _dtype.hasobject:
+                _arrays[_name] = np.memmap(path, dtype=_dtype, mode="r", offset=f.tell(), shape=_shape, order="F" if _fortran else "C")
+            else:
+                f.seek(_start - len(np.lib.format.magic(*_version)))
+                _arrays[_name] = np.lib.format.read_array(f, allow_pickle=False)
+    _fileVersion: np.ndarray | None = _arrays.pop(VERSIONNAME, None)
+    if _fileVersion is None or str(_fileVersion) != VERSION:
+        raise ValueError(f"Unsupported path file version in {path}: {_fileVersion}")
+    return _arrays
+
+
+class PathCache:
+    """
+    Класс PathCache хранит пути листов, выделенные из DXF (массивы PathStore), в файлах .npz по ключу — хешу содержимого DXF-файла и настроек выбора путей.
+    Повторная конвертация того же листа берёт пути из кэша, не разбирая DXF-файл.
+
+    Записи удаляются вместе с записями ConversionCache, если каталог передан ему как хранилище; время изменения файла служит временем последнего обращения.
+
+    :param folder: каталог кэша
+    :type folder: str
+    """
+
+    SUFFIX: str = ".npz"
+
+    def __init__(self, folder: str):
+        self.folder: str = folder
+
+    def entryPath(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], f"{key}{self.SUFFIX}")
+
+    def load(self, key: str, mmap: bool = True) -> dict[str, np.ndarray] | None:
+        _path: str = self.entryPath(key)
+        # повреждённая, удалённая или записанная другой версией запись считается отсутствующей
+        try:
+            _arrays: dict[str, np.ndarray] = load_arrays(_path, mmap)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return None
+        try:
+            os.utime(_path)
+        except OSError:
+            # запись удалена параллельно (ConversionCache.evict/clear); отображённые массивы остаются доступны
+            pass
+        return _arrays
+
+    def save(self, key: str, arrays: dict[str, np.ndarray]) -> None:
+        save_arrays(self.entryPath(key), arrays)
@@ -0,0 +1,159 @@
+from src.ifc import create_CartesianPoint, create_Direction, create_LocalPlacement, rename_PlateType
+from src.classes import Block, Model, Template
+
+import csv
+import json
+import os
+from collections import deque
+
+import numpy as np
+
+import ifcopenshell as ios
+from ifcopenshell import entity_instance
+
+
+# числовые столбцы файла координат: положение, ось Z и ось X детали
+COLUMNS: list[str] = [
+    "x", "y", "z",
+    "Axis.X", "Axis.Y", "Axis.Z",
+    "RefDirection.X", "RefDirection.Y", "RefDirection.Z"
+]
+EXTENSIONS: list[str] = [".csv", ".json"]
+
+
+class PlacementData:
+    def __init__(
+        self,
+        names: list[str],
+        trueNames: list[str],
+        values: np.ndarray,
+        tags: list[str] | None = None
+    ):
+        self.names: list[str] = names
+        self.trueNames: list[str] = trueNames
+        self.values: np.ndarray = values
+        # IfcPlate.Tag детали («лист:дескриптор DXF контура»): строка с Tag относится к одной пластине и не сдвигается при перенумерации шаблонов
+        self.tags: list[str] = tags if tags is not None else [""] * len(names)
+        # строки без Tag по имени шаблона в порядке следования в файле
+        self.index: dict[str, list[int]] = self.formIndex()
+        self.tagIndex: dict[str, int] = self.formTagIndex()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def formIndex(self) -> dict[str, list[int]]:
+        _index: dict[str, list[int]] = dict()
+        for i, name in enumerate(self.names):
+            if self.tags[i] == "":
+                _index.setdefault(name, []).append(i)
+        return _index
+
+    def formTagIndex(self) -> dict[str, int]:
+        _index: dict[str, int] = dict()
+        for i, tag in enumerate(self.tags):
+            if tag != "":
+                _index.setdefault(tag, i)
+        return _index
+
+    def getQueues(self) -> dict[str, deque[int]]:
+        return {name: deque(rows) for name, rows in self.index.items()}
+
+    def getTrueName(self, template: Template) -> str:
+        # строки шаблона по имени, затем строки его деталей по Tag
+        _rows: list[int] = self.index.get(template.name, []) + [self.tagIndex[d.tag] for d in template.details if d.tag in self.tagIndex]
+        return self.trueNames[_rows[0]] if len(_rows) > 0 else ""
+
+    def createPlacement(self, model: Model, row: int) -> entity_instance:
+        ifcFile: ios.file = model.ifcFile
+        _values: list[float] = self.values[row].tolist()
+        return create_LocalPlacement(
+            model=ifcFile,
+            local_placements=model.local_placements,
+            point=create_CartesianPoint(model=ifcFile, coords=_values[0:3]),
+            dir_z=create_Direction(model=ifcFile, d_ratios=_values[3:6]),
+            dir_x=create_Direction(model=ifcFile, d_ratios=_values[6:9])
+        )
+
+    def apply(self, block: Block) -> None:
+        """
+        Метод apply применяет данные к блоку: переименовывает типы пластин и пластины согласно trueName и назначает пластинам размещения.
+        Строка с Tag достаётся пластине с тем же IfcPlate.Tag; строки без Tag с одинаковым именем достаются пластинам этого шаблона по очереди. Пластина без строки остаётся в начале координат.
+        Размещение создаётся только для строки, доставшейся пластине, поэтому строки без пластин не оставляют в модели лишних объектов;
+        совпадающее размещение берётся из Model.local_placements. Заменённые размещения удаляются в Block.removeStale.
+
+        :param block: блок
+        :type block: Block
+        """
+        model: Model = block.model
+        ifcFile: ios.file = model.ifcFile
+        for plateType in block.plateTypes:
+            _trueName: str = self.getTrueName(plateType.template)
+            if _trueName != "":
+                plateType.template.name = _trueName
+                rename_PlateType(ifcFile, plateType.ifcPlateType, _trueName)
+
+        _queues: dict[str, deque[int]] = self.getQueues()
+        for plate in block.plates:
+            _row: int | None = self.tagIndex.get(plate.ifcPlate.Tag)
+            if _row is None:
+                _queue: deque[int] | None = _queues.get(plate.ifcPlate.Name)
+                if not _queue:
+                    continue
+                _row = _queue.popleft()
+            _placement: entity_instance = self.createPlacement(model, _row)
+            _old: entity_instance | None = plate.ifcPlate.ObjectPlacement
+            if _old != _placement:
+                plate.ifcPlate.ObjectPlacement = _placement
+                if _old is not None:
+                    block.unusedPlacements.append(_old)
+            if self.trueNames[_row] != "":
+                plate.ifcPlate.Name = self.trueNames[_row]
+
+
+def parse_placement_rows(rows: list[dict[str, str]]) -> PlacementData:
+    """
+    Функция parse_placement_rows преобразует строки файла координат в PlacementData; числовые столбцы разбираются одним вызовом NumPy.
+
+    :param rows: строки с ключами Name, trueName (необязательный), Tag (необязательный) и COLUMNS
+    :type rows: list[dict[str, str]]
+    :return: данные о размещении
+    :rtype: PlacementData
+    """
+    _names: list[str] = [row["Name"] for row in rows]
+    _trueNames: list[str] = [row.get("trueName") or "" for row in rows]
+    _tags: list[str] = [row.get("Tag") or "" for row in rows]
+    _values: np.ndarray = np.array([[row[c] for c in COLUMNS] for row in rows], dtype=float).reshape(-1, len(COLUMNS))
+    return PlacementData(_names, _trueNames, _values, _tags)
+
+
+def load_placement_data(path: str) -> PlacementData:
+    """
+    Функция load_placement_data загружает данные о размещении деталей из CSV- или JSON-файла (выгрузки из BonsaiBIM). Формат определяется по расширению.
+
+    :param path: путь к файлу .csv или .json
+    :type path: str
+    :return: данные о размещении
+    :rtype: PlacementData
+    """
+    _rows: list[dict[str, str]]
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path) as f:
+            _rows = json.load(f)
+    else:
+        with open(path, newline="") as f:
+            _rows = list(csv.DictReader(f))
+    return parse_placement_rows(_rows)
+
+
+def find_placement_file(folder: str, blockName: str) -> str | None:
+    """
+    Функция find_placement_file ищет файл координат блока: {folder}/{blockName}.csv, затем {folder}/{blockName}.json.
+
+    :return: путь к файлу или None, если файла нет
+    :rtype: str | None
+    """
+    for ext in EXTENSIONS:
+        _path: str = os.path.join(folder, f"{blockName}{ext}")
+        if os.path.isfile(_path):
+            return _path
+    return None
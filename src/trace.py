@@ -0,0 +1,140 @@
+import json
+import os
+import threading
+import time
+from typing import Any
+
+
+class Span:
+    def __init__(self, tracer: "Tracer", name: str, args: dict[str, Any]):
+        self.tracer: Tracer = tracer
+        self.name: str = name
+        self.args: dict[str, Any] = args
+        self.start: int = 0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.tracer.record(self.name, self.start, time.perf_counter_ns(), self.args)
+
+
+class NullSpan:
+    # пустой участок, возвращаемый при выключенной трассировке: не хранит состояния и ничего не измеряет
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NULL_SPAN: NullSpan = NullSpan()
+
+
+class Tracer:
+    def __init__(self, detailed: bool = False):
+        self.detailed: bool = detailed
+        self.origin: int = time.perf_counter_ns()
+        self.events: list[dict[str, Any]] = []
+
+    def record(self, name: str, start: int, finish: int, args: dict[str, Any]) -> None:
+        _event: dict[str, Any] = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,
+            "dur": (finish - start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident()
+        }
+        if args:
+            _event["args"] = args
+        self.events.append(_event)
+
+    def totals(self) -> dict[str, tuple[int, float]]:
+        """
+        Метод totals суммирует длительность участков по имени.
+
+        :return: число вызовов и суммарное время в секундах по имени участка, в порядке первого появления
+        :rtype: dict[str, tuple[int, float]]
+        """
+        _totals: dict[str, tuple[int, float]] = dict()
+        for e in sorted(self.events, key=lambda e: e["ts"]):
+            _count, _time = _totals.get(e["name"], (0, 0.))
+            _totals[e["name"]] = (_count + 1, _time + e["dur"] / 1e6)
+        return _totals
+
+    def summary(self) -> str:
+        """
+        Метод summary возвращает однострочную сводку: «имя: время [×число вызовов]» через « | ».
+        """
+        _parts: list[str] = []
+        for name, (count, spent) in self.totals().items():
+            _part: str = f"{name}: {spent:.3f} с"
+            if count > 1:
+                _part += f" ×{count}"
+            _parts.append(_part)
+        return " | ".join(_parts)
+
+    def write(self, path: str) -> None:
+        """
+        Метод write сохраняет участки в формате Chrome Trace Event (открывается в chrome://tracing и Perfetto).
+
+        :param path: путь к JSON-файлу
+        :type path: str
+        """
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+_tracer: Tracer | None = None
+
+
+def enable(detailed: bool = False) -> Tracer:
+    """
+    Функция enable включает трассировку в текущем процессе, начиная новый набор участков.
+
+    :param detailed: записывать ли также участки по отдельным деталям и шаблонам
+    :type detailed: bool
+    :return: трассировщик
+    :rtype: Tracer
+    """
+    global _tracer
+    _tracer = Tracer(detailed)
+    return _tracer
+
+
+def disable() -> Tracer | None:
+    """
+    Функция disable выключает трассировку и возвращает трассировщик с накопленными участками.
+    """
+    global _tracer
+    _finished, _tracer = _tracer, None
+    return _finished
+
+
+def get_tracer() -> Tracer | None:
+    return _tracer
+
+
+def span(name: str, detailed: bool = False, **args: Any) -> Span | NullSpan:
+    """
+    Функция span возвращает контекстный менеджер, измеряющий время выполнения участка:
+
+        with span("Sheet.formDetails"):
+            ...
+
+    При выключенной трассировке (или для подробного участка без режима detailed) возвращается общий пустой объект, поэтому вызовы можно оставлять в рабочем коде.
+
+    :param name: имя участка
+    :type name: str
+    :param detailed: участок относится к отдельной детали или шаблону
+    :type detailed: bool
+    :param args: дополнительные сведения, сохраняемые в трассе
+    :return: контекстный менеджер
+    :rtype: Span | NullSpan
+    """
+    _current: Tracer | None = _tracer
+    if _current is None or (detailed and not _current.detailed):
+        return _NULL_SPAN
+    return Span(_current, name, args)
@@ -0,0 +1,269 @@
+from src.ifcfile import open_ifc, strip_suffix
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable
+
+import ifcopenshell as ios
+from ifcopenshell import entity_instance, validate
+from ifcopenshell.express import rule_executor
+
+
+# режимы валидации:
+# off — без валидации; schema — только схема (типы и число значений атрибутов, обратные связи, GlobalId);
+# full — схема и правила EXPRESS (WHERE-правила типов и сущностей, глобальные правила);
+# changed — схема и правила EXPRESS только для сущностей, созданных в этой конвертации
+MODES: tuple[str, ...] = ("off", "schema", "full", "changed")
+REPORTSUFFIX: str = ".validation.json"
+# проверка переключает глобальные настройки ifcopenshell (use_attribute_value_derived, settings.unpack_non_aggregate_inverses) и восстанавливает их;
+# проверки в разных потоках одного процесса выполняются по очереди
+_lock: threading.Lock = threading.Lock()
+
+
+def check_model(model: ios.file, logger: validate.json_logger) -> None:
+    """
+    Функция check_model выполняет проверки схемы, относящиеся ко всему файлу: заголовок и GlobalId (формат и уникальность среди всех сущностей файла).
+
+    :param model: файл IFC
+    :type model: ios.file
+    :param logger: журнал валидации
+    :type logger: validate.json_logger
+    """
+    logger.set_state("type", "schema")
+    validate.validate_ifc_header(model, logger)
+    _guids: dict[str, entity_instance] = dict()
+    for inst in sorted(model.by_type("IfcRoot"), key=lambda e: e.id()):
+        logger.set_state("instance", inst)
+        _guid: str | None = inst.GlobalId
+        if _guid is None:
+            continue
+        if _guid in _guids:
+            logger.error("On instance:\n    %s\n    %s\n%s\nViolated by:\n    %s\n    %s",
+                         inst, validate.annotate_inst_attr_pos(inst, 0), "Rule IfcRoot.UR1:\n    The attribute GlobalId should be unique",
+                         _guids[_guid], validate.annotate_inst_attr_pos(_guids[_guid], 0))
+        elif (_error := validate.validate_guid(_guid)) is not None:
+            logger.error("On instance:\n    %s\n    %s\n%s\nViolated by:\n    %s\n",
+                         inst, validate.annotate_inst_attr_pos(inst, 0),
+                         "IfcGloballyUniqueId base64 validation:\n    The attribute GlobalId should be valid base64 encoded 128-bit number.", _error)
+        else:
+            _guids[_guid] = inst
+
+
+def check_entities(model: ios.file, entities: Iterable[entity_instance], logger: validate.json_logger) -> None:
+    """
+    Функция check_entities проверяет сущности по схеме так же, как ifcopenshell.validate.validate: неабстрактность, типы и обязательность атрибутов, мощность обратных связей.
+    GlobalId проверяется в check_model.
+
+    :param model: файл IFC
+    :type model: ios.file
+    :param entities: проверяемые сущности
+    :type entities: Iterable[entity_instance]
+    :param logger: журнал валидации
+    :type logger: validate.json_logger
+    """
+    _schema = ios.ifcopenshell_wrapper.schema_by_name(model.schema_identifier)
+    logger.set_state("type", "schema")
+    for inst in entities:
+        logger.set_state("instance", inst)
+        _entity, _attrs = validate.get_entity_attributes(_schema, inst.is_a())
+        if _entity.is_abstract():
+            logger.set_state("attribute", None)
+            logger.error("Entity %s is abstract" % _entity.name())
+        _values: list[Any] = [None] * len(_attrs)
+        _invalid: bool = False
+        for i, attr in enumerate(_attrs):
+            try:
+                _values[i] = inst[i]
+            except Exception:
+                logger.set_state("attribute", f"{_entity.name()}.{attr.name()}")
+                logger.error("Invalid attribute value")
+                _invalid = True
+        if not _invalid:
+            for attr, value, isDerived in zip(_attrs, _values, _entity.derived()):
+                _name: str = f"{_entity.name()}.{attr.name()}"
+                if isDerived and not isinstance(value, ios.ifcopenshell_wrapper.attribute_value_derived):
+                    logger.set_state("attribute", _name)
+                    logger.error("Attribute is derived in subtype")
+                if value is None and not attr.optional() and not isDerived:
+                    logger.set_state("attribute", _name)
+                    logger.error("Attribute not optional")
+                if value is not None and not isDerived:
+                    try:
+                        validate.assert_valid(attr.type_of_attribute(), value, _schema, attr=attr)
+                    except validate.ValidationError as e:
+                        logger.set_state("attribute", e.attribute)
+                        logger.error(str(e))
+        for attr in _entity.all_inverse_attributes():
+            logger.set_state("attribute", f"{_entity.name()}.{attr.name()}")
+            try:
+                validate.assert_valid_inverse(attr, getattr(inst, attr.name()), _schema)
+            except Exception as e:
+                logger.error(str(e))
+
+
+def get_checked_ids(model: ios.file, mode: str, firstId: int | None = None) -> list[int] | None:
+    """
+    Функция get_checked_ids выбирает сущности, проверяемые в режиме mode.
+
+    :param model: файл IFC
+    :type model: ios.file
+    :param mode: режим валидации (MODES)
+    :type mode: str
+    :param firstId: номер первой сущности, созданной в этой конвертации (для режима changed)
+    :type firstId: int | None
+    :return: номера сущностей или None — все сущности файла
+    :rtype: list[int] | None
+    """
+    if mode != "changed" or firstId is None:
+        return None
+    return [e.id() for e in model if e.id() >= firstId]
+
+
+def get_shard_ids(model: ios.file, ids: list[int] | None, shard: int, shards: int) -> list[int] | None:
+    """
+    Функция get_shard_ids делит проверяемые сущности между shards процессами по очереди и возвращает долю процесса shard.
+
+    :return: номера сущностей доли или None — все сущности (при shards = 1)
+    :rtype: list[int] | None
+    """
+    if shards <= 1:
+        return ids
+    _ids: list[int] = ids if ids is not None else sorted(e.id() for e in model)
+    return _ids[shard::shards]
+
+
+def check_rules(model: ios.file, ids: list[int] | None, logger: validate.json_logger) -> None:
+    """
+    Функция check_rules проверяет файл правилами EXPRESS (ifcopenshell.express.rule_executor) и оставляет сообщения о сущностях ids и о файле в целом (глобальные правила).
+
+    :param ids: номера проверяемых сущностей; None — все сущности файла
+    :type ids: list[int] | None
+    """
+    _logger = validate.json_logger()
+    rule_executor.run(model, _logger)
+    _ids: set[int] | None = set(ids) if ids is not None else None
+    logger.statements += [
+        s for s in _logger.statements if _ids is None or s.get("instance") is None or s["instance"].id() in _ids
+    ]
+
+
+def validate_model(model: ios.file, mode: str, ids: list[int] | None = None, shard: int = 0, shards: int = 1) -> list[dict[str, Any]]:
+    """
+    Функция validate_model проверяет модель в режиме mode. Если проверяется весь файл в одном процессе, проверку целиком выполняет ifcopenshell.validate.validate.
+    Иначе сущности ids (их доля shard из shards) проверяются по схеме по отдельности, а проверки всего файла (заголовок, уникальность GlobalId) и, кроме режима schema,
+    правила EXPRESS выполняются один раз — в доле 0; из сообщений правил остаются относящиеся к сущностям ids.
+
+    :param model: файл IFC
+    :type model: ios.file
+    :param mode: режим валидации: schema, full или changed
+    :type mode: str
+    :param ids: номера проверяемых сущностей; None — все сущности файла
+    :type ids: list[int] | None
+    :param shard: номер доли
+    :type shard: int
+    :param shards: число долей
+    :type shards: int
+    :return: сообщения валидации; значения, не сериализуемые в JSON (сущности), приведены к строкам
+    :rtype: list[dict[str, Any]]
+    """
+    logger = validate.json_logger()
+    with _lock:
+        _derived: bool = ios.ifcopenshell_wrapper.get_feature("use_attribute_value_derived")
+        _unpack: bool = ios.settings.unpack_non_aggregate_inverses
+        try:
+            if ids is None and shards <= 1:
+                validate.validate(model, logger, express_rules=mode != "schema")
+            else:
+                _shardIds: list[int] | None = get_shard_ids(model, ids, shard, shards)
+                _entities: list[entity_instance] = list(model) if _shardIds is None else [model.by_id(i) for i in _shardIds]
+                # как в ifcopenshell.validate: при проверке схемы производные атрибуты (*) отличаются от пустых ($)
+                ios.ifcopenshell_wrapper.set_feature("use_attribute_value_derived", True)
+                if shard == 0:
+                    check_model(model, logger)
+                check_entities(model, _entities, logger)
+                ios.ifcopenshell_wrapper.set_feature("use_attribute_value_derived", _derived)
+                if shard == 0 and mode != "schema":
+                    check_rules(model, ids, logger)
+        finally:
+            ios.ifcopenshell_wrapper.set_feature("use_attribute_value_derived", _derived)
+            ios.settings.unpack_non_aggregate_inverses = _unpack
+    return [to_json(s) for s in logger.statements]
+
+
+def validate_shard(ifcPath: str, mode: str, firstId: int | None = None, shard: int = 0, shards: int = 1) -> list[dict[str, Any]]:
+    """
+    Функция validate_shard читает записанный IFC-файл и проверяет долю shard из shards его проверяемых сущностей (см. validate_model). Выполняется в отдельном процессе.
+
+    :return: сообщения валидации доли
+    :rtype: list[dict[str, Any]]
+    """
+    _model: ios.file = open_ifc(ifcPath)
+    return validate_model(_model, mode, get_checked_ids(_model, mode, firstId), shard, shards)
+
+
+def validate_file(ifcPath: str, mode: str, firstId: int | None = None, shards: int = 1) -> list[dict[str, Any]]:
+    """
+    Функция validate_file проверяет записанный IFC-файл; при shards > 1 проверки схемы делятся между shards процессами, а правила EXPRESS выполняются в одном из них.
+
+    :param ifcPath: путь к IFC-файлу
+    :type ifcPath: str
+    :param mode: режим валидации: schema, full или changed
+    :type mode: str
+    :param firstId: номер первой сущности, созданной в этой конвертации (для режима changed)
+    :type firstId: int | None
+    :param shards: число процессов
+    :type shards: int
+    :return: сообщения валидации
+    :rtype: list[dict[str, Any]]
+    """
+    if shards <= 1:
+        return validate_shard(ifcPath, mode, firstId)
+    with ProcessPoolExecutor(max_workers=shards) as executor:
+        _parts = executor.map(validate_shard, [ifcPath] * shards, [mode] * shards, [firstId] * shards, range(shards), [shards] * shards)
+        return merge_statements(list(_parts))
+
+
+def merge_statements(parts: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    # доли не пересекаются; одинаковые сообщения разных долей выводятся один раз
+    _merged: dict[str, dict[str, Any]] = dict()
+    for part in parts:
+        for statement in part:
+            _merged.setdefault(json.dumps(statement, sort_keys=True), statement)
+    return list(_merged.values())
+
+
+def to_json(statement: dict[str, Any]) -> dict[str, Any]:
+    return {k: v if v is None or isinstance(v, (str, int, float, bool)) else str(v) for k, v in statement.items()}
+
+
+def get_report_path(ifcPath: str) -> str:
+    # отчёт лежит рядом с IFC-файлом: X_cnc.ifc, X_cnc.ifc.zst -> X_cnc.validation.json
+    return f"{strip_suffix(ifcPath)}{REPORTSUFFIX}"
+
+
+def write_report(ifcPath: str, mode: str, statements: list[dict[str, Any]]) -> str:
+    """
+    Функция write_report сохраняет сообщения валидации в JSON-файл рядом с IFC-файлом.
+
+    :param ifcPath: путь к проверенному IFC-файлу
+    :type ifcPath: str
+    :param mode: режим валидации
+    :type mode: str
+    :param statements: сообщения валидации
+    :type statements: list[dict[str, Any]]
+    :return: путь к отчёту
+    :rtype: str
+    """
+    _path: str = get_report_path(ifcPath)
+    with open(_path, "w") as f:
+        json.dump({
+            "file": os.path.basename(ifcPath),
+            "mode": mode,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "issues": len(statements),
+            "statements": statements
+        }, f, indent=4, ensure_ascii=False, default=str)
+    return _path